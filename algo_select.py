@@ -0,0 +1,270 @@
+import argparse
+import csv
+import glob
+import json
+import math
+import os
+from collections import defaultdict
+import numpy as np
+from graphy import CSRGraph, bfs_levels
+from ford_fulkerson import ford_fulkerson
+from dinic import dinic
+from push_relabel import push_relabel_min_cut
+from boykov_kolmogorov import boykov_kolmogorov
+from hopcroft_karp import bipartite_sides, hopcroft_karp
+
+# Picks the engine expected to be fastest on a graph from cheap features,
+# with a k-nearest-neighbour model over past benchmark runs: each training
+# point is one benchmarked graph with the log runtime of every engine run
+# on it, and the prediction for an engine is its mean log runtime over the
+# k nearest points. The model is plain JSON, rebuilt by
+#   python3 algo_select.py [results_dir ...]
+MODEL_FILE = 'algorithm_model.json'
+RESULTS_DIR = 'benchmark_results'
+FALLBACK_ALGORITHM = 'Dinic'
+FEATURES = ('log_n', 'log_m', 'density', 'log_max_capacity', 'unit_capacities',
+            'layered', 'bipartite')
+NEIGHBOURS = 5
+# Matching networks (see hopcroft_karp.bipartite_sides) always go to
+# Hopcroft-Karp; it is chosen by structure, so it stays out of the model
+MATCHING_ENGINE = 'Hopcroft-Karp'
+
+# Engines Auto may dispatch to, by their j_run names; each takes
+# (graph, s, t, stats=None, timings=None) and returns (flow, min_cut_edges)
+ENGINES = {
+    'Ford-Fulkerson': ford_fulkerson,
+    'Edmonds-Karp': lambda g, s, t, stats=None, timings=None: ford_fulkerson(
+        g, s, t, strategy='bfs', stats=stats, timings=timings),
+    'Fattest-Path': lambda g, s, t, stats=None, timings=None: ford_fulkerson(
+        g, s, t, strategy='fattest', stats=stats, timings=timings),
+    'Capacity-Scaling': lambda g, s, t, stats=None, timings=None: ford_fulkerson(
+        g, s, t, strategy='scaling', stats=stats, timings=timings),
+    'Dinic': dinic,
+    'Push-Relabel': push_relabel_min_cut,
+    'Boykov-Kolmogorov': boykov_kolmogorov,
+}
+
+
+def graph_features(graph, s, t):
+    """
+    Features of a Graph or CSRGraph: n, m, density, capacity range, unit
+    capacities, and whether every edge reachable from s runs from one BFS
+    layer to the next (layered; bipartite when s and t are 3 layers apart).
+    One vectorized BFS plus a pass over the edges.
+    """
+    csr = CSRGraph.from_graph(graph)
+    n = csr.n
+    tails, heads, caps = csr.edges()
+    m = len(caps)
+    level = bfs_levels(csr, csr.capacity, s)
+    reached = level[tails] >= 0
+    layered = bool(level[t] > 0 and m > 0 and
+                   np.all(level[heads[reached]] == level[tails[reached]] + 1))
+    return {
+        'n': n,
+        'm': m,
+        'density': m / (n * (n - 1)) if n > 1 else 0.0,
+        'min_capacity': int(caps.min()) if m else 0,
+        'max_capacity': int(caps.max()) if m else 0,
+        'unit_capacities': bool(m and caps.max() == 1),
+        'layered': layered,
+        'bipartite': layered and int(level[t]) == 3,
+    }
+
+
+def row_features(row):
+    """The same features for one benchmark CSV row, from its metadata columns."""
+    n = int(row['actual_n'])
+    density = float(row['density'])
+    max_capacity = int(row['max_capacity'])
+    graph_type = row.get('graph_type', '')
+    layered = graph_type in ('layered', 'bipartite')
+    return {
+        'n': n,
+        'm': round(density * n * (n - 1)),
+        'density': density,
+        'max_capacity': max_capacity,
+        'unit_capacities': max_capacity == 1,
+        'layered': layered,
+        'bipartite': graph_type == 'bipartite' or (layered and row.get('num_layers') == '2'),
+    }
+
+
+def _vector(features):
+    return [
+        math.log(max(features['n'], 1)),
+        math.log(max(features['m'], 1)),
+        float(features['density']),
+        math.log(max(features['max_capacity'], 1)),
+        float(features['unit_capacities']),
+        float(features['layered']),
+        float(features['bipartite']),
+    ]
+
+
+def _read_runs(paths):
+    """{graph key: (features, {algorithm: [runtime_ms, ...]})} of the successful runs."""
+    runs = {}
+    for path in paths:
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                if row.get('error') or row.get('status', 'ok') not in ('', 'ok'):
+                    continue
+                if row['algorithm'] not in ENGINES or float(row['runtime_ms']) <= 0:
+                    continue
+                key = (os.path.basename(path), row['n'], row['actual_n'], row['density'],
+                       row['max_capacity'], row.get('num_layers'), row.get('nodes_per_layer'),
+                       row.get('grid_k'), row['trial'])
+                if key not in runs:
+                    runs[key] = (row_features(row), defaultdict(list))
+                runs[key][1][row['algorithm']].append(float(row['runtime_ms']))
+    return runs
+
+
+def train(results=RESULTS_DIR, neighbours=NEIGHBOURS):
+    """
+    Build a model from benchmark CSVs: results is a directory of
+    *_results.csv files or a list of CSV paths. Rows that failed, timed
+    out or ran Auto itself are skipped.
+    """
+    paths = sorted(glob.glob(os.path.join(results, '*_results.csv'))) \
+        if isinstance(results, str) else list(results)
+    runs = _read_runs(paths)
+    if not runs:
+        raise ValueError(f"No usable benchmark rows in {results}")
+    xs = np.array([_vector(features) for features, _ in runs.values()])
+    mean = xs.mean(axis=0)
+    scale = xs.std(axis=0)
+    scale[scale == 0] = 1.0
+    points = []
+    for x, (_, times) in zip(xs.tolist(), runs.values()):
+        points.append({'x': x, 'log_ms': {algo: float(np.mean(np.log(ms)))
+                                          for algo, ms in sorted(times.items())}})
+    return {'features': list(FEATURES), 'mean': mean.tolist(), 'scale': scale.tolist(),
+            'neighbours': neighbours, 'points': points}
+
+
+def save_model(model, path=MODEL_FILE):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(model, f)
+    os.replace(tmp, path)
+
+
+def load_model(path=MODEL_FILE):
+    with open(path) as f:
+        model = json.load(f)
+    if model.get('features') != list(FEATURES):
+        raise ValueError(f"{path} was trained on other features; retrain it with algo_select.py")
+    return model
+
+
+_default_model = None
+
+
+def default_model():
+    """MODEL_FILE if present, else a model trained on RESULTS_DIR (None if neither exists)."""
+    global _default_model
+    if _default_model is None:
+        if os.path.exists(MODEL_FILE):
+            _default_model = load_model(MODEL_FILE)
+        elif glob.glob(os.path.join(RESULTS_DIR, '*_results.csv')):
+            _default_model = train(RESULTS_DIR)
+    return _default_model
+
+
+def predict_runtimes(model, features):
+    """Predicted runtime in ms of every engine in the model for these features."""
+    return _predict(model, _vector(features))
+
+
+def _predict(model, vector):
+    mean = np.array(model['mean'])
+    scale = np.array(model['scale'])
+    x = (np.array(vector) - mean) / scale
+    xs = (np.array([p['x'] for p in model['points']]) - mean) / scale
+    order = np.argsort(((xs - x) ** 2).sum(axis=1), kind='stable')
+    log_ms = defaultdict(list)
+    for i in order.tolist():
+        for algo, value in model['points'][i]['log_ms'].items():
+            if len(log_ms[algo]) < model['neighbours']:
+                log_ms[algo].append(value)
+    return {algo: math.exp(sum(values) / len(values)) for algo, values in log_ms.items()}
+
+
+def select_algorithm(graph, s, t, model=None):
+    """
+    Name of the engine predicted to be fastest on graph (see ENGINES), or
+    MATCHING_ENGINE for a matching network.
+    """
+    if bipartite_sides(graph, s, t) is not None:
+        return MATCHING_ENGINE
+    if model is None:
+        model = default_model()
+    if model is None:
+        return FALLBACK_ALGORITHM
+    predicted = predict_runtimes(model, graph_features(graph, s, t))
+    return min(predicted, key=predicted.get)
+
+
+def auto_max_flow(graph, s, t, model=None, stats=None, timings=None):
+    """
+    Run the engine select_algorithm picks; returns (flow, min_cut_edges).
+    stats and timings, if dicts, receive that engine's operation counts and
+    phase times.
+    """
+    csr = CSRGraph.from_graph(graph)
+    name = select_algorithm(csr, s, t, model)
+    engine = hopcroft_karp if name == MATCHING_ENGINE else ENGINES[name]
+    return engine(csr, s, t, stats=stats, timings=timings)
+
+
+def evaluate(results=RESULTS_DIR, neighbours=NEIGHBOURS):
+    """
+    Leave-one-out check of the model on its own training data: for every
+    benchmarked graph, train on the others and compare the pick with the
+    measured winner. Returns (accuracy, auto_ms, best_single, oracle_ms),
+    best_single being (name, total_ms) of the best fixed engine.
+    """
+    model = train(results, neighbours)
+    points = model['points']
+    hits = 0
+    auto_ms = oracle_ms = 0.0
+    totals = defaultdict(float)
+    for i, point in enumerate(points):
+        rest = dict(model, points=points[:i] + points[i + 1:])
+        measured = {algo: math.exp(v) for algo, v in point['log_ms'].items()}
+        predicted = _predict(rest, point['x'])
+        pick = min((a for a in predicted if a in measured), key=predicted.get)
+        winner = min(measured, key=measured.get)
+        hits += pick == winner
+        auto_ms += measured[pick]
+        oracle_ms += measured[winner]
+        for algo, ms in measured.items():
+            totals[algo] += ms
+    best = min(totals, key=totals.get)
+    return hits / len(points), auto_ms, (best, totals[best]), oracle_ms
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the Auto algorithm selector on benchmark CSVs")
+    parser.add_argument('results', nargs='*', default=[RESULTS_DIR],
+                        help="result directories or CSV files (default: %(default)s)")
+    parser.add_argument('--out', default=MODEL_FILE, help="model file (default: %(default)s)")
+    parser.add_argument('--neighbours', type=int, default=NEIGHBOURS,
+                        help="runs averaged per prediction (default: %(default)s)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    paths = []
+    for item in args.results:
+        paths += sorted(glob.glob(os.path.join(item, '*_results.csv'))) if os.path.isdir(item) else [item]
+    model = train(paths, args.neighbours)
+    save_model(model, args.out)
+    print(f"Trained on {len(model['points'])} benchmarked graphs; saved to {args.out}")
+    accuracy, auto_ms, (best, best_ms), oracle_ms = evaluate(paths, args.neighbours)
+    print(f"Leave-one-out: picked the fastest engine {accuracy:.0%} of the time")
+    print(f"Total runtime: Auto {auto_ms:.0f} ms, always {best} {best_ms:.0f} ms, "
+          f"best per graph {oracle_ms:.0f} ms")
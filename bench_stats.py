@@ -0,0 +1,62 @@
+import numpy as np
+
+# Runtime statistics for the benchmark harness (j_run --repeats) and the
+# plots. Timings are skewed by outliers (a GC pause, a context switch), so
+# everything is built on the median: quartiles for the spread and percentile
+# bootstrap confidence intervals for its uncertainty. Resampling uses a fixed
+# seed, so the same samples always give the same interval.
+CONFIDENCE = 0.95
+RESAMPLES = 1000
+
+
+def quartiles(samples):
+    """(q1, median, q3) of samples."""
+    q1, median, q3 = np.percentile(np.asarray(samples, dtype=float), [25, 50, 75])
+    return float(q1), float(median), float(q3)
+
+
+def _interval(medians, confidence):
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(medians, [tail, 100 - tail])
+    return float(low), float(high)
+
+
+def bootstrap_ci(samples, confidence=CONFIDENCE, resamples=RESAMPLES, seed=0):
+    """Percentile bootstrap confidence interval (low, high) of the median."""
+    x = np.asarray(samples, dtype=float)
+    if x.size < 2:
+        return float(x[0]), float(x[0])
+    rng = np.random.default_rng(seed)
+    picks = x[rng.integers(0, x.size, size=(resamples, x.size))]
+    return _interval(np.median(picks, axis=1), confidence)
+
+
+def grouped_bootstrap_ci(groups, confidence=CONFIDENCE, resamples=RESAMPLES, seed=0):
+    """
+    Bootstrap interval of the median over samples in groups (the repeats of
+    each trial): each resample draws groups with replacement, then samples
+    within each drawn group, so both the spread between trials and the noise
+    within one are covered and no trial outweighs another by having more
+    repeats.
+    """
+    groups = [np.asarray(g, dtype=float) for g in groups if len(g)]
+    if len(groups) == 1:
+        return bootstrap_ci(groups[0], confidence, resamples, seed)
+    rng = np.random.default_rng(seed)
+    sizes = np.array([g.size for g in groups])
+    # The same number of draws k from every group keeps their weights equal;
+    # groups are padded into one matrix so all resamples are drawn at once
+    k = int(sizes.max())
+    padded = np.zeros((len(groups), k))
+    for i, g in enumerate(groups):
+        padded[i, :g.size] = g
+    drawn = rng.integers(0, len(groups), size=(resamples, len(groups)))
+    within = (rng.random((resamples, len(groups), k)) * sizes[drawn][:, :, None]).astype(np.int64)
+    picks = padded[drawn[:, :, None], within].reshape(resamples, -1)
+    return _interval(np.median(picks, axis=1), confidence)
+
+
+def converged(samples, target, confidence=CONFIDENCE):
+    """True once the median's interval half-width is at most target times the median."""
+    low, high = bootstrap_ci(samples, confidence)
+    return (high - low) / 2 <= target * float(np.median(samples))
@@ -0,0 +1,222 @@
+from time import perf_counter
+from collections import deque
+from graphy import CSRGraph, compute_min_cut_from_csr, lap
+
+FREE, SOURCE_TREE, SINK_TREE = 0, 1, 2
+ORPHAN, ROOT = -1, -2
+
+
+def boykov_kolmogorov(graph, s, t, stats=None, timings=None):
+    """
+    Boykov-Kolmogorov max flow: grow a search tree from s and one from t,
+    augment where they touch, then repair both trees by adopting orphans
+    instead of rebuilding them. Returns (flow, min_cut_edges).
+
+    parent[v] holds an arc id: for the source tree the arc parent -> v, for
+    the sink tree the arc v -> parent. ts/dist implement the timestamp
+    heuristic from the paper so origin checks stay short.
+
+    stats, if a dict, receives augmenting_paths and arc_scans (arcs looked
+    at by growth and adoption), tallied per vertex rather than per arc.
+    timings, if a dict, receives the graphy.ENGINE_PHASES times.
+    """
+    csr = CSRGraph.from_graph(graph)
+    clock = perf_counter()
+    n = csr.n
+    offset = csr.offset.tolist()
+    target = csr.target.tolist()
+    rev = csr.rev.tolist()
+    res = csr.capacity.tolist()
+    clock = lap(timings, 'residual_ms', clock)
+
+    tree = [FREE] * n
+    parent = [ORPHAN] * n
+    ts = [0] * n
+    dist = [0] * n
+    in_active = [False] * n
+    tree[s], tree[t] = SOURCE_TREE, SINK_TREE
+    parent[s] = parent[t] = ROOT
+    active = deque([s, t])
+    in_active[s] = in_active[t] = True
+    orphans = deque()
+    time = 1
+    ts[s] = ts[t] = time
+    flow = 0
+    counting = stats is not None
+    paths = scans = 0
+
+    def origin_dist(q):
+        """Distance from q to its terminal, or -1 if q hangs off an orphan."""
+        d = 0
+        j = q
+        while True:
+            if ts[j] == time:
+                d += dist[j]
+                break
+            a = parent[j]
+            if a == ROOT:
+                break
+            if a == ORPHAN:
+                return -1
+            j = target[rev[a]] if tree[j] == SOURCE_TREE else target[a]
+            d += 1
+        # Stamp the path so later checks stop early
+        j = q
+        k = d
+        while ts[j] != time:
+            ts[j] = time
+            dist[j] = k
+            k -= 1
+            a = parent[j]
+            if a == ROOT:
+                break
+            j = target[rev[a]] if tree[j] == SOURCE_TREE else target[a]
+        return d
+
+    while True:
+        # Growth: expand active vertices until the trees touch
+        meet = -1
+        while active:
+            p = active[0]
+            tp = tree[p]
+            if tp == FREE:
+                active.popleft()
+                in_active[p] = False
+                continue
+            for i in range(offset[p], offset[p + 1]):
+                if tp == SOURCE_TREE:
+                    if res[i] <= 0:
+                        continue
+                    q = target[i]
+                    tq = tree[q]
+                    if tq == FREE:
+                        tree[q] = SOURCE_TREE
+                        parent[q] = i
+                        ts[q] = ts[p]
+                        dist[q] = dist[p] + 1
+                        if not in_active[q]:
+                            in_active[q] = True
+                            active.append(q)
+                    elif tq == SINK_TREE:
+                        meet = i
+                        break
+                else:
+                    j = rev[i]
+                    if res[j] <= 0:
+                        continue
+                    q = target[i]
+                    tq = tree[q]
+                    if tq == FREE:
+                        tree[q] = SINK_TREE
+                        parent[q] = j
+                        ts[q] = ts[p]
+                        dist[q] = dist[p] + 1
+                        if not in_active[q]:
+                            in_active[q] = True
+                            active.append(q)
+                    elif tq == SOURCE_TREE:
+                        meet = j
+                        break
+            if meet >= 0:
+                if counting:
+                    scans += i - offset[p] + 1
+                break
+            if counting:
+                scans += offset[p + 1] - offset[p]
+            active.popleft()
+            in_active[p] = False
+        if meet < 0:
+            break
+
+        # Augmentation along s ~> tail(meet) -> head(meet) ~> t
+        time += 1
+        ts[s] = ts[t] = time
+        f = res[meet]
+        v = target[rev[meet]]
+        while v != s:
+            a = parent[v]
+            if res[a] < f:
+                f = res[a]
+            v = target[rev[a]]
+        v = target[meet]
+        while v != t:
+            a = parent[v]
+            if res[a] < f:
+                f = res[a]
+            v = target[a]
+
+        res[meet] -= f
+        res[rev[meet]] += f
+        v = target[rev[meet]]
+        while v != s:
+            a = parent[v]
+            res[a] -= f
+            res[rev[a]] += f
+            u = target[rev[a]]
+            if res[a] == 0:
+                parent[v] = ORPHAN
+                orphans.append(v)
+            v = u
+        v = target[meet]
+        while v != t:
+            a = parent[v]
+            res[a] -= f
+            res[rev[a]] += f
+            u = target[a]
+            if res[a] == 0:
+                parent[v] = ORPHAN
+                orphans.append(v)
+            v = u
+        flow += f
+        paths += 1
+
+        # Adoption: find each orphan a new parent in its own tree or free it
+        while orphans:
+            v = orphans.popleft()
+            tv = tree[v]
+            if counting:
+                scans += offset[v + 1] - offset[v]
+            best = -1
+            best_d = n + 1
+            for i in range(offset[v], offset[v + 1]):
+                q = target[i]
+                if tree[q] != tv:
+                    continue
+                a = rev[i] if tv == SOURCE_TREE else i
+                if res[a] <= 0:
+                    continue
+                d = origin_dist(q)
+                if 0 <= d < best_d:
+                    best = a
+                    best_d = d
+            if best >= 0:
+                parent[v] = best
+                ts[v] = time
+                dist[v] = best_d + 1
+                continue
+            if counting:
+                scans += offset[v + 1] - offset[v]
+
+            for i in range(offset[v], offset[v + 1]):
+                q = target[i]
+                if tree[q] != tv:
+                    continue
+                a = rev[i] if tv == SOURCE_TREE else i
+                if res[a] > 0 and not in_active[q]:
+                    in_active[q] = True
+                    active.append(q)
+                pa = parent[q]
+                if pa >= 0:
+                    pv = target[rev[pa]] if tv == SOURCE_TREE else target[pa]
+                    if pv == v:
+                        parent[q] = ORPHAN
+                        orphans.append(q)
+            tree[v] = FREE
+            parent[v] = ORPHAN
+
+    if counting:
+        stats.update(augmenting_paths=paths, arc_scans=scans)
+    clock = lap(timings, 'solve_ms', clock)
+    cut = compute_min_cut_from_csr(csr, res, s)
+    lap(timings, 'cut_ms', clock)
+    return flow, cut
@@ -0,0 +1,217 @@
+import json
+import os
+import pickle
+import sys
+import numpy as np
+from graphy import CSRGraph
+
+# Layout of an archive directory:
+#   index.json   metadata of every dataset plus where its graph lives
+#   graphs.bin   one payload per graph, back to back, each 8-byte aligned:
+#                row offsets (num_vertices + 1), edge heads (edge_count),
+#                capacities (edge_count), i.e. the graph's adjacency in CSR
+#                order. Each array uses the smallest integer type that fits
+#                its values (offset_dtype, head_dtype, cap_dtype).
+INDEX_FILE = 'index.json'
+PAYLOAD_FILE = 'graphs.bin'
+ARCHIVE_VERSION = 1
+# Per-record fields written by the archive itself
+LAYOUT_FIELDS = ('num_vertices', 'edge_count', 'payload_start',
+                 'offset_dtype', 'head_dtype', 'cap_dtype')
+
+
+def _aligned(nbytes):
+    return -(-nbytes // 8) * 8
+
+
+def smallest_dtype(values):
+    """Smallest integer dtype holding every value of values (uint8 if empty)."""
+    if len(values) == 0:
+        return np.dtype(np.uint8)
+    return np.result_type(np.min_scalar_type(values.min()), np.min_scalar_type(values.max()))
+
+
+def _dict_to_csr(graph):
+    """(offsets, heads, caps) of a dict-of-dicts graph."""
+    n = len(graph)
+    degree = np.zeros(n, dtype=np.int64)
+    heads, caps = [], []
+    for u, row in graph.items():
+        degree[u] = len(row)
+        heads.extend(row.keys())
+        caps.extend(row.values())
+    # Rows are stored by ascending tail, keeping each row's order
+    heads = np.asarray(heads, dtype=np.int64)
+    caps = np.asarray(caps, dtype=np.int64)
+    tails = np.fromiter(graph.keys(), dtype=np.int64, count=n)
+    if np.any(tails[1:] < tails[:-1]):
+        order = np.argsort(np.repeat(tails, degree[tails]), kind='stable')
+        heads, caps = heads[order], caps[order]
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(degree, out=offsets[1:])
+    return offsets, heads, caps
+
+
+def write_archive(path, datasets):
+    """
+    Write datasets (dicts with a dict-of-dicts 'graph' plus metadata, as
+    produced by j_dtgen) to the archive directory path. Instead of 'graph',
+    a dataset may carry its CSR arrays as 'adjacency': (offsets, heads,
+    caps), which skips building dicts. datasets may be any iterable;
+    graphs are written one at a time. Returns the number of datasets
+    written.
+    """
+    os.makedirs(path, exist_ok=True)
+    records = []
+    position = 0
+    payload_path = os.path.join(path, PAYLOAD_FILE)
+    payload_tmp = payload_path + '.tmp'
+    try:
+        with open(payload_tmp, 'wb') as f:
+            for ds in datasets:
+                if 'adjacency' in ds:
+                    offsets, heads, caps = (np.asarray(a, dtype=np.int64) for a in ds['adjacency'])
+                else:
+                    offsets, heads, caps = _dict_to_csr(ds['graph'])
+                n = len(offsets) - 1
+
+                offset_dtype = smallest_dtype(offsets[-1:])
+                head_dtype = smallest_dtype(np.array([n]))
+                cap_dtype = smallest_dtype(caps)
+                start = position
+                for array, dtype in ((offsets, offset_dtype), (heads, head_dtype), (caps, cap_dtype)):
+                    data = array.astype(dtype).tobytes()
+                    f.write(data)
+                    f.write(bytes(_aligned(len(data)) - len(data)))
+                    position += _aligned(len(data))
+
+                record = {k: v for k, v in ds.items() if k not in ('graph', 'adjacency')}
+                record['num_vertices'] = n
+                record['edge_count'] = len(heads)
+                record['payload_start'] = start
+                record['offset_dtype'] = offset_dtype.name
+                record['head_dtype'] = head_dtype.name
+                record['cap_dtype'] = cap_dtype.name
+                records.append(record)
+    except BaseException:
+        os.remove(payload_tmp)
+        raise
+
+    # An existing archive is left alone until here. Its index goes first,
+    # then the new payload replaces the old one and the new index comes
+    # last, so a crash leaves the old archive or no index, never an old
+    # index over a new payload. A reader that already mapped the old
+    # payload keeps reading the old (now unlinked) file.
+    index_path = os.path.join(path, INDEX_FILE)
+    if os.path.exists(index_path):
+        os.remove(index_path)
+    os.replace(payload_tmp, payload_path)
+    tmp = index_path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'version': ARCHIVE_VERSION, 'payload_bytes': position,
+                   'records': records}, f)
+    os.replace(tmp, index_path)
+    return len(records)
+
+
+class DatasetArchive:
+    """
+    Read side of an archive. Opening one only parses the index; edge
+    arrays are memory-mapped on first use and a graph's pages are read
+    only when that graph is loaded.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, INDEX_FILE)) as f:
+            index = json.load(f)
+        if index.get('version') != ARCHIVE_VERSION:
+            raise ValueError(f"Unsupported archive version: {index.get('version')}")
+        self.records = index['records']
+        self.payload_bytes = index['payload_bytes']
+        self._payload = None
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        for i in range(len(self.records)):
+            yield self.load(i)
+
+    def _payload_map(self):
+        if self._payload is None:
+            if self.payload_bytes == 0:
+                # np.memmap cannot map an empty file
+                self._payload = np.zeros(0, dtype=np.uint8)
+            else:
+                self._payload = np.memmap(os.path.join(self.path, PAYLOAD_FILE),
+                                          dtype=np.uint8, mode='r',
+                                          shape=(self.payload_bytes,))
+        return self._payload
+
+    def metadata(self, i):
+        """Metadata of dataset i, without touching its edges."""
+        record = self.records[i]
+        return {k: v for k, v in record.items() if k not in LAYOUT_FIELDS}
+
+    def query(self, **criteria):
+        """Ids of datasets whose metadata equals every keyword, in archive order."""
+        return [i for i, record in enumerate(self.records)
+                if all(record.get(k) == v for k, v in criteria.items())]
+
+    def adjacency(self, i):
+        """
+        (offsets, heads, caps) of dataset i: the edges leaving u are
+        heads[offsets[u]:offsets[u + 1]]. All three are read-only views
+        into the memory-mapped payload.
+        """
+        record = self.records[i]
+        payload = self._payload_map()
+        n = record['num_vertices']
+        m = record['edge_count']
+        pos = record['payload_start']
+        arrays = []
+        for count, field in ((n + 1, 'offset_dtype'), (m, 'head_dtype'), (m, 'cap_dtype')):
+            dtype = np.dtype(record[field])
+            nbytes = count * dtype.itemsize
+            arrays.append(payload[pos:pos + nbytes].view(dtype))
+            pos += _aligned(nbytes)
+        return tuple(arrays)
+
+    def edges(self, i):
+        """(tails, heads, caps) of dataset i as parallel arrays."""
+        offsets, heads, caps = self.adjacency(i)
+        tails = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+        return tails, heads, caps
+
+    def csr(self, i):
+        """Dataset i as a CSRGraph, built straight from the edge arrays."""
+        return CSRGraph.from_edges(self.records[i]['num_vertices'], *self.edges(i))
+
+    def graph_dict(self, i):
+        """Dataset i as the dict-of-dicts graph stored in the legacy pickles."""
+        offsets, heads, caps = (a.tolist() for a in self.adjacency(i))
+        heads_caps = list(zip(heads, caps))
+        return {u: dict(heads_caps[offsets[u]:offsets[u + 1]])
+                for u in range(len(offsets) - 1)}
+
+    def load(self, i):
+        """Dataset i in the same shape as an entry of the legacy pickles."""
+        ds = self.metadata(i)
+        ds['graph'] = self.graph_dict(i)
+        return ds
+
+
+def convert_pickle(pickle_path, archive_path):
+    """Convert a legacy list-of-dicts dataset pickle into an archive."""
+    with open(pickle_path, 'rb') as f:
+        datasets = pickle.load(f)
+    return write_archive(archive_path, datasets)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python3 dataset_archive.py <datasets.pkl> <archive_dir>")
+        sys.exit(1)
+    count = convert_pickle(sys.argv[1], sys.argv[2])
+    print(f"Wrote {count} datasets to {sys.argv[2]}")
@@ -0,0 +1,251 @@
+import argparse
+import os
+import numpy as np
+from graphy import CSRGraph
+
+# DIMACS max-flow format (vertices are 1-based in the file, 0-based here):
+#   c <comment>
+#   p max <n> <m>
+#   n <id> s
+#   n <id> t
+#   a <u> <v> <cap>        (m arc lines)
+# Arc lines are parsed in bulk with numpy; only the few other lines are
+# handled one at a time.
+CHUNK_BYTES = 1 << 23
+WRITE_ROWS = 1 << 20
+MAX_DIGITS = 18
+NEWLINE, SPACE, ARC, ZERO = ord('\n'), ord(' '), ord('a'), ord('0')
+# Bytes that may follow the leading 'a' of an arc line
+FIELD_BYTES = np.zeros(256, dtype=bool)
+FIELD_BYTES[ZERO:ZERO + 10] = True
+FIELD_BYTES[[SPACE, ord('\t'), ord('\r'), NEWLINE]] = True
+
+
+def _parse_other_line(line, lineno, header):
+    """Apply one non-arc line (comment, problem or node line) to header."""
+    fields = line.split()
+    if not fields or fields[0] == b'c':
+        return
+    kind = fields[0]
+    if kind == b'p':
+        if len(fields) != 4 or fields[1] != b'max':
+            raise ValueError(f"line {lineno}: expected 'p max <n> <m>'")
+        if 'n' in header:
+            raise ValueError(f"line {lineno}: duplicate problem line")
+        header['n'] = int(fields[2])
+        header['m'] = int(fields[3])
+    elif kind == b'n':
+        if len(fields) != 3 or fields[2] not in (b's', b't'):
+            raise ValueError(f"line {lineno}: expected 'n <id> s' or 'n <id> t'")
+        header[fields[2].decode()] = int(fields[1]) - 1
+    else:
+        raise ValueError(f"line {lineno}: unknown line type {kind.decode(errors='replace')!r}")
+
+
+def _parse_chunk(buf, first_lineno, header):
+    """
+    Parse a block of whole lines (ending in a newline). Returns an (k, 3)
+    int64 array of the arc lines in it, values as written (1-based).
+    """
+    a = np.frombuffer(buf, dtype=np.uint8).copy()
+    nl = np.flatnonzero(a == NEWLINE)
+    starts = np.empty(len(nl), dtype=np.int64)
+    starts[0] = 0
+    starts[1:] = nl[:-1] + 1
+    arc_line = a[starts] == ARC
+
+    # Handle the other lines one by one, then blank them out along with
+    # the leading 'a' of every arc line, leaving only the numbers
+    other = np.flatnonzero(~arc_line).tolist()
+    for i in other:
+        _parse_other_line(buf[starts[i]:nl[i]], first_lineno + i, header)
+        a[starts[i]:nl[i]] = SPACE
+    if len(other) == len(nl):
+        return np.zeros((0, 3), dtype=np.int64)
+    a[starts[arc_line]] = SPACE
+
+    bad = ~FIELD_BYTES[a]
+    if bad.any():
+        lineno = first_lineno + int(np.searchsorted(nl, np.argmax(bad)))
+        raise ValueError(f"line {lineno}: expected 'a <u> <v> <cap>'")
+
+    # Count the digit runs of every line; lines start with a blank now
+    digit = (a >= ZERO) & (a < ZERO + 10)
+    change = np.flatnonzero(digit[1:] != digit[:-1]) + 1
+    tok_start = change[0::2]
+    length = change[1::2] - tok_start
+    per_line = np.bincount(np.searchsorted(nl, tok_start), minlength=len(nl))
+    wrong = arc_line & (per_line != 3)
+    if wrong.any():
+        raise ValueError(f"line {first_lineno + int(np.argmax(wrong))}: expected 'a <u> <v> <cap>'")
+    if length.max() > MAX_DIGITS:
+        lineno = first_lineno + int(np.searchsorted(nl, tok_start[np.argmax(length)]))
+        raise ValueError(f"line {lineno}: integer too large")
+
+    # Only digits and whitespace are left, which numpy parses in C
+    values = np.fromstring(a.tobytes(), dtype=np.int64, sep=' ')
+    return values.reshape(-1, 3)
+
+
+def read_dimacs(path):
+    """
+    Read a DIMACS max-flow file. Returns (n, s, t, tails, heads, caps) with
+    0-based vertices and int64 numpy arrays, one entry per arc line.
+    """
+    header = {}
+    blocks = []
+    lineno = 1
+    carry = b''
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(CHUNK_BYTES)
+            if not block:
+                break
+            block = carry + block
+            cut = block.rfind(b'\n') + 1
+            carry = block[cut:]
+            if cut:
+                blocks.append(_parse_chunk(block[:cut], lineno, header))
+                lineno += block.count(b'\n', 0, cut)
+    if carry:
+        blocks.append(_parse_chunk(carry + b'\n', lineno, header))
+
+    if 'n' not in header:
+        raise ValueError(f"{path}: missing 'p max' line")
+    for terminal in ('s', 't'):
+        if terminal not in header:
+            raise ValueError(f"{path}: missing 'n <id> {terminal}' line")
+    n = header['n']
+    arcs = np.concatenate(blocks) if blocks else np.zeros((0, 3), dtype=np.int64)
+    if len(arcs) != header['m']:
+        raise ValueError(f"{path}: 'p max' announces {header['m']} arcs, found {len(arcs)}")
+    ends = arcs[:, :2]
+    if len(arcs) and (ends.min() < 1 or ends.max() > n):
+        raise ValueError(f"{path}: arc endpoint outside 1..{n}")
+    s, t = header['s'], header['t']
+    if not (0 <= s < n and 0 <= t < n):
+        raise ValueError(f"{path}: source or sink outside 1..{n}")
+    return n, s, t, arcs[:, 0] - 1, arcs[:, 1] - 1, arcs[:, 2].copy()
+
+
+def read_dimacs_csr(path):
+    """Read a DIMACS file straight into (CSRGraph, s, t)."""
+    n, s, t, tails, heads, caps = read_dimacs(path)
+    return CSRGraph.from_edges(n, tails, heads, caps), s, t
+
+
+def read_dimacs_graph(path):
+    """Read a DIMACS file into (Graph, s, t); parallel arcs are merged."""
+    csr, s, t = read_dimacs_csr(path)
+    return csr.to_graph(), s, t
+
+
+def _num_digits(values):
+    width = np.ones(len(values), dtype=np.int64)
+    rest = values // 10
+    while rest.any():
+        width += rest > 0
+        rest //= 10
+    return width
+
+
+def _format_arcs(tails, heads, caps):
+    """Render 'a u v cap' lines (values already 1-based) as one bytes object."""
+    columns = [tails, heads, caps]
+    widths = [_num_digits(col) for col in columns]
+    line_len = 2 + widths[0] + 1 + widths[1] + 1 + widths[2] + 1
+    ends = np.cumsum(line_len)
+    starts = ends - line_len
+    out = np.full(int(ends[-1]), SPACE, dtype=np.uint8)
+    out[starts] = ARC
+    out[ends - 1] = NEWLINE
+    pos = starts + 2
+    for col, width in zip(columns, widths):
+        last = pos + width - 1
+        rest = col.copy()
+        for k in range(int(width.max())):
+            live = width > k
+            out[last[live] - k] = ZERO + rest[live] % 10
+            rest //= 10
+        pos = pos + width + 1
+    return out.tobytes()
+
+
+def write_dimacs(path, n, s, t, tails, heads, caps, comments=()):
+    """
+    Write a DIMACS max-flow file from 0-based edge arrays (lists or numpy
+    arrays). comments are written as 'c' lines after the problem line.
+    """
+    tails = np.asarray(tails, dtype=np.int64)
+    heads = np.asarray(heads, dtype=np.int64)
+    caps = np.asarray(caps, dtype=np.int64)
+    if len(caps) and caps.min() < 0:
+        raise ValueError("DIMACS capacities must be non-negative")
+    with open(path, 'wb') as f:
+        f.write(f"p max {n} {len(tails)}\n".encode())
+        for comment in comments:
+            f.write(f"c {comment}\n".encode())
+        f.write(f"n {s + 1} s\nn {t + 1} t\n".encode())
+        for lo in range(0, len(tails), WRITE_ROWS):
+            hi = lo + WRITE_ROWS
+            f.write(_format_arcs(tails[lo:hi] + 1, heads[lo:hi] + 1, caps[lo:hi]))
+
+
+def write_dimacs_graph(path, graph, s, t, comments=()):
+    """Write a Graph, CSRGraph or dict-of-dicts graph as DIMACS."""
+    if isinstance(graph, dict):
+        tails, heads, caps = [], [], []
+        for u, row in graph.items():
+            tails.extend([u] * len(row))
+            heads.extend(row.keys())
+            caps.extend(row.values())
+        n = len(graph)
+    else:
+        csr = CSRGraph.from_graph(graph)
+        tails, heads, caps = csr.edges()
+        n = csr.n
+    write_dimacs(path, n, s, t, tails, heads, caps, comments)
+
+
+def export_archive(archive_path, out_dir, plot_ids=None):
+    """
+    Export datasets of a j_dtgen archive as <plot_id>_<idx>.max, idx being
+    the dataset's position within its plot (the 'dataset' of j_run's
+    checkpoint). Metadata is kept as comment lines. Returns the paths.
+    """
+    from dataset_archive import DatasetArchive
+    archive = DatasetArchive(archive_path)
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    seen = {}
+    for i in range(len(archive)):
+        meta = archive.metadata(i)
+        plot_id = meta.get('plot_id', 'dataset')
+        idx = seen.get(plot_id, 0)
+        seen[plot_id] = idx + 1
+        if plot_ids is not None and plot_id not in plot_ids:
+            continue
+        path = os.path.join(out_dir, f"{plot_id}_{idx:03d}.max")
+        tails, heads, caps = archive.edges(i)
+        comments = [f"{key}: {value}" for key, value in meta.items()]
+        write_dimacs(path, archive.records[i]['num_vertices'], meta['source'], meta['sink'],
+                     tails, heads, caps, comments)
+        paths.append(path)
+    return paths
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export j_dtgen datasets in DIMACS max-flow format")
+    parser.add_argument('archive', nargs='?', default='j_datasets',
+                        help="dataset archive directory (default: %(default)s)")
+    parser.add_argument('out_dir', nargs='?', default='dimacs',
+                        help="output directory (default: %(default)s)")
+    parser.add_argument('--plots', nargs='+', default=None,
+                        help="only export these plot ids (default: all)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    paths = export_archive(args.archive, args.out_dir, args.plots)
+    print(f"Wrote {len(paths)} DIMACS files to {args.out_dir}/")
@@ -1,70 +1,177 @@
-from collections import deque
-
-class Dinic:
-    def __init__(self, n):
-        self.n = n
-        self.adj = [[] for _ in range(n)]
-
-    def add_edge(self, u, v, c):
-        self.adj[u].append([v, len(self.adj[v]), c])
-        self.adj[v].append([u, len(self.adj[u]) - 1, 0])
-
-    def max_flow(self, s, t):
-        flow = 0
-        n = self.n
-        while True:
-            level = [-1] * n
-            q = deque([s])
-            level[s] = 0
-            while q:
-                u = q.popleft()
-                for v, rev, cap in self.adj[u]:
-                    if cap > 0 and level[v] < 0:
-                        level[v] = level[u] + 1
-                        q.append(v)
-            if level[t] < 0:
-                return flow
-            it = [0] * n
-
-            def dfs(u, f):
-                if u == t:
-                    return f
-                for i in range(it[u], len(self.adj[u])):
-                    it[u] = i
-                    v, rev, cap = self.adj[u][i]
-                    if cap > 0 and level[v] == level[u] + 1:
-                        pushed = dfs(v, min(f, cap))
-                        if pushed > 0:
-                            self.adj[u][i][2] -= pushed
-                            self.adj[v][rev][2] += pushed
-                            return pushed
-                return 0
-
-            while True:
-                pushed = dfs(s, float('inf'))
-                if pushed == 0:
-                    break
-                flow += pushed
-
-    def max_flow_min_cut(self, s, t, original_graph=None):
-        # Snapshot original capacities to reconstruct cut if not provided
-        n = self.n
-        if original_graph is None:
-            from graphy import Graph
-            original_graph = Graph(n)
-            for u in range(n):
-                for v, rev, cap in self.adj[u]:
-                    pass 
-        # Run max flow
-        flow = self.max_flow(s, t)
-
-        # Build residual adjacency dict-of-dicts from self.adj
-        residual = [dict() for _ in range(n)]
-        for u in range(n):
-            for idx, (v, rev, cap) in enumerate(self.adj[u]):
-                residual[u][v] = residual[u].get(v, 0) + cap
-
-        # Compute cut
-        from graphy import compute_min_cut_from_residual
-        cut = compute_min_cut_from_residual(original_graph, residual, s)
-        return flow, cut
+import time
+
+class Dinic:
+    def __init__(self, n):
+        self.n = n
+        self.adj = [[] for _ in range(n)]
+        self.csr = None
+
+    @classmethod
+    def from_csr(cls, csr):
+        """Build from a CSRGraph, reusing its paired arcs one-to-one."""
+        from graphy import CSRGraph
+        csr = CSRGraph.from_graph(csr)
+        offset = csr.offset.tolist()
+        target = csr.target.tolist()
+        capacity = csr.capacity.tolist()
+        rev = csr.rev.tolist()
+        d = cls(csr.n)
+        for u in range(csr.n):
+            d.adj[u] = [[target[i], rev[i] - offset[target[i]], capacity[i]]
+                        for i in range(offset[u], offset[u + 1])]
+        d.csr = csr
+        return d
+
+    def add_edge(self, u, v, c):
+        self.adj[u].append([v, len(self.adj[v]), c])
+        self.adj[v].append([u, len(self.adj[u]) - 1, 0])
+
+    def max_flow(self, s, t):
+        """
+        Augment s->t until no path is left and return the flow found; the
+        residual capacities stay in self.adj. The adjacency lists already
+        pair every arc with its reverse, so they are flattened into arc
+        arrays and solved by the iterative dinic_residual, which deep level
+        graphs cannot push past the recursion limit.
+        """
+        from graphy import CSRGraph
+        n = self.n
+        offset = [0] * (n + 1)
+        for u in range(n):
+            offset[u + 1] = offset[u] + len(self.adj[u])
+        target, residual, rev = [], [], []
+        for u in range(n):
+            for v, r, cap in self.adj[u]:
+                target.append(v)
+                residual.append(cap)
+                rev.append(offset[v] + r)
+        arcs = CSRGraph(n, sum(1 for cap in residual if cap > 0), offset, target, residual, rev)
+        flow, res = dinic_residual(arcs, s, t)
+        i = 0
+        for u in range(n):
+            for arc in self.adj[u]:
+                arc[2] = res[i]
+                i += 1
+        return flow
+
+    def max_flow_min_cut(self, s, t, original_graph=None):
+        n = self.n
+        if self.csr is not None and (original_graph is None or original_graph is self.csr):
+            # Arcs mirror the CSR layout, so the residual is read off directly
+            flow = self.max_flow(s, t)
+            residual = [cap for u in range(n) for v, rev, cap in self.adj[u]]
+            from graphy import compute_min_cut_from_csr
+            return flow, compute_min_cut_from_csr(self.csr, residual, s)
+        # Snapshot original capacities to reconstruct cut if not provided
+        if original_graph is None:
+            from graphy import Graph
+            original_graph = Graph(n)
+            for u in range(n):
+                for v, rev, cap in self.adj[u]:
+                    pass 
+        # Run max flow
+        flow = self.max_flow(s, t)
+
+        # Build residual adjacency dict-of-dicts from self.adj
+        residual = [dict() for _ in range(n)]
+        for u in range(n):
+            for idx, (v, rev, cap) in enumerate(self.adj[u]):
+                residual[u][v] = residual[u].get(v, 0) + cap
+
+        # Compute cut
+        from graphy import compute_min_cut_from_residual
+        cut = compute_min_cut_from_residual(original_graph, residual, s)
+        return flow, cut
+
+
+def dinic_residual(csr, s, t, stats=None, timings=None):
+    """
+    Iterative Dinic over the flat arc arrays of a CSRGraph.
+
+    Blocking flows are found with an explicit arc stack and current-arc
+    pointers; after each augmentation the search only retreats to the tail
+    of the first saturated arc, so one DFS pass yields many augmenting paths.
+    Returns (flow, residual), residual indexed by arc id.
+
+    stats, if a dict, receives augmenting_paths, bfs_phases and arc_scans
+    (arcs the DFS retired, read off the current-arc pointers per phase);
+    timings, if a dict, receives residual_ms and solve_ms.
+    """
+    from graphy import bfs_levels, lap
+    clock = time.perf_counter()
+    n = csr.n
+    offset = csr.offset.tolist()
+    target = csr.target.tolist()
+    rev = csr.rev.tolist()
+    res = csr.capacity.tolist()
+    clock = lap(timings, 'residual_ms', clock)
+
+    flow = 0
+    paths = phases = scans = 0
+    base = sum(offset[:n])
+    while True:
+        phases += 1
+        # Vertices beyond t's level cannot lie on a shortest augmenting
+        # path, so the BFS stops once t is reached
+        level = bfs_levels(csr, res, s, stop_at=t).tolist()
+        if level[t] < 0:
+            break
+
+        it = offset[:n]
+        path = []
+        u = s
+        while True:
+            if u == t:
+                f = min([res[i] for i in path])
+                k = -1
+                for j, i in enumerate(path):
+                    res[i] -= f
+                    res[rev[i]] += f
+                    if k < 0 and res[i] == 0:
+                        k = j
+                flow += f
+                paths += 1
+                # Retreat to the tail of the first saturated arc
+                del path[k:]
+                u = target[path[-1]] if path else s
+                continue
+
+            i = it[u]
+            end = offset[u + 1]
+            nxt = level[u] + 1
+            while i < end and (res[i] <= 0 or level[target[i]] != nxt):
+                i += 1
+            it[u] = i
+            if i < end:
+                path.append(i)
+                u = target[i]
+            else:
+                # Dead end: prune u from this level graph and back up
+                level[u] = -1
+                if not path:
+                    break
+                i = path.pop()
+                u = target[rev[i]]
+                it[u] += 1
+        if stats is not None:
+            scans += sum(it) - base
+
+    if stats is not None:
+        stats.update(augmenting_paths=paths, bfs_phases=phases, arc_scans=scans)
+    lap(timings, 'solve_ms', clock)
+    return flow, res
+
+
+def dinic(graph, s, t, stats=None, timings=None):
+    """
+    Dinic's algorithm (see dinic_residual). Accepts a Graph or CSRGraph and
+    returns (flow, min_cut_edges), the same contract as
+    Dinic.max_flow_min_cut.
+    """
+    from graphy import CSRGraph, compute_min_cut_from_csr, lap
+    csr = CSRGraph.from_graph(graph)
+    flow, res = dinic_residual(csr, s, t, stats, timings)
+    clock = time.perf_counter()
+    cut = compute_min_cut_from_csr(csr, res, s)
+    lap(timings, 'cut_ms', clock)
+    return flow, cut
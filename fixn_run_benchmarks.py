@@ -1,10 +1,12 @@
 import pickle
 import csv
 import time
+import os
 from graphy import Graph
 from ford_fulkerson import ford_fulkerson
 from dinic import Dinic
 from push_relabel import push_relabel
+from dataset_archive import INDEX_FILE, DatasetArchive
 
 def dict_to_graph(graph_dict):
     """Convert dictionary format to Graph object."""
@@ -50,15 +52,21 @@ def run_all_benchmarks():
     
     # Load test cases
     testcases_file = 'density_testcases.pkl'
-    print(f"Loading test cases from {testcases_file}...")
-    
-    try:
-        with open(testcases_file, 'rb') as f:
-            all_testcases = pickle.load(f)
-    except FileNotFoundError:
-        print(f"ERROR: {testcases_file} not found!")
-        print("Please run fixn_generate_testcases.py first.")
-        return
+    archive_dir = 'density_testcases'
+    if os.path.exists(os.path.join(archive_dir, INDEX_FILE)):
+        # Iterating the archive loads one graph at a time
+        print(f"Opening test case archive {archive_dir}/...")
+        all_testcases = DatasetArchive(archive_dir)
+    else:
+        print(f"Loading test cases from {testcases_file}...")
+        
+        try:
+            with open(testcases_file, 'rb') as f:
+                all_testcases = pickle.load(f)
+        except FileNotFoundError:
+            print(f"ERROR: neither {archive_dir}/ nor {testcases_file} found!")
+            print("Please run fixn_generate_testcases.py first.")
+            return
     
     print(f"Loaded {len(all_testcases)} test cases")
     
@@ -1,59 +1,163 @@
-from collections import deque
-
-def ford_fulkerson(graph, s, t):
-    n = graph.n
-    res = [dict() for _ in range(n)]
-    for u in range(n):
-        for v, c in graph.adj[u].items():
-            res[u][v] = res[u].get(v, 0) + c
-            res[v].setdefault(u, res[v].get(u, 0))
-
-    def dfs_find_path():
-        stack = [s]
-        parent = {s: None}
-        while stack:
-            u = stack.pop()
-            for v, cap in res[u].items():
-                if cap > 0 and v not in parent:
-                    parent[v] = u
-                    if v == t:
-                        return parent
-                    stack.append(v)
-        return None
-
-    max_flow = 0
-    while True:
-        parent = dfs_find_path()
-        if parent is None:
-            break
-        v = t
-        bottleneck = float('inf')
-        while parent[v] is not None:
-            u = parent[v]
-            bottleneck = min(bottleneck, res[u][v])
-            v = u
-        v = t
-        while parent[v] is not None:
-            u = parent[v]
-            res[u][v] -= bottleneck
-            res[v][u] = res[v].get(u, 0) + bottleneck
-            v = u
-        max_flow += bottleneck
-
-    reachable = {s}
-    queue = deque([s])
-    while queue:
-        u = queue.popleft()
-        for v, cap in res[u].items():
-            if cap > 0 and v not in reachable:
-                reachable.add(v)
-                queue.append(v)
-    
-    min_cut_edges = []
-    for u in range(n):
-        if u in reachable:
-            for v, cap in graph.adj[u].items():
-                if v not in reachable:
-                    min_cut_edges.append((u, v))
-
-    return max_flow, min_cut_edges
+import heapq
+import time
+from collections import deque
+import numpy as np
+from graphy import CSRGraph, compute_min_cut_from_csr, lap
+
+def ford_fulkerson(graph, s, t, strategy='dfs', stats=None, timings=None):
+    """
+    strategy selects how augmenting paths are found:
+    - 'dfs':     any path, by depth-first search (classic Ford-Fulkerson)
+    - 'bfs':     shortest path in edges (Edmonds-Karp, O(VE^2))
+    - 'fattest': maximum-bottleneck path via a heap-based search
+    - 'scaling': capacity scaling, only residual arcs with capacity >= delta
+                 are used and delta halves each phase (O(E^2 log U))
+
+    stats, if a dict, receives augmenting_paths, arc_scans (arcs out of
+    the vertices each search expanded) and, for 'bfs', bfs_phases (one per
+    search). They are worked out after each search, so the searches
+    themselves run the same code either way. timings, if a dict, receives
+    the graphy.ENGINE_PHASES times.
+    """
+    csr = CSRGraph.from_graph(graph)
+    clock = time.perf_counter()
+    n = csr.n
+    offset = csr.offset.tolist()
+    target = csr.target.tolist()
+    rev = csr.rev.tolist()
+    res = csr.capacity.tolist()
+    clock = lap(timings, 'residual_ms', clock)
+
+    # parent[v] is the arc used to reach v (-1 = unvisited, -2 = source).
+    # Each search returns parent and the vertices it left unexpanded; t was
+    # reached iff parent[t] != -1
+    def dfs_find_path():
+        parent = [-1] * n
+        parent[s] = -2
+        stack = [s]
+        while stack:
+            u = stack.pop()
+            for i in range(offset[u], offset[u + 1]):
+                if res[i] > 0:
+                    v = target[i]
+                    if parent[v] == -1:
+                        parent[v] = i
+                        if v == t:
+                            return parent, stack
+                        stack.append(v)
+        return parent, stack
+
+    def bfs_find_path():
+        parent = [-1] * n
+        parent[s] = -2
+        queue = deque([s])
+        while queue:
+            u = queue.popleft()
+            for i in range(offset[u], offset[u + 1]):
+                if res[i] > 0:
+                    v = target[i]
+                    if parent[v] == -1:
+                        parent[v] = i
+                        if v == t:
+                            return parent, queue
+                        queue.append(v)
+        return parent, queue
+
+    def scaling_find_path():
+        parent = [-1] * n
+        parent[s] = -2
+        stack = [s]
+        while stack:
+            u = stack.pop()
+            for i in range(offset[u], offset[u + 1]):
+                if res[i] >= delta:
+                    v = target[i]
+                    if parent[v] == -1:
+                        parent[v] = i
+                        if v == t:
+                            return parent, stack
+                        stack.append(v)
+        return parent, stack
+
+    def fattest_find_path():
+        parent = [-1] * n
+        parent[s] = -2
+        width = [0] * n
+        done = [False] * n
+        heap = [(-float('inf'), s)]
+        while heap:
+            w, u = heapq.heappop(heap)
+            if done[u]:
+                continue
+            if u == t:
+                return parent, (v for _, v in heap if not done[v])
+            done[u] = True
+            w = -w
+            for i in range(offset[u], offset[u + 1]):
+                r = res[i]
+                if r > 0:
+                    v = target[i]
+                    b = w if w < r else r
+                    if not done[v] and b > width[v]:
+                        width[v] = b
+                        parent[v] = i
+                        heapq.heappush(heap, (-b, v))
+        return parent, []
+
+    find_path = {
+        'dfs': dfs_find_path,
+        'bfs': bfs_find_path,
+        'fattest': fattest_find_path,
+        'scaling': scaling_find_path,
+    }.get(strategy)
+    if find_path is None:
+        raise ValueError(f"Unknown path strategy: {strategy}")
+
+    # Largest power of two not above the largest capacity
+    delta = 1
+    max_cap = max(res, default=0)
+    while delta * 2 <= max_cap:
+        delta *= 2
+
+    if stats is not None:
+        degree = np.diff(csr.offset)
+    max_flow = 0
+    paths = searches = scans = 0
+    while True:
+        parent, pending = find_path()
+        if stats is not None:
+            # Expanded: every vertex reached, less the ones still pending and t
+            searches += 1
+            expanded = np.array(parent) != -1
+            expanded[list(pending)] = False
+            expanded[t] = False
+            scans += int(degree[expanded].sum())
+        if parent[t] == -1:
+            if strategy == 'scaling' and delta > 1:
+                delta //= 2
+                continue
+            break
+        v = t
+        bottleneck = float('inf')
+        while v != s:
+            i = parent[v]
+            bottleneck = min(bottleneck, res[i])
+            v = target[rev[i]]
+        v = t
+        while v != s:
+            i = parent[v]
+            res[i] -= bottleneck
+            res[rev[i]] += bottleneck
+            v = target[rev[i]]
+        max_flow += bottleneck
+        paths += 1
+
+    if stats is not None:
+        stats.update(augmenting_paths=paths, arc_scans=scans)
+        if strategy == 'bfs':
+            stats['bfs_phases'] = searches
+    clock = lap(timings, 'solve_ms', clock)
+    min_cut_edges = compute_min_cut_from_csr(csr, res, s)
+    lap(timings, 'cut_ms', clock)
+
+    return max_flow, min_cut_edges
@@ -0,0 +1,184 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from graphy import CSRGraph, reachable_mask
+from dinic import dinic_residual
+from push_relabel import _highest_label_push_relabel
+
+
+def undirected_csr(graph):
+    """
+    CSRGraph of the undirected graph behind graph (Graph or CSRGraph): the
+    pair {u, v} gets capacity c(u, v) + c(v, u) in both directions.
+    """
+    csr = CSRGraph.from_graph(graph)
+    tails, heads, caps = csr.edges()
+    return CSRGraph.from_edges(csr.n, np.concatenate((tails, heads)),
+                               np.concatenate((heads, tails)),
+                               np.concatenate((caps, caps)))
+
+
+# Each engine returns (flow, source_side) for one s-t pair, source_side
+# being a bool mask of a minimum cut's s side. Any minimum cut will do.
+def _dinic_cut(csr, s, t):
+    flow, res = dinic_residual(csr, s, t)
+    return flow, reachable_mask(csr, res, s)
+
+
+def _push_relabel_cut(csr, s, t):
+    res, excess = _highest_label_push_relabel(csr, s, t, phase_two=False)
+    return excess[t], ~reachable_mask(csr, res, t, reverse=True)
+
+
+CUT_ENGINES = {
+    'dinic': _dinic_cut,
+    'push_relabel': _push_relabel_cut,
+}
+
+_worker_csr = None
+
+
+def _init_worker(csr):
+    global _worker_csr
+    _worker_csr = csr
+
+
+def _worker_cut(engine, s, t):
+    flow, side = CUT_ENGINES[engine](_worker_csr, s, t)
+    return flow, np.packbits(side)
+
+
+class GomoryHuTree:
+    """
+    Gomory-Hu cut tree, rooted at vertex 0: parent[v] and weight[v] give
+    the tree edge v - parent[v] for every v != 0. The minimum cut between
+    u and v in the graph equals the lightest edge on their tree path, and
+    removing that edge splits the tree into the two sides of such a cut.
+    """
+
+    def __init__(self, parent, weight):
+        self.n = len(parent)
+        self.parent = list(parent)
+        self.weight = list(weight)
+        self.depth = [0] * self.n
+        children = [[] for _ in range(self.n)]
+        for v in range(1, self.n):
+            children[self.parent[v]].append(v)
+        q = deque([0])
+        while q:
+            u = q.popleft()
+            for v in children[u]:
+                self.depth[v] = self.depth[u] + 1
+                q.append(v)
+
+    def edges(self):
+        """Tree edges as (v, parent[v], weight[v])."""
+        return [(v, self.parent[v], self.weight[v]) for v in range(1, self.n)]
+
+    def _lightest_edge(self, u, v):
+        """Child end of the lightest tree edge on the u-v path, in O(path length)."""
+        if u == v:
+            raise ValueError("min cut needs two distinct vertices")
+        depth, parent, weight = self.depth, self.parent, self.weight
+        best = None
+        while u != v:
+            if depth[u] < depth[v]:
+                u, v = v, u
+            if best is None or weight[u] < weight[best]:
+                best = u
+            u = parent[u]
+        return best
+
+    def min_cut_value(self, u, v):
+        """Minimum u-v cut capacity."""
+        return self.weight[self._lightest_edge(u, v)]
+
+    def min_cut_side(self, u, v):
+        """Vertices on u's side of a minimum u-v cut, as a set."""
+        child = self._lightest_edge(u, v)
+        below = {child}
+        # Everything whose path to the root passes through child
+        for w in sorted(range(self.n), key=self.depth.__getitem__):
+            if w != 0 and self.parent[w] in below:
+                below.add(w)
+        return below if u in below else set(range(self.n)) - below
+
+    def all_pairs(self):
+        """n x n numpy matrix of every pairwise min cut value (0 on the diagonal)."""
+        n = self.n
+        children = [[] for _ in range(n)]
+        for v in range(1, n):
+            children[self.parent[v]].append(v)
+            children[v].append(self.parent[v])
+        weight_to = {}
+        for v in range(1, n):
+            weight_to[(v, self.parent[v])] = weight_to[(self.parent[v], v)] = self.weight[v]
+        values = np.zeros((n, n), dtype=np.int64)
+        for root in range(n):
+            # Lightest edge seen on the way from root, by BFS over the tree
+            best = {root: None}
+            q = deque([root])
+            while q:
+                u = q.popleft()
+                for v in children[u]:
+                    if v not in best:
+                        w = weight_to[(u, v)]
+                        best[v] = w if best[u] is None else min(best[u], w)
+                        values[root, v] = best[v]
+                        q.append(v)
+        return values
+
+
+def gomory_hu_tree(graph, engine='dinic', workers=1):
+    """
+    Build the Gomory-Hu tree of graph (Graph or CSRGraph, taken as
+    undirected, see undirected_csr) with Gusfield's algorithm: n - 1
+    max-flow computations on the one CSR graph, with no contraction.
+
+    Flow i runs from vertex i to its current tree parent, which earlier
+    cuts may still change. With workers > 1, upcoming flows are solved
+    ahead on a process pool against the parents known at the time; a
+    flow whose parent has changed by its turn is solved again, so the
+    tree is the same as a serial run.
+    """
+    if engine not in CUT_ENGINES:
+        raise ValueError(f"Unknown engine: {engine}")
+    csr = undirected_csr(graph)
+    n = csr.n
+    parent = [0] * n
+    weight = [0] * n
+    if n < 2:
+        return GomoryHuTree(parent, weight)
+
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(csr,))
+    ahead = {}
+    try:
+        for s in range(1, n):
+            t = parent[s]
+            if pool is not None:
+                # Keep 2 * workers flows in flight, refreshing stale ones
+                for k in range(s, min(n, s + 2 * workers)):
+                    if k not in ahead or ahead[k][0] != parent[k]:
+                        ahead[k] = (parent[k], pool.submit(_worker_cut, engine, k, parent[k]))
+                flow, packed = ahead.pop(s)[1].result()
+                side = np.unpackbits(packed, count=n).astype(bool)
+            else:
+                flow, side = CUT_ENGINES[engine](csr, s, t)
+
+            # Gusfield's update: vertices on s's side that hung from t now hang from s
+            weight[s] = flow
+            for i in np.flatnonzero(side).tolist():
+                if i != s and parent[i] == t:
+                    parent[i] = s
+            if side[parent[t]]:
+                parent[s] = parent[t]
+                parent[t] = s
+                weight[s] = weight[t]
+                weight[t] = flow
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    return GomoryHuTree(parent, weight)
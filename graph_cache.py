@@ -0,0 +1,147 @@
+import hashlib
+import inspect
+import json
+import os
+import zipfile
+import numpy as np
+from dataset_archive import smallest_dtype
+
+# One file per generated graph, named by a hash of everything that decides
+# its edges: the builder, its parameters (seed included), the code it runs
+# (its own source and that of every project function, class and constant
+# it reaches) and the numpy version (numpy owns the random streams).
+# Changing any of them gives a new key, so stale entries are never read;
+# they are simply left behind. Code the builder never reaches, such as the
+# spec tables next to it in j_dtgen.py, is not part of the key.
+GRAPH_CACHE_DIR = 'graph_cache'
+CACHE_FIELDS = ('offsets', 'heads', 'caps', 'source', 'sink')
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+CONSTANT_TYPES = (bool, int, float, str, bytes, type(None))
+
+_versions = {}
+
+
+def _is_project(obj):
+    path = getattr(inspect.getmodule(obj), '__file__', None)
+    return path is not None and os.path.dirname(os.path.abspath(path)) == PROJECT_DIR
+
+
+def _code_names(code):
+    """Global and attribute names used by code and the functions nested in it."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _code_names(const)
+    return names
+
+
+def _collect_code(value, name, parts):
+    """
+    Add what value contributes to the code version to parts, keyed by id:
+    the source of a project function or class, followed through the
+    globals its code uses; the whole source of a project module; the repr
+    of a constant. Anything else (numpy, the standard library) is skipped.
+    """
+    if id(value) in parts:
+        return
+    if isinstance(value, CONSTANT_TYPES):
+        parts[id(value)] = (name, repr(value))
+    elif isinstance(value, (tuple, list)):
+        parts[id(value)] = (name, type(value).__name__)
+        for i, item in enumerate(value):
+            _collect_code(item, f"{name}[{i}]", parts)
+    elif isinstance(value, dict):
+        parts[id(value)] = (name, 'dict')
+        for key, item in value.items():
+            _collect_code(item, f"{name}[{key!r}]", parts)
+    elif inspect.ismodule(value):
+        if _is_project(value):
+            parts[id(value)] = (name, inspect.getsource(value))
+    elif (inspect.isfunction(value) or inspect.isclass(value)) and _is_project(value):
+        parts[id(value)] = (value.__qualname__, inspect.getsource(value))
+        functions = [value] if inspect.isfunction(value) else \
+            [f for f in vars(value).values() if inspect.isfunction(f)]
+        for function in functions:
+            scope = function.__globals__
+            for used in sorted(_code_names(function.__code__)):
+                if used in scope:
+                    _collect_code(scope[used], used, parts)
+
+
+def code_version(builder):
+    """
+    Hash of the code that builder can run: its source and that of every
+    project function and class it reaches, so editing a helper it calls
+    changes the version while editing unrelated code in the same module
+    does not.
+    """
+    version = _versions.get(builder)
+    if version is None:
+        parts = {}
+        _collect_code(builder, builder.__qualname__, parts)
+        digest = hashlib.sha256()
+        for name, text in sorted(parts.values()):
+            digest.update(name.encode())
+            digest.update(text.encode())
+        digest.update(np.__version__.encode())
+        version = _versions[builder] = digest.hexdigest()
+    return version
+
+
+def cache_key(builder, params):
+    """Key of the graph builder(**params) returns."""
+    blob = json.dumps({'builder': builder.__qualname__, 'params': params,
+                       'version': code_version(builder)}, sort_keys=True)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+class GraphCache:
+    """
+    Generated graphs on disk as CSR arrays (offsets, heads, caps) plus
+    source and sink, one .npz file per key under path/<key[:2]>/. Arrays
+    are stored compactly and loaded back as int64.
+    """
+
+    def __init__(self, path=GRAPH_CACHE_DIR):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+
+    def _file(self, key):
+        return os.path.join(self.path, key[:2], key + '.npz')
+
+    def load(self, key):
+        """
+        (offsets, heads, caps, source, sink) stored under key, or None. A
+        corrupt entry counts as a miss and is deleted, so it is rebuilt.
+        """
+        path = self._file(key)
+        try:
+            with np.load(path) as data:
+                entry = tuple(data[field] for field in CACHE_FIELDS)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+            # Truncated or otherwise unreadable
+            self.misses += 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        self.hits += 1
+        offsets, heads, caps, source, sink = entry
+        return (offsets.astype(np.int64), heads.astype(np.int64), caps.astype(np.int64),
+                int(source), int(sink))
+
+    def store(self, key, offsets, heads, caps, source, sink):
+        path = self._file(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            # Stored in the smallest integer types, like the dataset archive
+            np.savez(f, offsets=offsets.astype(smallest_dtype(offsets[-1:])),
+                     heads=heads.astype(smallest_dtype(np.array([len(offsets)]))),
+                     caps=caps.astype(smallest_dtype(caps)), source=source, sink=sink)
+        os.replace(tmp, path)
@@ -1,148 +1,351 @@
-from graphy import Graph
-
-def _lcg(state):
-    a = 1664525
-    c = 1013904223
-    return (a * state + c) % (2**32)
-
-def complete_graph(n, cap=1):
-    g = Graph(n)
-    for u in range(n):
-        for v in range(n):
-            if u != v:
-                g.add_edge(u, v, cap)
-    return g
-
-def chain_graph(n, cap=1):
-    g = Graph(n)
-    for u in range(n - 1):
-        g.add_edge(u, u + 1, cap)
-    return g
-
-def layered_graph(n_layers, layer_width, cap=1):
-    n = n_layers * layer_width + 2
-    s, t = 0, n - 1
-    g = Graph(n)
-    for i in range(layer_width):
-        g.add_edge(s, 1 + i, cap)
-    for L in range(n_layers - 1):
-        base_u = 1 + L * layer_width
-        base_v = 1 + (L + 1) * layer_width
-        for i in range(layer_width):
-            for j in range(layer_width):
-                g.add_edge(base_u + i, base_v + j, cap)
-    base = 1 + (n_layers - 1) * layer_width
-    for i in range(layer_width):
-        g.add_edge(base + i, t, cap)
-    return g
-
-def sparse_random_graph(n, m, cap=10, seed=42):
-    g = Graph(n)
-    edges = set()
-    state = seed
-    attempts = 0
-    while len(edges) < m and attempts < 10 * m:
-        state = _lcg(state)
-        u = state % n
-        state = _lcg(state)
-        v = state % n
-        if u != v:
-            edges.add((u, v))
-        attempts += 1
-    for (u, v) in edges:
-        state = _lcg(state)
-        g.add_edge(u, v, 1 + (state % cap))
-    return g
-
-def dense_random_graph(n, density, cap=10, seed=42):
-    g = Graph(n)
-    state = seed
-    for u in range(n):
-        for v in range(n):
-            if u == v:
-                continue
-            state = _lcg(state)
-            if (state / 4294967296.0) < density:
-                state = _lcg(state)
-                g.add_edge(u, v, 1 + (state % cap))
-    return g
-
-def bipartite_graph(n_left, n_right, cap=1):
-    n = n_left + n_right + 2
-    s, t = 0, n - 1
-    g = Graph(n)
-    for i in range(n_left):
-        g.add_edge(s, 1 + i, cap)
-    for i in range(n_left):
-        u = 1 + i
-        for j in range(n_right):
-            v = 1 + n_left + j
-            g.add_edge(u, v, cap)
-    base = 1 + n_left
-    for j in range(n_right):
-        g.add_edge(base + j, t, cap)
-    return g
-
-def even_tarjan(n_layers, width, cap=1):
-    from random import seed, random
-    seed(123)
-    n = n_layers * width + 2
-    s, t = 0, n - 1
-    g = Graph(n)
-    for L in range(n_layers - 1):
-        base_u = 1 + L * width
-        base_v = 1 + (L + 1) * width
-        for i in range(width):
-            for j in range(width):
-                g.add_edge(base_u + i, base_v + j, cap)
-    for i in range(width):
-        g.add_edge(s, 1 + i, cap)
-    base = 1 + (n_layers - 1) * width
-    for i in range(width):
-        g.add_edge(base + i, t, cap)
-    for L in range(1, n_layers):
-        u_base = 1 + L * width
-        for i in range(width):
-            u = u_base + i
-            for prev_L in range(L):
-                v_base = 1 + prev_L * width
-                for j in range(width):
-                    if random() < 0.5:
-                        v = v_base + j
-                        g.add_edge(u, v, cap)
-    return g
-
-def diamond(n_diamonds, cap=1):
-    n = 2 * n_diamonds + 2
-    s, t = 0, n - 1
-    g = Graph(n)
-    for i in range(n_diamonds):
-        u = 1 + 2 * i
-        v = u + 1
-        if i == 0:
-            g.add_edge(s, u, cap)
-        else:
-            g.add_edge(u - 2, u, cap)
-        g.add_edge(u, v, 1)
-        g.add_edge(u, v, cap)
-    g.add_edge(2 * n_diamonds, t, cap)
-    return g
-
-def star_of_stars(n_branches=50, branch_size=50, cap=1):
-    total_nodes = 2 + n_branches * (1 + branch_size)
-    s, t = 0, total_nodes - 1
-    g = Graph(total_nodes)
-    node_id = 1
-    for b in range(n_branches):
-        hub = node_id
-        node_id += 1
-        g.add_edge(s, hub, cap)
-        for i in range(branch_size):
-            leaf = node_id
-            node_id += 1
-            g.add_edge(hub, leaf, cap)
-            g.add_edge(leaf, t, cap)
-    return g
-
-def count_edges(g: Graph):
-    return sum(len(g.adj[u]) for u in range(g.n))
+import random
+from itertools import chain
+import numpy as np
+from graphy import Graph
+
+# Every generator has an *_edges form that returns (n, tails, heads, caps)
+# as int64 numpy arrays, listing the edges in the order the Graph form
+# adds them; the Graph form is a thin wrapper. Seeded generators reproduce
+# the same graphs as the original per-pair loops. Given rng (a
+# numpy.random.Generator) instead, they draw everything from that stream.
+LCG_A = 1664525
+LCG_C = 1013904223
+LCG_MASK = 2**32 - 1
+LCG_BLOCK = 1 << 22
+
+
+def _lcg(state):
+    a = 1664525
+    c = 1013904223
+    return (a * state + c) % (2**32)
+
+
+def _lcg_stream(state, count):
+    """
+    The next count states of _lcg after state, as a uint64 array. State k
+    is A^k * state + C * (1 + A + ... + A^(k-1)) mod 2^32; uint64 products
+    wrap mod 2^64, which keeps them exact mod 2^32.
+    """
+    if count <= 0:
+        return np.zeros(0, dtype=np.uint64)
+    powers = np.cumprod(np.full(count, LCG_A, dtype=np.uint64))
+    geometric = np.empty(count, dtype=np.uint64)
+    geometric[0] = 1
+    geometric[1:] = powers[:-1]
+    offsets = np.cumsum(geometric) * np.uint64(LCG_C)
+    return (powers * np.uint64(state) + offsets) & np.uint64(LCG_MASK)
+
+
+def python_random_state(seed):
+    """A RandomState whose random_sample() matches random.Random(seed).random()."""
+    _, internal, _ = random.Random(seed).getstate()
+    rng = np.random.RandomState()
+    rng.set_state(('MT19937', np.array(internal[:-1], dtype=np.uint32), internal[-1]))
+    return rng
+
+
+def as_edge_arrays(n, tails, heads, caps):
+    """(n, tails, heads, caps) as int64 arrays; caps may be a scalar."""
+    tails = np.asarray(tails, dtype=np.int64)
+    heads = np.asarray(heads, dtype=np.int64)
+    caps = np.broadcast_to(np.asarray(caps, dtype=np.int64), tails.shape).copy()
+    return n, tails, heads, caps
+
+
+def edges_to_csr(n, tails, heads, caps):
+    """
+    (offsets, heads, caps) int64 arrays holding the adjacency exactly as
+    calling Graph.add_edge for every edge in order would build it:
+    non-positive capacities are dropped and repeated (u, v) pairs are
+    summed at their first position. Row u is heads[offsets[u]:offsets[u + 1]].
+    """
+    tails = np.asarray(tails, dtype=np.int64)
+    heads = np.asarray(heads, dtype=np.int64)
+    caps = np.asarray(caps, dtype=np.int64)
+    keep = caps > 0
+    tails, heads, caps = tails[keep], heads[keep], caps[keep]
+
+    _, first, inverse = np.unique(tails * n + heads, return_index=True, return_inverse=True)
+    if len(first) < len(tails):
+        total = np.zeros(len(first), dtype=np.int64)
+        np.add.at(total, inverse, caps)
+        pos = np.sort(first)
+        tails, heads, caps = tails[pos], heads[pos], total[inverse[pos]]
+
+    order = np.argsort(tails, kind='stable')
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(tails, minlength=n), out=offsets[1:])
+    return offsets, heads[order], caps[order]
+
+
+def csr_to_adjacency(offsets, heads, caps):
+    """Per-vertex {head: cap} dicts from CSR arrays, keeping row order."""
+    offsets = np.asarray(offsets).tolist()
+    row = list(zip(np.asarray(heads).tolist(), np.asarray(caps).tolist()))
+    return [dict(row[offsets[u]:offsets[u + 1]]) for u in range(len(offsets) - 1)]
+
+
+def edges_to_adjacency(n, tails, heads, caps):
+    """Per-vertex {head: cap} dicts, as Graph.add_edge builds them (see edges_to_csr)."""
+    return csr_to_adjacency(*edges_to_csr(n, tails, heads, caps))
+
+
+def edges_to_graph(n, tails, heads, caps):
+    """Build a Graph from edge arrays."""
+    g = Graph(n)
+    g.adj = edges_to_adjacency(n, tails, heads, caps)
+    return g
+
+
+def complete_edges(n, cap=1):
+    k = np.arange(n * (n - 1), dtype=np.int64)
+    tails = k // max(n - 1, 1)
+    rest = k % max(n - 1, 1)
+    heads = rest + (rest >= tails)
+    return as_edge_arrays(n, tails, heads, cap)
+
+
+def complete_graph(n, cap=1):
+    return edges_to_graph(*complete_edges(n, cap))
+
+
+def chain_edges(n, cap=1):
+    tails = np.arange(max(n - 1, 0), dtype=np.int64)
+    return as_edge_arrays(n, tails, tails + 1, cap)
+
+
+def chain_graph(n, cap=1):
+    return edges_to_graph(*chain_edges(n, cap))
+
+
+def _layer_to_layer(n_layers, width):
+    """Edges from every vertex of layer L to every vertex of layer L + 1."""
+    k = np.arange((n_layers - 1) * width * width, dtype=np.int64) if n_layers > 1 \
+        else np.zeros(0, dtype=np.int64)
+    layer = k // (width * width)
+    rest = k % (width * width)
+    tails = 1 + layer * width + rest // width
+    heads = 1 + (layer + 1) * width + rest % width
+    return tails, heads
+
+
+def layered_edges(n_layers, layer_width, cap=1):
+    n = n_layers * layer_width + 2
+    s, t = 0, n - 1
+    first = 1 + np.arange(layer_width, dtype=np.int64)
+    last = 1 + (n_layers - 1) * layer_width + np.arange(layer_width, dtype=np.int64)
+    mid_tails, mid_heads = _layer_to_layer(n_layers, layer_width)
+    tails = np.concatenate((np.full(layer_width, s), mid_tails, last))
+    heads = np.concatenate((first, mid_heads, np.full(layer_width, t)))
+    return as_edge_arrays(n, tails, heads, cap)
+
+
+def layered_graph(n_layers, layer_width, cap=1):
+    return edges_to_graph(*layered_edges(n_layers, layer_width, cap))
+
+
+def _first_distinct_pairs(u, v, n):
+    """Positions of the first occurrence of every distinct (u, v), u != v."""
+    valid = np.flatnonzero(u != v)
+    _, first = np.unique(u[valid] * n + v[valid], return_index=True)
+    return valid[np.sort(first)]
+
+
+def sparse_random_edges(n, m, cap=10, seed=42, legacy_order=True, rng=None):
+    """
+    Draw (u, v) pairs two LCG states at a time until m distinct pairs
+    with u != v are found (or 10m attempts pass), then one capacity each.
+
+    The original generator handed out capacities while iterating a Python
+    set of (u, v) tuples. legacy_order=True rebuilds that set so seeded
+    graphs stay identical, at the cost of one tuple per edge;
+    legacy_order=False assigns them in draw order, fully vectorized.
+    With rng, pairs and capacities come from rng in draw order.
+    """
+    empty = np.zeros(0, dtype=np.int64)
+    if m <= 0:
+        return as_edge_arrays(n, empty, empty, empty)
+    limit = 10 * m
+    count = min(m + m // 4 + 16, limit)
+    if rng is not None:
+        u = v = empty
+        while True:
+            drawn = rng.integers(0, n, size=(count - len(u), 2))
+            u = np.concatenate((u, drawn[:, 0]))
+            v = np.concatenate((v, drawn[:, 1]))
+            first = _first_distinct_pairs(u, v, n)
+            if len(first) >= m or count == limit:
+                break
+            count = min(2 * count, limit)
+        first = first[:m]
+        caps = rng.integers(1, cap + 1, size=len(first))
+        return as_edge_arrays(n, u[first], v[first], caps)
+
+    while True:
+        states = _lcg_stream(seed, 2 * count)
+        u = (states[0::2] % np.uint64(n)).astype(np.int64)
+        v = (states[1::2] % np.uint64(n)).astype(np.int64)
+        first = _first_distinct_pairs(u, v, n)
+        if len(first) >= m or count == limit:
+            break
+        count = min(2 * count, limit)
+    if len(first) >= m:
+        first = first[:m]
+        count = int(first[-1]) + 1
+    state = int(states[2 * count - 1])
+
+    if legacy_order:
+        edge_set = set(zip(u[first].tolist(), v[first].tolist()))
+        flat = np.fromiter(chain.from_iterable(edge_set), dtype=np.int64, count=2 * len(first))
+        tails, heads = flat[0::2], flat[1::2]
+    else:
+        tails, heads = u[first], v[first]
+    caps = 1 + (_lcg_stream(state, len(first)) % np.uint64(cap)).astype(np.int64)
+    return as_edge_arrays(n, tails, heads, caps)
+
+
+def sparse_random_graph(n, m, cap=10, seed=42, rng=None):
+    return edges_to_graph(*sparse_random_edges(n, m, cap, seed, rng=rng))
+
+
+def dense_random_edges(n, density, cap=10, seed=42, rng=None):
+    """
+    Visit the ordered pairs (u, v), u != v, in order: one LCG state decides
+    whether the edge exists and, if it does, the next state is its
+    capacity. A state is a coin draw unless the state before it was an
+    accepted coin, so inside a run of accepting states coin and capacity
+    draws alternate, which lets a whole block be classified at once.
+    With rng, all coins are drawn first, then the capacities.
+    """
+    pairs = n * (n - 1)
+    kept, caps = [], []
+    if rng is not None:
+        for done in range(0, pairs, LCG_BLOCK):
+            block = min(pairs - done, LCG_BLOCK)
+            kept.append(done + np.flatnonzero(rng.random(block) < density))
+        k = np.concatenate(kept) if kept else np.zeros(0, dtype=np.int64)
+        return _pair_edges(n, k, rng.integers(1, cap + 1, size=len(k)))
+
+    state = seed
+    done = 0
+    while done < pairs:
+        block = min(2 * (pairs - done), LCG_BLOCK)
+        states = _lcg_stream(state, block + 1)
+        accept = states / 4294967296.0 < density
+        # Length of the run of accepting states just before each position
+        pos = np.arange(block, dtype=np.int64)
+        last_reject = np.maximum.accumulate(np.where(accept[:block], -1, pos))
+        run = np.empty(block, dtype=np.int64)
+        run[0] = 0
+        run[1:] = pos[1:] - 1 - last_reject[:-1]
+        coins = np.flatnonzero(run % 2 == 0)[:pairs - done]
+
+        hit = accept[coins]
+        kept.append(done + np.flatnonzero(hit))
+        caps.append(1 + (states[coins[hit] + 1] % np.uint64(cap)).astype(np.int64))
+        done += len(coins)
+        # Resume after the last coin (and its capacity draw, if any)
+        state = int(states[coins[-1] + hit[-1]])
+
+    k = np.concatenate(kept) if kept else np.zeros(0, dtype=np.int64)
+    caps = np.concatenate(caps) if caps else np.zeros(0, dtype=np.int64)
+    return _pair_edges(n, k, caps)
+
+
+def _pair_edges(n, k, caps):
+    """Edges for indices k into the ordered pairs (u, v), u != v."""
+    tails = k // max(n - 1, 1)
+    rest = k % max(n - 1, 1)
+    heads = rest + (rest >= tails)
+    return as_edge_arrays(n, tails, heads, caps)
+
+
+def dense_random_graph(n, density, cap=10, seed=42, rng=None):
+    return edges_to_graph(*dense_random_edges(n, density, cap, seed, rng=rng))
+
+
+def bipartite_edges(n_left, n_right, cap=1):
+    n = n_left + n_right + 2
+    s, t = 0, n - 1
+    left = 1 + np.arange(n_left, dtype=np.int64)
+    right = 1 + n_left + np.arange(n_right, dtype=np.int64)
+    tails = np.concatenate((np.full(n_left, s), np.repeat(left, n_right), right))
+    heads = np.concatenate((left, np.tile(right, n_left), np.full(n_right, t)))
+    return as_edge_arrays(n, tails, heads, cap)
+
+
+def bipartite_graph(n_left, n_right, cap=1):
+    return edges_to_graph(*bipartite_edges(n_left, n_right, cap))
+
+
+def even_tarjan_edges(n_layers, width, cap=1, seed=123, rng=None):
+    """
+    Complete layer-to-layer edges plus, for every vertex, a random half of
+    the edges back to all earlier layers. The coins follow
+    random.seed(seed); random() of the original loops, or rng if given.
+    """
+    n = n_layers * width + 2
+    s, t = 0, n - 1
+    fwd_tails, fwd_heads = _layer_to_layer(n_layers, width)
+    back_tails, back_heads = [], []
+    for L in range(1, n_layers):
+        # for i in layer L, for each earlier layer, for each j in it
+        k = np.arange(width * L * width, dtype=np.int64)
+        back_tails.append(1 + L * width + k // (L * width))
+        back_heads.append(1 + k % (L * width))
+    back_tails = np.concatenate(back_tails) if back_tails else np.zeros(0, dtype=np.int64)
+    back_heads = np.concatenate(back_heads) if back_heads else np.zeros(0, dtype=np.int64)
+    if rng is None:
+        rng = python_random_state(seed)
+    coin = rng.random(len(back_tails)) < 0.5
+
+    first = 1 + np.arange(width, dtype=np.int64)
+    last = 1 + (n_layers - 1) * width + np.arange(width, dtype=np.int64)
+    tails = np.concatenate((fwd_tails, np.full(width, s), last, back_tails[coin]))
+    heads = np.concatenate((fwd_heads, first, np.full(width, t), back_heads[coin]))
+    return as_edge_arrays(n, tails, heads, cap)
+
+
+def even_tarjan(n_layers, width, cap=1, seed=123, rng=None):
+    return edges_to_graph(*even_tarjan_edges(n_layers, width, cap, seed, rng))
+
+
+def diamond_edges(n_diamonds, cap=1):
+    n = 2 * n_diamonds + 2
+    s, t = 0, n - 1
+    u = 1 + 2 * np.arange(n_diamonds, dtype=np.int64)
+    into = np.where(u == 1, s, u - 2)
+    # Per diamond: into -> u, then u -> u + 1 twice (capacity 1 and cap)
+    tails = np.stack((into, u, u), axis=1).ravel()
+    heads = np.stack((u, u + 1, u + 1), axis=1).ravel()
+    caps = np.tile(np.array([cap, 1, cap], dtype=np.int64), n_diamonds)
+    tails = np.append(tails, 2 * n_diamonds)
+    heads = np.append(heads, t)
+    caps = np.append(caps, cap)
+    return as_edge_arrays(n, tails, heads, caps)
+
+
+def diamond(n_diamonds, cap=1):
+    return edges_to_graph(*diamond_edges(n_diamonds, cap))
+
+
+def star_of_stars_edges(n_branches=50, branch_size=50, cap=1):
+    total_nodes = 2 + n_branches * (1 + branch_size)
+    s, t = 0, total_nodes - 1
+    hub = 1 + (1 + branch_size) * np.arange(n_branches, dtype=np.int64)
+    leaf = (hub[:, None] + 1 + np.arange(branch_size, dtype=np.int64)).ravel()
+    leaf_hub = np.repeat(hub, branch_size)
+    # Per branch: s -> hub, then hub -> leaf, leaf -> t for every leaf
+    per_leaf_tails = np.stack((leaf_hub, leaf), axis=1).reshape(n_branches, 2 * branch_size)
+    per_leaf_heads = np.stack((leaf, np.full(len(leaf), t)), axis=1).reshape(n_branches, 2 * branch_size)
+    tails = np.concatenate((np.full((n_branches, 1), s), per_leaf_tails), axis=1).ravel()
+    heads = np.concatenate((hub[:, None], per_leaf_heads), axis=1).ravel()
+    return as_edge_arrays(total_nodes, tails, heads, cap)
+
+
+def star_of_stars(n_branches=50, branch_size=50, cap=1):
+    return edges_to_graph(*star_of_stars_edges(n_branches, branch_size, cap))
+
+
+def count_edges(g: Graph):
+    return sum(len(g.adj[u]) for u in range(g.n))
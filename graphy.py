@@ -1,58 +1,289 @@
-from collections import defaultdict, deque
-
-class Graph:
-    def __init__(self, n):
-        self.n = n
-        self.adj = [dict() for _ in range(n)]
-
-    def add_edge(self, u, v, cap):
-        if cap <= 0:
-            return
-        self.adj[u][v] = self.adj[u].get(v, 0) + cap
-
-    def neighbors(self, u):
-        return list(self.adj[u].keys())
-
-    def capacity(self, u, v):
-        return self.adj[u].get(v, 0)
-
-    def copy(self):
-        g = Graph(self.n)
-        for u in range(self.n):
-            for v, c in self.adj[u].items():
-                g.adj[u][v] = c
-        return g
-
-def compute_min_cut_from_residual(graph, residual_adj, s):
-    """
-    Given the original graph and a residual adjacency (dict-of-dicts) after a
-    max-flow computation, return the minimum cut edges as a list of (u, v)
-    where u is reachable from s in the residual graph and v is not.
-
-    Inputs:
-    - graph: Graph (original capacities)
-    - residual_adj: list[dict[int,int]] (residual capacities)
-    - s: int (source)
-
-    Output:
-    - list of edges (u, v) forming an s-t cut
-    """
-    from collections import deque
-
-    n = graph.n
-    reachable = {s}
-    q = deque([s])
-    while q:
-        u = q.popleft()
-        for v, cap in residual_adj[u].items():
-            if cap > 0 and v not in reachable:
-                reachable.add(v)
-                q.append(v)
-
-    cut = []
-    for u in range(n):
-        if u in reachable:
-            for v, cap in graph.adj[u].items():
-                if v not in reachable:
-                    cut.append((u, v))
-    return cut
+from collections import defaultdict, deque
+import time
+import numpy as np
+
+# Operation counts an engine reports when given a stats dict; each engine
+# fills in the ones that apply to it (see README_J.md)
+OP_COUNTERS = ('augmenting_paths', 'bfs_phases', 'arc_scans', 'pushes_saturating',
+               'pushes_nonsaturating', 'relabels', 'global_relabels')
+
+# Phases an engine times when given a timings dict, in ms: copying the
+# capacities into its residual arrays, the max-flow loop, the min cut
+ENGINE_PHASES = ('residual_ms', 'solve_ms', 'cut_ms')
+
+
+def lap(timings, phase, start):
+    """Add the ms since start to timings[phase] (if timings is a dict); returns now."""
+    now = time.perf_counter()
+    if timings is not None:
+        timings[phase] = timings.get(phase, 0.0) + (now - start) * 1000
+    return now
+
+class Graph:
+    def __init__(self, n):
+        self.n = n
+        self.adj = [dict() for _ in range(n)]
+
+    def add_edge(self, u, v, cap):
+        if cap <= 0:
+            return
+        self.adj[u][v] = self.adj[u].get(v, 0) + cap
+
+    def neighbors(self, u):
+        return list(self.adj[u].keys())
+
+    def capacity(self, u, v):
+        return self.adj[u].get(v, 0)
+
+    def copy(self):
+        g = Graph(self.n)
+        for u in range(self.n):
+            for v, c in self.adj[u].items():
+                g.adj[u][v] = c
+        return g
+
+def compute_min_cut_from_residual(graph, residual_adj, s):
+    """
+    Given the original graph and a residual adjacency (dict-of-dicts) after a
+    max-flow computation, return the minimum cut edges as a list of (u, v)
+    where u is reachable from s in the residual graph and v is not.
+
+    Inputs:
+    - graph: Graph (original capacities)
+    - residual_adj: list[dict[int,int]] (residual capacities)
+    - s: int (source)
+
+    Output:
+    - list of edges (u, v) forming an s-t cut
+    """
+    from collections import deque
+
+    # A plain BFS: converting the dict residual to arrays for bfs_levels
+    # costs more than this single pass
+    n = graph.n
+    reachable = {s}
+    q = deque([s])
+    while q:
+        u = q.popleft()
+        for v, cap in residual_adj[u].items():
+            if cap > 0 and v not in reachable:
+                reachable.add(v)
+                q.append(v)
+
+    cut = []
+    for u in range(n):
+        if u in reachable:
+            for v, cap in graph.adj[u].items():
+                if v not in reachable:
+                    cut.append((u, v))
+    return cut
+
+
+class CSRGraph:
+    """
+    Frozen compressed-sparse-row form of a Graph.
+
+    Every unordered vertex pair {u, v} joined by at least one edge is stored
+    as two paired arcs u->v and v->u, so the arc arrays double as a residual
+    network: arc i and arc rev[i] are each other's reverse.
+
+    Arrays (read-only numpy):
+    - offset:   int64, length n + 1, arcs of u are offset[u] .. offset[u + 1] - 1
+    - target:   int32, head vertex of each arc (sorted within each vertex)
+    - capacity: int64, original capacity of each arc (0 for pure reverse arcs)
+    - rev:      int32, index of the paired reverse arc
+
+    Parallel edges are merged (capacities summed) and self-loops dropped.
+    Build with CSRGraph.from_edges / from_graph. The constructor copies
+    writeable arrays it is given, so the caller's arrays stay writeable and
+    later writes to them do not reach the graph.
+    """
+
+    __slots__ = ('n', 'm', 'offset', 'target', 'capacity', 'rev')
+
+    def __init__(self, n, m, offset, target, capacity, rev):
+        object.__setattr__(self, 'n', n)
+        object.__setattr__(self, 'm', m)
+        for name, value, dtype in (('offset', offset, np.int64),
+                                   ('target', target, np.int32),
+                                   ('capacity', capacity, np.int64),
+                                   ('rev', rev, np.int32)):
+            arr = np.asarray(value, dtype=dtype)
+            if arr.flags.writeable:
+                # Never freeze the caller's own array; read-only ones are shared
+                if isinstance(value, np.ndarray) and np.may_share_memory(arr, value):
+                    arr = arr.copy()
+                arr.flags.writeable = False
+            object.__setattr__(self, name, arr)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CSRGraph is immutable")
+
+    def __reduce__(self):
+        return (CSRGraph, (self.n, self.m, self.offset, self.target,
+                           self.capacity, self.rev))
+
+    @classmethod
+    def from_edges(cls, n, sources, targets, capacities):
+        """
+        Bulk-build from three parallel sequences (lists, arrays, numpy
+        arrays, ...). Edges with capacity <= 0 and self-loops are ignored;
+        parallel edges are merged by summing their capacities.
+        """
+        u = np.asarray(sources, dtype=np.int64)
+        v = np.asarray(targets, dtype=np.int64)
+        c = np.asarray(capacities, dtype=np.int64)
+        keep = (c > 0) & (u != v)
+        u, v, c = u[keep], v[keep], c[keep]
+
+        # Merge parallel edges
+        keys, inv = np.unique(u * n + v, return_inverse=True)
+        caps = np.zeros(len(keys), dtype=np.int64)
+        np.add.at(caps, inv, c)
+        eu, ev = np.divmod(keys, n)
+
+        # One arc pair per unordered {a, b}, a < b
+        lo = np.minimum(eu, ev)
+        hi = np.maximum(eu, ev)
+        pairs, pinv = np.unique(lo * n + hi, return_inverse=True)
+        p = len(pairs)
+        a, b = np.divmod(pairs, n)
+        fwd = np.zeros(p, dtype=np.int64)
+        bwd = np.zeros(p, dtype=np.int64)
+        is_fwd = eu < ev
+        fwd[pinv[is_fwd]] = caps[is_fwd]
+        bwd[pinv[~is_fwd]] = caps[~is_fwd]
+
+        # Arc k (< p) is a->b, arc k + p is b->a; sort by (tail, head)
+        src = np.concatenate((a, b))
+        dst = np.concatenate((b, a))
+        acap = np.concatenate((fwd, bwd))
+        order = np.lexsort((dst, src))
+        pos = np.empty(2 * p, dtype=np.int64)
+        pos[order] = np.arange(2 * p, dtype=np.int64)
+        pair_of = np.concatenate((np.arange(p, 2 * p), np.arange(p)))
+        rev = pos[pair_of[order]]
+
+        offset = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=offset[1:])
+        capacity = acap[order]
+        # Freshly built, so handed over read-only instead of copied
+        offset.flags.writeable = False
+        capacity.flags.writeable = False
+        return cls(n, len(keys), offset, dst[order], capacity, rev)
+
+    @classmethod
+    def from_graph(cls, graph):
+        """Build from a Graph (or return it unchanged if already a CSRGraph)."""
+        if isinstance(graph, cls):
+            return graph
+        sources, targets, capacities = [], [], []
+        for u in range(graph.n):
+            adj = graph.adj[u]
+            sources.extend([u] * len(adj))
+            targets.extend(adj.keys())
+            capacities.extend(adj.values())
+        return cls.from_edges(graph.n, sources, targets, capacities)
+
+    @property
+    def num_arcs(self):
+        return len(self.target)
+
+    def neighbors(self, u):
+        lo, hi = self.offset[u], self.offset[u + 1]
+        return self.target[lo:hi][self.capacity[lo:hi] > 0].tolist()
+
+    def capacity_of(self, u, v):
+        lo, hi = int(self.offset[u]), int(self.offset[u + 1])
+        i = lo + int(np.searchsorted(self.target[lo:hi], v))
+        if i < hi and self.target[i] == v:
+            return int(self.capacity[i])
+        return 0
+
+    def edges(self):
+        """Return (sources, targets, capacities) arrays of the original edges."""
+        tails = np.repeat(np.arange(self.n, dtype=np.int64), np.diff(self.offset))
+        mask = self.capacity > 0
+        return tails[mask], self.target[mask], self.capacity[mask]
+
+    def to_graph(self):
+        g = Graph(self.n)
+        for u, v, c in zip(*(a.tolist() for a in self.edges())):
+            g.adj[u][v] = c
+        return g
+
+
+def _frontier_arcs(offset, frontier):
+    """Arc ids of every vertex in frontier, concatenated."""
+    starts = offset[frontier]
+    counts = offset[frontier + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    shift = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+    return np.arange(total, dtype=np.int64) + shift
+
+
+def bfs_levels(csr, residual, root, reverse=False, stop_at=None, allowed=None):
+    """
+    Frontier-at-a-time BFS over the arcs of a CSRGraph with residual > 0.
+
+    Inputs:
+    - csr: CSRGraph
+    - residual: sequence indexed by arc id (list or numpy array)
+    - root: int, start vertex
+    - reverse: follow arcs backwards (distances *to* root)
+    - stop_at: optional vertex; stop after the level that reaches it
+    - allowed: optional bool mask; vertices outside it are never entered
+
+    Output:
+    - numpy int64 array of BFS levels, -1 for unreached vertices
+    """
+    res = np.asarray(residual)
+    offset, target = csr.offset, csr.target
+    level = np.full(csr.n, -1, dtype=np.int64)
+    if allowed is not None:
+        level[~np.asarray(allowed, dtype=bool)] = -2
+    level[root] = 0
+    frontier = np.array([root], dtype=np.int64)
+    d = 0
+    while frontier.size:
+        arcs = _frontier_arcs(offset, frontier)
+        live = res[csr.rev[arcs]] > 0 if reverse else res[arcs] > 0
+        nxt = target[arcs[live]]
+        nxt = np.unique(nxt[level[nxt] == -1])
+        d += 1
+        level[nxt] = d
+        frontier = nxt
+        if stop_at is not None and level[stop_at] >= 0:
+            break
+    if allowed is not None:
+        level[level == -2] = -1
+    return level
+
+
+def reachable_mask(csr, residual, root, reverse=False):
+    """Bool mask of vertices reachable from (or, with reverse, reaching) root."""
+    return bfs_levels(csr, residual, root, reverse=reverse) >= 0
+
+
+def cut_edges_from_mask(csr, source_side):
+    """Original edges (u, v) with u inside source_side and v outside it."""
+    tails, heads, _ = csr.edges()
+    crossing = source_side[tails] & ~source_side[heads]
+    return list(zip(tails[crossing].tolist(), heads[crossing].tolist()))
+
+
+def compute_min_cut_from_csr(csr, residual, s):
+    """
+    CSR counterpart of compute_min_cut_from_residual.
+
+    Inputs:
+    - csr: CSRGraph (original capacities)
+    - residual: sequence indexed by arc id (residual capacities)
+    - s: int (source)
+
+    Output:
+    - list of edges (u, v) forming an s-t cut
+    """
+    return cut_edges_from_mask(csr, reachable_mask(csr, residual, s))
@@ -0,0 +1,178 @@
+from time import perf_counter
+import numpy as np
+from graphy import CSRGraph, cut_edges_from_mask, lap
+
+
+def bipartite_sides(graph, s, t):
+    """
+    (left, right) vertex arrays if graph is a matching network: every edge
+    runs s -> left, left -> right or right -> t, and all edges have the same
+    capacity. left holds the vertices s feeds and right those feeding t;
+    the others cannot carry flow. None otherwise. Vectorized over the edges.
+    """
+    csr = CSRGraph.from_graph(graph)
+    n = csr.n
+    tails, heads, caps = csr.edges()
+    if len(caps) and caps.min() != caps.max():
+        return None
+    from_s = tails == s
+    into_t = heads == t
+    if np.any(heads == s) or np.any(tails == t) or np.any(from_s & into_t):
+        return None
+    middle = ~from_s & ~into_t
+    is_left = np.zeros(n, dtype=bool)
+    is_left[heads[from_s]] = True
+    is_left[tails[middle]] = True
+    is_right = np.zeros(n, dtype=bool)
+    is_right[tails[into_t]] = True
+    is_right[heads[middle]] = True
+    if np.any(is_left & is_right):
+        return None
+    return np.unique(heads[from_s]), np.unique(tails[into_t])
+
+
+def hopcroft_karp(graph, s, t, sides=None, stats=None, timings=None):
+    """
+    Hopcroft-Karp max flow for matching networks (see bipartite_sides), in
+    O(E sqrt(V)): each phase finds the shortest alternating paths by one BFS
+    from the free left vertices, then augments along a maximal set of them
+    with a current-arc DFS. Works on the left -> right edges only, as a
+    matching, after a greedy first pass.
+
+    Returns (flow, min_cut_edges) like the other engines: flow is the
+    matching size times the common capacity, and the cut is the network
+    form of König's vertex cover, read off the final BFS: s -> u for left
+    vertices u it did not reach, v -> t for right vertices v it did.
+    Raises ValueError if graph is not a matching network. sides, the
+    (left, right) vertices as bipartite_sides returns them, skips the
+    detection; the graph must then have that structure.
+
+    stats, if a dict, receives augmenting_paths (greedy matches included),
+    bfs_phases and arc_scans; timings, if a dict, receives the
+    graphy.ENGINE_PHASES times.
+    """
+    csr = CSRGraph.from_graph(graph)
+    clock = perf_counter()
+    if sides is None:
+        sides = bipartite_sides(csr, s, t)
+        if sides is None:
+            raise ValueError("Hopcroft-Karp needs a bipartite s -> left -> right -> t "
+                             "network with equal edge capacities")
+    n = csr.n
+    left, right = (np.asarray(side, dtype=np.int64) for side in sides)
+    tails, heads, caps = csr.edges()
+    is_left = np.zeros(n, dtype=bool)
+    is_left[left] = True
+    is_right = np.zeros(n, dtype=bool)
+    is_right[right] = True
+    # Matching edges, grouped by left vertex (edges() is sorted by tail)
+    middle = is_left[tails] & is_right[heads]
+    m_tails, m_heads = tails[middle], heads[middle]
+    adj_offset = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(m_tails, minlength=n), out=adj_offset[1:])
+    off = adj_offset.tolist()
+    adj = m_heads.tolist()
+    lefts = left.tolist()
+    unit = int(caps[0]) if len(caps) else 0
+    clock = lap(timings, 'residual_ms', clock)
+
+    counting = stats is not None
+    match_l = [-1] * n
+    match_r = [-1] * n
+    matched = phases = scans = 0
+
+    # Greedy pass: match each left vertex to its first free neighbour
+    for u in lefts:
+        i, end = off[u], off[u + 1]
+        while i < end and match_r[adj[i]] != -1:
+            i += 1
+        if i < end:
+            v = adj[i]
+            match_l[u] = v
+            match_r[v] = u
+            matched += 1
+        if counting:
+            scans += min(i + 1, end) - off[u]
+
+    while True:
+        # BFS layers over alternating paths, left vertices only: a matched
+        # right vertex leads on to its partner. limit is the layer that
+        # first sees a free right vertex, where the shortest paths end.
+        dist = [-1] * n
+        queue = [u for u in lefts if match_l[u] == -1]
+        roots = len(queue)
+        for u in queue:
+            dist[u] = 0
+        limit = -1
+        for u in queue:
+            d = dist[u] + 1
+            for i in range(off[u], off[u + 1]):
+                w = match_r[adj[i]]
+                if w == -1:
+                    limit = d - 1
+                    break
+                if dist[w] == -1:
+                    dist[w] = d
+                    queue.append(w)
+            if counting:
+                scans += (i + 1 if limit >= 0 else off[u + 1]) - off[u]
+            if limit >= 0:
+                break
+        if limit < 0:
+            break
+        phases += 1
+
+        # Augment along vertex-disjoint shortest paths; it[u] is u's current
+        # arc, so every arc is retired at most once per phase
+        it = off[:]
+        for root in queue[:roots]:
+            path = [root]
+            u = root
+            while True:
+                d = dist[u]
+                i, end = it[u], off[u + 1]
+                if d < limit:
+                    while i < end:
+                        w = match_r[adj[i]]
+                        if w == -1 or dist[w] == d + 1:
+                            break
+                        i += 1
+                else:
+                    while i < end and match_r[adj[i]] != -1:
+                        i += 1
+                it[u] = i
+                if i == end:
+                    # Dead end: drop u from this phase and back up
+                    dist[u] = -1
+                    path.pop()
+                    if not path:
+                        break
+                    u = path[-1]
+                    it[u] += 1
+                    continue
+                w = match_r[adj[i]]
+                if w == -1:
+                    for x in path:
+                        v = adj[it[x]]
+                        match_l[x] = v
+                        match_r[v] = x
+                    matched += 1
+                    break
+                path.append(w)
+                u = w
+        if counting:
+            scans += sum(it) - sum(off)
+
+    if counting:
+        stats.update(augmenting_paths=matched, bfs_phases=phases, arc_scans=scans)
+    clock = lap(timings, 'solve_ms', clock)
+    # The last BFS reached exactly the left vertices on free-vertex
+    # alternating paths; their neighbours are the right vertices in the cover
+    # (or, when they do not feed t, vertices no flow leaves anyway)
+    reached = np.array(dist) >= 0
+    source_side = reached.copy()
+    source_side[heads[reached[tails]]] = True
+    source_side[s] = True
+    cut = cut_edges_from_mask(csr, source_side)
+    lap(timings, 'cut_ms', clock)
+    return unit * matched, cut
@@ -0,0 +1,204 @@
+from collections import deque
+from graphy import CSRGraph
+
+
+class IncrementalMaxFlow:
+    """
+    Max flow that survives edits. The residual network is kept between
+    calls, so after capacity changes or edge insertions/deletions only the
+    affected flow is repaired instead of solving again from zero flow.
+
+    Every directed edge u->v owns an arc pair: arc 2k is u->v with the
+    edge's capacity, arc 2k + 1 = (2k) ^ 1 is its reverse, whose residual
+    is the flow on the edge. Updates take effect right away; extra
+    augmentation is deferred to the next max_flow() or min_cut() call, so
+    a batch of edits costs one repair pass.
+
+        inc = IncrementalMaxFlow(graph, s, t)
+        inc.max_flow()
+        inc.set_capacity(u, v, 3)     # also inserts (u, v), or deletes with 0
+        inc.max_flow()
+    """
+
+    def __init__(self, graph, s, t):
+        csr = CSRGraph.from_graph(graph)
+        self.n = csr.n
+        self.s = s
+        self.t = t
+        self.head = []
+        self.cap = []
+        self.res = []
+        self.adj = [[] for _ in range(self.n)]
+        self.edge_arc = {}
+        for u, v, c in zip(*(a.tolist() for a in csr.edges())):
+            self._new_edge(u, v, c)
+        self._dirty = True
+
+    def _new_edge(self, u, v, c):
+        a = len(self.head)
+        self.head += [v, u]
+        self.cap += [c, 0]
+        self.res += [c, 0]
+        self.adj[u].append(a)
+        self.adj[v].append(a + 1)
+        self.edge_arc[(u, v)] = a
+        return a
+
+    def capacity(self, u, v):
+        a = self.edge_arc.get((u, v))
+        return 0 if a is None else self.cap[a]
+
+    def flow_on(self, u, v):
+        """Flow currently routed along the edge u->v."""
+        a = self.edge_arc.get((u, v))
+        return 0 if a is None else self.res[a ^ 1]
+
+    def _levels(self, src, dst):
+        """BFS levels from src over residual arcs, stopping at dst's level."""
+        head, res, adj = self.head, self.res, self.adj
+        level = [-1] * self.n
+        level[src] = 0
+        q = deque([src])
+        while q:
+            u = q.popleft()
+            d = level[u] + 1
+            for i in adj[u]:
+                if res[i] > 0:
+                    v = head[i]
+                    if level[v] < 0:
+                        level[v] = d
+                        if v == dst:
+                            return level
+                        q.append(v)
+        return level
+
+    def _augment(self, src, dst, limit=None):
+        """
+        Push up to limit units (all it can if None) from src to dst along
+        residual paths, Dinic style: level graph, then a blocking flow by
+        an iterative DFS that retreats only to the first saturated arc.
+        Returns the amount pushed.
+        """
+        head, res, adj = self.head, self.res, self.adj
+        total = 0
+        while limit is None or total < limit:
+            level = self._levels(src, dst)
+            if level[dst] < 0:
+                break
+            it = [0] * self.n
+            path = []
+            u = src
+            while True:
+                if u == dst:
+                    f = min([res[i] for i in path])
+                    if limit is not None and f > limit - total:
+                        f = limit - total
+                    k = -1
+                    for j, i in enumerate(path):
+                        res[i] -= f
+                        res[i ^ 1] += f
+                        if k < 0 and res[i] == 0:
+                            k = j
+                    total += f
+                    if k < 0:
+                        # Only the limit stopped this path
+                        return total
+                    del path[k:]
+                    u = head[path[-1]] if path else src
+                    continue
+
+                arcs = adj[u]
+                i = it[u]
+                nxt = level[u] + 1
+                while i < len(arcs) and (res[arcs[i]] <= 0 or level[head[arcs[i]]] != nxt):
+                    i += 1
+                it[u] = i
+                if i < len(arcs):
+                    a = arcs[i]
+                    path.append(a)
+                    u = head[a]
+                else:
+                    # Dead end: prune u from this level graph and back up
+                    level[u] = -1
+                    if not path:
+                        break
+                    u = head[path.pop() ^ 1]
+                    it[u] += 1
+        return total
+
+    def _settle(self, routes, amount):
+        """Push amount units along the (src, dst) routes, taking each in turn."""
+        for src, dst in routes:
+            if amount == 0:
+                return
+            amount -= self._augment(src, dst, amount)
+        if amount:
+            raise RuntimeError("flow repair failed: residual network is inconsistent")
+
+    def set_capacity(self, u, v, c):
+        """
+        Set the capacity of u->v to c, inserting the edge if it is new and
+        deleting it when c is 0. If c drops below the flow on the edge,
+        the surplus is cancelled: it is rerouted from u to v where the
+        residual network allows, and otherwise returned to s (the excess
+        at u) and withdrawn from t (the deficit at v).
+        """
+        if c < 0:
+            raise ValueError(f"capacity must be non-negative, got {c}")
+        if not (0 <= u < self.n and 0 <= v < self.n):
+            raise ValueError(f"edge ({u}, {v}) outside 0..{self.n - 1}")
+        if u == v:
+            return
+        a = self.edge_arc.get((u, v))
+        if a is None:
+            if c > 0:
+                self._new_edge(u, v, c)
+                self._dirty = True
+            return
+
+        flow = self.res[a ^ 1]
+        self.cap[a] = c
+        if c >= flow:
+            self.res[a] = c - flow
+            self._dirty = True
+            return
+
+        over = flow - c
+        self.res[a] = 0
+        self.res[a ^ 1] = c
+        rerouted = self._augment(u, v, over)
+        rest = over - rerouted
+        terminals = (self.s, self.t)
+        if rest and u not in terminals:
+            self._settle([(u, self.s), (u, self.t)], rest)
+        if rest and v not in terminals:
+            self._settle([(self.t, v), (self.s, v)], rest)
+        self._dirty = True
+
+    def add_edge(self, u, v, c):
+        """Add c to the capacity of u->v, like Graph.add_edge."""
+        if c > 0:
+            self.set_capacity(u, v, self.capacity(u, v) + c)
+
+    def remove_edge(self, u, v):
+        self.set_capacity(u, v, 0)
+
+    def max_flow(self):
+        """Augment s->t until no path is left and return the flow value."""
+        if self._dirty:
+            self._augment(self.s, self.t)
+            self._dirty = False
+        # Net flow into t
+        return sum(self.res[i] if i & 1 else -self.res[i ^ 1] for i in self.adj[self.t])
+
+    def min_cut(self):
+        """Edges (u, v) from the residual-reachable side of s to the rest."""
+        self.max_flow()
+        level = self._levels(self.s, None)
+        return sorted((u, v) for (u, v), a in self.edge_arc.items()
+                      if self.cap[a] > 0 and level[u] >= 0 and level[v] < 0)
+
+    def max_flow_min_cut(self):
+        """(flow, min_cut_edges), the contract of the one-shot engines."""
+        flow = self.max_flow()
+        return flow, self.min_cut()
@@ -1,4 +1,4 @@
-import sys
+from graphy import CSRGraph, bfs_levels
 from graph_generator import (
     sparse_random_graph,
     dense_random_graph,
@@ -44,17 +44,9 @@ def check_graphs():
         print(f"{'StarOfStars':<15} | {n:<8} | {g.n:<8} | {count_edges(g):<8} | {count_edges(g)/g.n:<10.2f} | {connected!s:<10}")
 
 def is_connected(g, s, t):
-    visited = {s}
-    queue = [s]
-    while queue:
-        u = queue.pop(0)
-        if u == t:
-            return True
-        for v in g.adj[u]:
-            if v not in visited:
-                visited.add(v)
-                queue.append(v)
-    return False
+    csr = CSRGraph.from_graph(g)
+    level = bfs_levels(csr, csr.capacity, s, stop_at=t)
+    return bool(level[t] >= 0)
 
 if __name__ == "__main__":
     check_graphs()
@@ -1,13 +1,22 @@
-import pickle
+import argparse
+import hashlib
 import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+import numpy as np
 from graph_generator import (
-    dense_random_graph,
-    sparse_random_graph,
-    layered_graph,
-    bipartite_graph,
-    count_edges
+    dense_random_edges,
+    sparse_random_edges,
+    layered_edges,
+    bipartite_edges,
+    edges_to_csr,
+    csr_to_adjacency,
+    edges_to_graph,
+    as_edge_arrays,
+    python_random_state
 )
-from graphy import Graph
+from dataset_archive import write_archive
+from graph_cache import GraphCache, cache_key
 
 
 def calculate_density(n, m):
@@ -26,35 +35,194 @@ def graph_to_dict(g):
     return graph_dict
 
 
-def generate_grid_graph(k, cap=10):
-    """Generate a k×k grid graph with source and sink."""
+def grid_edges(k, cap=10):
+    """Edge arrays of a k×k grid with source and sink; returns (edges, s, t)."""
     n = k * k
-    g = Graph(n + 2)
     s, t = 0, n + 1
-    
-    # Source to first column
-    for i in range(k):
-        g.add_edge(s, 1 + i * k, cap)
-    
-    # Grid connections (right and down)
-    for i in range(k):
-        for j in range(k):
-            node = 1 + i * k + j
-            if j < k - 1:  # Right
-                g.add_edge(node, node + 1, cap)
-            if i < k - 1:  # Down
-                g.add_edge(node, node + k, cap)
-    
-    # Last column to sink
-    for i in range(k):
-        g.add_edge(1 + i * k + (k - 1), t, cap)
-    
-    return g, s, t
+    node = 1 + np.arange(n, dtype=np.int64).reshape(k, k)
+    # Per cell in row-major order: right, then down
+    right = np.stack((node[:, :-1], node[:, 1:]), axis=-1)
+    down = np.stack((node[:-1, :], node[1:, :]), axis=-1)
+    cell = np.full((k, k, 2, 2), -1, dtype=np.int64)
+    cell[:, :-1, 0] = right
+    cell[:-1, :, 1] = down
+    inner = cell.reshape(-1, 2)
+    inner = inner[inner[:, 0] >= 0]
+    tails = np.concatenate((np.full(k, s), inner[:, 0], node[:, -1]))
+    heads = np.concatenate((node[:, 0], inner[:, 1], np.full(k, t)))
+    return as_edge_arrays(n + 2, tails, heads, cap), s, t
 
 
-def generate_A1_random_vary_n():
+def generate_grid_graph(k, cap=10):
+    """Generate a k×k grid graph with source and sink."""
+    edges, s, t = grid_edges(k, cap)
+    return edges_to_graph(*edges), s, t
+
+
+def bipartite_density_edges(n, density, cap=10, seed=0, rng=None):
+    """
+    Bipartite edge arrays with n/2 vertices per side, keeping each
+    left-right edge with probability density; returns (edges, s, t).
+    The coins match random.Random(seed).random(), one per pair, or are
+    drawn from rng if given.
+    """
+    partition_size = n // 2
+    s, t = 0, n + 1
+    left = 1 + np.arange(partition_size, dtype=np.int64)
+    right = 1 + partition_size + np.arange(partition_size, dtype=np.int64)
+    if rng is None:
+        rng = python_random_state(seed)
+    keep = rng.random(partition_size * partition_size) < density
+    tails = np.concatenate((np.full(partition_size, s),
+                            np.repeat(left, partition_size)[keep], right))
+    heads = np.concatenate((left, np.tile(right, partition_size)[keep],
+                            np.full(partition_size, t)))
+    return as_edge_arrays(n + 2, tails, heads, cap), s, t
+
+
+def generate_bipartite_density_graph(n, density, cap=10, seed=0, rng=None):
+    """Bipartite graph with n/2 vertices per side, keeping each left-right edge with probability density."""
+    edges, s, t = bipartite_density_edges(n, density, cap, seed, rng)
+    return edges_to_graph(*edges), s, t
+
+
+DATASET_ARCHIVE = 'j_datasets'
+
+
+def dataset_seed(plot_id, n, density, max_capacity, trial):
+    """
+    Seed of one random dataset, hashed from what identifies it. Each
+    dataset gets its own numpy stream (np.random.default_rng(seed)), so a
+    graph does not depend on which other datasets were built, in which
+    order or in which process.
+    """
+    key = repr((plot_id, n, density, max_capacity, trial)).encode()
+    return int.from_bytes(hashlib.blake2b(key, digest_size=16).digest(), 'little')
+
+
+# A dataset spec names a builder and its parameters; build_dataset turns it
+# into the full dataset record. Every builder returns (edges, source, sink)
+# with edges = (n, tails, heads, caps) as produced by graph_generator.
+def _random_builder(n, density, cap, seed):
+    rng = np.random.default_rng(seed)
+    return dense_random_edges(n, density=density, cap=cap, rng=rng), 0, n - 1
+
+
+def _sparse_builder(n, m, cap, seed):
+    rng = np.random.default_rng(seed)
+    return sparse_random_edges(n, m, cap=cap, rng=rng), 0, n - 1
+
+
+def _bipartite_density_builder(n, density, cap, seed):
+    return bipartite_density_edges(n, density, cap=cap, rng=np.random.default_rng(seed))
+
+
+def _layered_builder(n_layers, layer_width, cap):
+    edges = layered_edges(n_layers=n_layers, layer_width=layer_width, cap=cap)
+    return edges, 0, edges[0] - 1
+
+
+def _bipartite_builder(n_left, n_right, cap):
+    edges = bipartite_edges(n_left=n_left, n_right=n_right, cap=cap)
+    return edges, 0, edges[0] - 1
+
+
+GRAPH_BUILDERS = {
+    'dense_random': _random_builder,
+    'sparse_random': _sparse_builder,
+    'grid': grid_edges,
+    'layered': _layered_builder,
+    'bipartite': _bipartite_builder,
+    'bipartite_density': _bipartite_density_builder,
+}
+
+
+def make_spec(plot_id, graph_type, n, trial, max_capacity, builder, params,
+              num_layers=None, nodes_per_layer=None, grid_k=None):
+    """Describe one dataset without building its graph."""
+    return {
+        'plot_id': plot_id,
+        'graph_type': graph_type,
+        'n': n,
+        'max_capacity': max_capacity,
+        'num_layers': num_layers,
+        'nodes_per_layer': nodes_per_layer,
+        'grid_k': grid_k,
+        'trial': trial,
+        'builder': builder,
+        'params': params,
+    }
+
+
+def build_adjacency(spec):
+    """Build the graph of a spec as CSR arrays: (offsets, heads, caps, source, sink)."""
+    edges, s, t = GRAPH_BUILDERS[spec['builder']](**spec['params'])
+    return edges_to_csr(*edges) + (s, t)
+
+
+def dataset_record(spec, offsets, heads, caps, source, sink):
+    """Full dataset record of a spec, its graph kept as CSR arrays under 'adjacency'."""
+    n = len(offsets) - 1
+    actual_density = calculate_density(n, len(heads))
+
+    return {
+        'plot_id': spec['plot_id'],
+        'graph_type': spec['graph_type'],
+        'n': spec['n'],
+        'actual_n': n,
+        'density': actual_density,
+        'max_capacity': spec['max_capacity'],
+        'num_layers': spec['num_layers'],
+        'nodes_per_layer': spec['nodes_per_layer'],
+        'grid_k': spec['grid_k'],
+        'adjacency': (offsets, heads, caps),
+        'source': source,
+        'sink': sink,
+        'trial': spec['trial']
+    }
+
+
+def build_dataset(spec):
+    """Build the graph for a spec and return the full dataset record."""
+    ds = dataset_record(spec, *build_adjacency(spec))
+    ds['graph'] = dict(enumerate(csr_to_adjacency(*ds.pop('adjacency'))))
+    return ds
+
+
+PLOT_SUMMARIES = {
+    'A1': "random graphs (vary n, fixed density=0.3)",
+    'A2': "dense graphs (vary n, fixed density=0.75)",
+    'A3': "sparse graphs (vary n, m=3n)",
+    'A4': "grid graphs (vary k, n=k²)",
+    'A5': "layered graphs (vary layer_width, fixed layers=5)",
+    'A6': "bipartite graphs (vary partition_size)",
+    'B1': "random graphs (vary density, n in [100, 300, 500])",
+    'B2': "bipartite graphs (vary density, n in [100, 200, 400])",
+    'C1': "layered graphs (vary num_layers, fixed width=20)",
+    'D1': "layered graphs (vary nodes_per_layer, fixed layers=6)",
+    'E1': "grid graphs (vary k)",
+    'F1': "random graphs (vary max_capacity)",
+    'F2': "dense graphs (vary max_capacity)",
+    'F3': "sparse graphs (vary max_capacity)",
+}
+
+
+GROUP_HEADERS = {
+    'A': "GROUP A: FIX DENSITY, VARY n",
+    'B': "GROUP B: FIX n, VARY DENSITY",
+    'C': "GROUP C: FIX NODES-PER-LAYER, VARY #LAYERS",
+    'D': "GROUP D: FIX #LAYERS, VARY NODES-PER-LAYER",
+    'E': "GROUP E: VARY GRID DIMENSION k",
+    'F': "GROUP F: FIX n & DENSITY, VARY MAX CAPACITY",
+}
+
+
+def _report_plot(plot_id, datasets):
+    print(f"Generated {plot_id}: {len(datasets)} {PLOT_SUMMARIES[plot_id]}")
+
+
+def specs_A1_random_vary_n():
     """A1: Random graphs - runtime vs n (fixed density ~0.3)"""
-    datasets = []
     fixed_density = 0.3
     fixed_cap = 10
     n_values = [50, 150, 300, 500, 700, 900]  
@@ -62,35 +230,20 @@ def generate_A1_random_vary_n():
     
     for n in n_values:
         for trial in range(trials_per_n):
-            seed = 1000 + trial
-            g = dense_random_graph(n, density=fixed_density, cap=fixed_cap, seed=seed)
-            graph_dict = graph_to_dict(g)
-            num_edges = count_edges(g)
-            actual_density = calculate_density(g.n, num_edges)
-            
-            datasets.append({
-                'plot_id': 'A1',
-                'graph_type': 'random',
-                'n': n,
-                'actual_n': g.n,
-                'density': actual_density,
-                'max_capacity': fixed_cap,
-                'num_layers': None,
-                'nodes_per_layer': None,
-                'grid_k': None,
-                'graph': graph_dict,
-                'source': 0,
-                'sink': n - 1,
-                'trial': trial
-            })
-    
-    print(f"Generated A1: {len(datasets)} random graphs (vary n, fixed density={fixed_density})")
+            seed = dataset_seed('A1', n, fixed_density, fixed_cap, trial)
+            yield make_spec('A1', 'random', n, trial, fixed_cap, 'dense_random',
+                            {'n': n, 'density': fixed_density, 'cap': fixed_cap, 'seed': seed})
+
+
+def generate_A1_random_vary_n():
+    """A1: Random graphs - runtime vs n (fixed density ~0.3)"""
+    datasets = [build_dataset(spec) for spec in specs_A1_random_vary_n()]
+    _report_plot('A1', datasets)
     return datasets
 
 
-def generate_A2_dense_vary_n():
+def specs_A2_dense_vary_n():
     """A2: Dense graphs - runtime vs n (density ~0.7-0.8)"""
-    datasets = []
     fixed_density = 0.75
     fixed_cap = 10
     n_values = [50, 100, 200, 350, 500] 
@@ -98,105 +251,60 @@ def generate_A2_dense_vary_n():
     
     for n in n_values:
         for trial in range(trials_per_n):
-            seed = 2000 + trial
-            g = dense_random_graph(n, density=fixed_density, cap=fixed_cap, seed=seed)
-            graph_dict = graph_to_dict(g)
-            num_edges = count_edges(g)
-            actual_density = calculate_density(g.n, num_edges)
-            
-            datasets.append({
-                'plot_id': 'A2',
-                'graph_type': 'dense',
-                'n': n,
-                'actual_n': g.n,
-                'density': actual_density,
-                'max_capacity': fixed_cap,
-                'num_layers': None,
-                'nodes_per_layer': None,
-                'grid_k': None,
-                'graph': graph_dict,
-                'source': 0,
-                'sink': n - 1,
-                'trial': trial
-            })
-    
-    print(f"Generated A2: {len(datasets)} dense graphs (vary n, fixed density={fixed_density})")
+            seed = dataset_seed('A2', n, fixed_density, fixed_cap, trial)
+            yield make_spec('A2', 'dense', n, trial, fixed_cap, 'dense_random',
+                            {'n': n, 'density': fixed_density, 'cap': fixed_cap, 'seed': seed})
+
+
+def generate_A2_dense_vary_n():
+    """A2: Dense graphs - runtime vs n (density ~0.7-0.8)"""
+    datasets = [build_dataset(spec) for spec in specs_A2_dense_vary_n()]
+    _report_plot('A2', datasets)
     return datasets
 
 
-def generate_A3_sparse_vary_n():
+def specs_A3_sparse_vary_n():
     """A3: Sparse graphs - runtime vs n (m = 3*n edges)"""
-    datasets = []
     fixed_cap = 10
     n_values = [50, 150, 300, 500, 700, 1000] 
     trials_per_n = 3
     
     for n in n_values:
         for trial in range(trials_per_n):
-            seed = 3000 + trial
+            seed = dataset_seed('A3', n, None, fixed_cap, trial)
             m = 3 * n  
-            g = sparse_random_graph(n, m, cap=fixed_cap, seed=seed)
-            graph_dict = graph_to_dict(g)
-            num_edges = count_edges(g)
-            actual_density = calculate_density(g.n, num_edges)
-            
-            datasets.append({
-                'plot_id': 'A3',
-                'graph_type': 'sparse',
-                'n': n,
-                'actual_n': g.n,
-                'density': actual_density,
-                'max_capacity': fixed_cap,
-                'num_layers': None,
-                'nodes_per_layer': None,
-                'grid_k': None,
-                'graph': graph_dict,
-                'source': 0,
-                'sink': n - 1,
-                'trial': trial
-            })
-    
-    print(f"Generated A3: {len(datasets)} sparse graphs (vary n, m=3n)")
+            yield make_spec('A3', 'sparse', n, trial, fixed_cap, 'sparse_random',
+                            {'n': n, 'm': m, 'cap': fixed_cap, 'seed': seed})
+
+
+def generate_A3_sparse_vary_n():
+    """A3: Sparse graphs - runtime vs n (m = 3*n edges)"""
+    datasets = [build_dataset(spec) for spec in specs_A3_sparse_vary_n()]
+    _report_plot('A3', datasets)
     return datasets
 
 
-def generate_A4_grid_vary_n():
+def specs_A4_grid_vary_n():
     """A4: Grid graphs - runtime vs n (k×k grid, k varies)"""
-    datasets = []
     fixed_cap = 10
     k_values = [5, 10, 15, 20, 25, 30] 
     trials_per_k = 3 
     
     for k in k_values:
         for trial in range(trials_per_k):
-            g, s, t = generate_grid_graph(k, cap=fixed_cap)
-            graph_dict = graph_to_dict(g)
-            num_edges = count_edges(g)
-            actual_density = calculate_density(g.n, num_edges)
-            
-            datasets.append({
-                'plot_id': 'A4',
-                'graph_type': 'grid',
-                'n': k * k,
-                'actual_n': g.n,
-                'density': actual_density,
-                'max_capacity': fixed_cap,
-                'num_layers': None,
-                'nodes_per_layer': None,
-                'grid_k': k,
-                'graph': graph_dict,
-                'source': s,
-                'sink': t,
-                'trial': trial
-            })
-    
-    print(f"Generated A4: {len(datasets)} grid graphs (vary k, n=k²)")
+            yield make_spec('A4', 'grid', k * k, trial, fixed_cap, 'grid',
+                            {'k': k, 'cap': fixed_cap}, grid_k=k)
+
+
+def generate_A4_grid_vary_n():
+    """A4: Grid graphs - runtime vs n (k×k grid, k varies)"""
+    datasets = [build_dataset(spec) for spec in specs_A4_grid_vary_n()]
+    _report_plot('A4', datasets)
     return datasets
 
 
-def generate_A5_layered_vary_n():
+def specs_A5_layered_vary_n():
     """A5: Layered graphs - runtime vs n (fixed layers=5, vary layer_width)"""
-    datasets = []
     fixed_layers = 5
     fixed_cap = 10
     layer_widths = [10, 20, 40, 60, 80, 100] 
@@ -204,68 +312,40 @@ def generate_A5_layered_vary_n():
     
     for width in layer_widths:
         for trial in range(trials_per_width):
-            g = layered_graph(n_layers=fixed_layers, layer_width=width, cap=fixed_cap)
-            graph_dict = graph_to_dict(g)
-            num_edges = count_edges(g)
-            actual_density = calculate_density(g.n, num_edges)
-            
-            datasets.append({
-                'plot_id': 'A5',
-                'graph_type': 'layered',
-                'n': g.n - 2,  # Exclude source and sink
-                'actual_n': g.n,
-                'density': actual_density,
-                'max_capacity': fixed_cap,
-                'num_layers': fixed_layers,
-                'nodes_per_layer': width,
-                'grid_k': None,
-                'graph': graph_dict,
-                'source': 0,
-                'sink': g.n - 1,
-                'trial': trial
-            })
-    
-    print(f"Generated A5: {len(datasets)} layered graphs (vary layer_width, fixed layers={fixed_layers})")
+            # n excludes source and sink
+            yield make_spec('A5', 'layered', fixed_layers * width, trial, fixed_cap, 'layered',
+                            {'n_layers': fixed_layers, 'layer_width': width, 'cap': fixed_cap},
+                            num_layers=fixed_layers, nodes_per_layer=width)
+
+
+def generate_A5_layered_vary_n():
+    """A5: Layered graphs - runtime vs n (fixed layers=5, vary layer_width)"""
+    datasets = [build_dataset(spec) for spec in specs_A5_layered_vary_n()]
+    _report_plot('A5', datasets)
     return datasets
 
 
-def generate_A6_bipartite_vary_n():
+def specs_A6_bipartite_vary_n():
     """A6: Bipartite graphs - runtime vs n (balanced partitions)"""
-    datasets = []
     fixed_cap = 10
     partition_sizes = [25, 50, 100, 150, 200]  
     trials_per_size = 4 
     
     for size in partition_sizes:
         for trial in range(trials_per_size):
-            g = bipartite_graph(n_left=size, n_right=size, cap=fixed_cap)
-            graph_dict = graph_to_dict(g)
-            num_edges = count_edges(g)
-            actual_density = calculate_density(g.n, num_edges)
-            
-            datasets.append({
-                'plot_id': 'A6',
-                'graph_type': 'bipartite',
-                'n': 2 * size,
-                'actual_n': g.n,
-                'density': actual_density,
-                'max_capacity': fixed_cap,
-                'num_layers': None,
-                'nodes_per_layer': None,
-                'grid_k': None,
-                'graph': graph_dict,
-                'source': 0,
-                'sink': g.n - 1,
-                'trial': trial
-            })
-    
-    print(f"Generated A6: {len(datasets)} bipartite graphs (vary partition_size)")
+            yield make_spec('A6', 'bipartite', 2 * size, trial, fixed_cap, 'bipartite',
+                            {'n_left': size, 'n_right': size, 'cap': fixed_cap})
+
+
+def generate_A6_bipartite_vary_n():
+    """A6: Bipartite graphs - runtime vs n (balanced partitions)"""
+    datasets = [build_dataset(spec) for spec in specs_A6_bipartite_vary_n()]
+    _report_plot('A6', datasets)
     return datasets
 
 
-def generate_B1_random_vary_density():
+def specs_B1_random_vary_density():
     """B1: Random graphs - runtime vs density (3 fixed n values)"""
-    datasets = []
     fixed_cap = 10
     n_values = [100, 300, 500] 
     density_values = [0.1, 0.2, 0.3, 0.5, 0.7, 0.9]  
@@ -274,35 +354,20 @@ def generate_B1_random_vary_density():
     for n in n_values:
         for density in density_values:
             for trial in range(trials_per_config):
-                seed = 4000 + n + int(density * 100) + trial
-                g = dense_random_graph(n, density=density, cap=fixed_cap, seed=seed)
-                graph_dict = graph_to_dict(g)
-                num_edges = count_edges(g)
-                actual_density = calculate_density(g.n, num_edges)
-                
-                datasets.append({
-                    'plot_id': 'B1',
-                    'graph_type': 'random',
-                    'n': n,
-                    'actual_n': g.n,
-                    'density': actual_density,
-                    'max_capacity': fixed_cap,
-                    'num_layers': None,
-                    'nodes_per_layer': None,
-                    'grid_k': None,
-                    'graph': graph_dict,
-                    'source': 0,
-                    'sink': n - 1,
-                    'trial': trial
-                })
-    
-    print(f"Generated B1: {len(datasets)} random graphs (vary density, n in {n_values})")
+                seed = dataset_seed('B1', n, density, fixed_cap, trial)
+                yield make_spec('B1', 'random', n, trial, fixed_cap, 'dense_random',
+                                {'n': n, 'density': density, 'cap': fixed_cap, 'seed': seed})
+
+
+def generate_B1_random_vary_density():
+    """B1: Random graphs - runtime vs density (3 fixed n values)"""
+    datasets = [build_dataset(spec) for spec in specs_B1_random_vary_density()]
+    _report_plot('B1', datasets)
     return datasets
 
 
-def generate_B2_bipartite_vary_density():
+def specs_B2_bipartite_vary_density():
     """B2: Bipartite graphs - runtime vs density (3 fixed n values)"""
-    datasets = []
     fixed_cap = 10
     n_values = [100, 200, 400] 
     density_values = [0.2, 0.4, 0.6, 0.8, 1.0]
@@ -311,56 +376,20 @@ def generate_B2_bipartite_vary_density():
     for n in n_values:
         for density in density_values:
             for trial in range(trials_per_config):
-                # For bipartite, we need to control edge density
-                # Generate complete bipartite then subsample
-                seed = 5000 + n + int(density * 100) + trial
-                partition_size = n // 2
-                
-                g = Graph(n + 2)
-                s, t = 0, n + 1
-                
-                for i in range(partition_size):
-                    g.add_edge(s, 1 + i, fixed_cap)
-                
-                import random
-                random.seed(seed)
-                for i in range(partition_size):
-                    for j in range(partition_size):
-                        if random.random() < density:
-                            u = 1 + i
-                            v = 1 + partition_size + j
-                            g.add_edge(u, v, fixed_cap)
-                
-                for j in range(partition_size):
-                    g.add_edge(1 + partition_size + j, t, fixed_cap)
-                
-                graph_dict = graph_to_dict(g)
-                num_edges = count_edges(g)
-                actual_density = calculate_density(g.n, num_edges)
-                
-                datasets.append({
-                    'plot_id': 'B2',
-                    'graph_type': 'bipartite',
-                    'n': n,
-                    'actual_n': g.n,
-                    'density': actual_density,
-                    'max_capacity': fixed_cap,
-                    'num_layers': None,
-                    'nodes_per_layer': None,
-                    'grid_k': None,
-                    'graph': graph_dict,
-                    'source': s,
-                    'sink': t,
-                    'trial': trial
-                })
-    
-    print(f"Generated B2: {len(datasets)} bipartite graphs (vary density, n in {n_values})")
+                seed = dataset_seed('B2', n, density, fixed_cap, trial)
+                yield make_spec('B2', 'bipartite', n, trial, fixed_cap, 'bipartite_density',
+                                {'n': n, 'density': density, 'cap': fixed_cap, 'seed': seed})
+
+
+def generate_B2_bipartite_vary_density():
+    """B2: Bipartite graphs - runtime vs density (3 fixed n values)"""
+    datasets = [build_dataset(spec) for spec in specs_B2_bipartite_vary_density()]
+    _report_plot('B2', datasets)
     return datasets
 
 
-def generate_C1_layered_vary_layers():
+def specs_C1_layered_vary_layers():
     """C1: Layered graphs - runtime vs number of layers (fixed nodes_per_layer)"""
-    datasets = []
     fixed_nodes_per_layer = 20
     fixed_cap = 10
     layer_counts = [3, 5, 8, 12, 15, 20] 
@@ -368,35 +397,22 @@ def generate_C1_layered_vary_layers():
     
     for num_layers in layer_counts:
         for trial in range(trials_per_count):
-            g = layered_graph(n_layers=num_layers, layer_width=fixed_nodes_per_layer, cap=fixed_cap)
-            graph_dict = graph_to_dict(g)
-            num_edges = count_edges(g)
-            actual_density = calculate_density(g.n, num_edges)
-            
-            datasets.append({
-                'plot_id': 'C1',
-                'graph_type': 'layered',
-                'n': g.n - 2,
-                'actual_n': g.n,
-                'density': actual_density,
-                'max_capacity': fixed_cap,
-                'num_layers': num_layers,
-                'nodes_per_layer': fixed_nodes_per_layer,
-                'grid_k': None,
-                'graph': graph_dict,
-                'source': 0,
-                'sink': g.n - 1,
-                'trial': trial
-            })
-    
-    print(f"Generated C1: {len(datasets)} layered graphs (vary num_layers, fixed width={fixed_nodes_per_layer})")
-    return datasets
+            yield make_spec('C1', 'layered', num_layers * fixed_nodes_per_layer, trial, fixed_cap,
+                            'layered',
+                            {'n_layers': num_layers, 'layer_width': fixed_nodes_per_layer,
+                             'cap': fixed_cap},
+                            num_layers=num_layers, nodes_per_layer=fixed_nodes_per_layer)
 
 
+def generate_C1_layered_vary_layers():
+    """C1: Layered graphs - runtime vs number of layers (fixed nodes_per_layer)"""
+    datasets = [build_dataset(spec) for spec in specs_C1_layered_vary_layers()]
+    _report_plot('C1', datasets)
+    return datasets
 
-def generate_D1_layered_vary_width():
+
+def specs_D1_layered_vary_width():
     """D1: Layered graphs - runtime vs nodes per layer (fixed num_layers)"""
-    datasets = []
     fixed_layers = 6
     fixed_cap = 10
     width_values = [10, 20, 40, 60, 80, 100] 
@@ -404,70 +420,39 @@ def generate_D1_layered_vary_width():
     
     for width in width_values:
         for trial in range(trials_per_width):
-            g = layered_graph(n_layers=fixed_layers, layer_width=width, cap=fixed_cap)
-            graph_dict = graph_to_dict(g)
-            num_edges = count_edges(g)
-            actual_density = calculate_density(g.n, num_edges)
-            
-            datasets.append({
-                'plot_id': 'D1',
-                'graph_type': 'layered',
-                'n': g.n - 2,
-                'actual_n': g.n,
-                'density': actual_density,
-                'max_capacity': fixed_cap,
-                'num_layers': fixed_layers,
-                'nodes_per_layer': width,
-                'grid_k': None,
-                'graph': graph_dict,
-                'source': 0,
-                'sink': g.n - 1,
-                'trial': trial
-            })
-    
-    print(f"Generated D1: {len(datasets)} layered graphs (vary nodes_per_layer, fixed layers={fixed_layers})")
-    return datasets
+            yield make_spec('D1', 'layered', fixed_layers * width, trial, fixed_cap, 'layered',
+                            {'n_layers': fixed_layers, 'layer_width': width, 'cap': fixed_cap},
+                            num_layers=fixed_layers, nodes_per_layer=width)
 
 
+def generate_D1_layered_vary_width():
+    """D1: Layered graphs - runtime vs nodes per layer (fixed num_layers)"""
+    datasets = [build_dataset(spec) for spec in specs_D1_layered_vary_width()]
+    _report_plot('D1', datasets)
+    return datasets
 
-def generate_E1_grid_vary_k():
+
+def specs_E1_grid_vary_k():
     """E1: Grid graphs - runtime vs k (grid dimension)"""
-    datasets = []
     fixed_cap = 10
     k_values = [5, 10, 15, 20, 25, 30]
     trials_per_k = 3 
     
     for k in k_values:
         for trial in range(trials_per_k):
-            g, s, t = generate_grid_graph(k, cap=fixed_cap)
-            graph_dict = graph_to_dict(g)
-            num_edges = count_edges(g)
-            actual_density = calculate_density(g.n, num_edges)
-            
-            datasets.append({
-                'plot_id': 'E1',
-                'graph_type': 'grid',
-                'n': k * k,
-                'actual_n': g.n,
-                'density': actual_density,
-                'max_capacity': fixed_cap,
-                'num_layers': None,
-                'nodes_per_layer': None,
-                'grid_k': k,
-                'graph': graph_dict,
-                'source': s,
-                'sink': t,
-                'trial': trial
-            })
-    
-    print(f"Generated E1: {len(datasets)} grid graphs (vary k)")
-    return datasets
+            yield make_spec('E1', 'grid', k * k, trial, fixed_cap, 'grid',
+                            {'k': k, 'cap': fixed_cap}, grid_k=k)
+
 
+def generate_E1_grid_vary_k():
+    """E1: Grid graphs - runtime vs k (grid dimension)"""
+    datasets = [build_dataset(spec) for spec in specs_E1_grid_vary_k()]
+    _report_plot('E1', datasets)
+    return datasets
 
 
-def generate_F1_random_vary_capacity():
+def specs_F1_random_vary_capacity():
     """F1: Random graphs - runtime vs capacity scale"""
-    datasets = []
     fixed_n = 300
     fixed_density = 0.3
     capacity_values = [1, 10, 50, 100, 500, 1000] 
@@ -475,35 +460,20 @@ def generate_F1_random_vary_capacity():
     
     for max_cap in capacity_values:
         for trial in range(trials_per_cap):
-            seed = 6000 + max_cap + trial
-            g = dense_random_graph(fixed_n, density=fixed_density, cap=max_cap, seed=seed)
-            graph_dict = graph_to_dict(g)
-            num_edges = count_edges(g)
-            actual_density = calculate_density(g.n, num_edges)
-            
-            datasets.append({
-                'plot_id': 'F1',
-                'graph_type': 'random',
-                'n': fixed_n,
-                'actual_n': g.n,
-                'density': actual_density,
-                'max_capacity': max_cap,
-                'num_layers': None,
-                'nodes_per_layer': None,
-                'grid_k': None,
-                'graph': graph_dict,
-                'source': 0,
-                'sink': fixed_n - 1,
-                'trial': trial
-            })
-    
-    print(f"Generated F1: {len(datasets)} random graphs (vary max_capacity)")
+            seed = dataset_seed('F1', fixed_n, fixed_density, max_cap, trial)
+            yield make_spec('F1', 'random', fixed_n, trial, max_cap, 'dense_random',
+                            {'n': fixed_n, 'density': fixed_density, 'cap': max_cap, 'seed': seed})
+
+
+def generate_F1_random_vary_capacity():
+    """F1: Random graphs - runtime vs capacity scale"""
+    datasets = [build_dataset(spec) for spec in specs_F1_random_vary_capacity()]
+    _report_plot('F1', datasets)
     return datasets
 
 
-def generate_F2_dense_vary_capacity():
+def specs_F2_dense_vary_capacity():
     """F2: Dense graphs - runtime vs capacity scale"""
-    datasets = []
     fixed_n = 200
     fixed_density = 0.75
     capacity_values = [1, 10, 50, 100, 500] 
@@ -511,35 +481,20 @@ def generate_F2_dense_vary_capacity():
     
     for max_cap in capacity_values:
         for trial in range(trials_per_cap):
-            seed = 7000 + max_cap + trial
-            g = dense_random_graph(fixed_n, density=fixed_density, cap=max_cap, seed=seed)
-            graph_dict = graph_to_dict(g)
-            num_edges = count_edges(g)
-            actual_density = calculate_density(g.n, num_edges)
-            
-            datasets.append({
-                'plot_id': 'F2',
-                'graph_type': 'dense',
-                'n': fixed_n,
-                'actual_n': g.n,
-                'density': actual_density,
-                'max_capacity': max_cap,
-                'num_layers': None,
-                'nodes_per_layer': None,
-                'grid_k': None,
-                'graph': graph_dict,
-                'source': 0,
-                'sink': fixed_n - 1,
-                'trial': trial
-            })
-    
-    print(f"Generated F2: {len(datasets)} dense graphs (vary max_capacity)")
+            seed = dataset_seed('F2', fixed_n, fixed_density, max_cap, trial)
+            yield make_spec('F2', 'dense', fixed_n, trial, max_cap, 'dense_random',
+                            {'n': fixed_n, 'density': fixed_density, 'cap': max_cap, 'seed': seed})
+
+
+def generate_F2_dense_vary_capacity():
+    """F2: Dense graphs - runtime vs capacity scale"""
+    datasets = [build_dataset(spec) for spec in specs_F2_dense_vary_capacity()]
+    _report_plot('F2', datasets)
     return datasets
 
 
-def generate_F3_sparse_vary_capacity():
+def specs_F3_sparse_vary_capacity():
     """F3: Sparse graphs - runtime vs capacity scale"""
-    datasets = []
     fixed_n = 400
     fixed_m = 1200 
     capacity_values = [1, 10, 50, 100, 500, 1000] 
@@ -547,81 +502,108 @@ def generate_F3_sparse_vary_capacity():
     
     for max_cap in capacity_values:
         for trial in range(trials_per_cap):
-            seed = 8000 + max_cap + trial
-            g = sparse_random_graph(fixed_n, fixed_m, cap=max_cap, seed=seed)
-            graph_dict = graph_to_dict(g)
-            num_edges = count_edges(g)
-            actual_density = calculate_density(g.n, num_edges)
-            
-            datasets.append({
-                'plot_id': 'F3',
-                'graph_type': 'sparse',
-                'n': fixed_n,
-                'actual_n': g.n,
-                'density': actual_density,
-                'max_capacity': max_cap,
-                'num_layers': None,
-                'nodes_per_layer': None,
-                'grid_k': None,
-                'graph': graph_dict,
-                'source': 0,
-                'sink': fixed_n - 1,
-                'trial': trial
-            })
-    
-    print(f"Generated F3: {len(datasets)} sparse graphs (vary max_capacity)")
+            seed = dataset_seed('F3', fixed_n, None, max_cap, trial)
+            yield make_spec('F3', 'sparse', fixed_n, trial, max_cap, 'sparse_random',
+                            {'n': fixed_n, 'm': fixed_m, 'cap': max_cap, 'seed': seed})
+
+
+def generate_F3_sparse_vary_capacity():
+    """F3: Sparse graphs - runtime vs capacity scale"""
+    datasets = [build_dataset(spec) for spec in specs_F3_sparse_vary_capacity()]
+    _report_plot('F3', datasets)
     return datasets
 
 
-def generate_all_datasets():
-    """Generate all datasets for all 14 plots."""
+SPEC_FUNCTIONS = [
+    specs_A1_random_vary_n,
+    specs_A2_dense_vary_n,
+    specs_A3_sparse_vary_n,
+    specs_A4_grid_vary_n,
+    specs_A5_layered_vary_n,
+    specs_A6_bipartite_vary_n,
+    specs_B1_random_vary_density,
+    specs_B2_bipartite_vary_density,
+    specs_C1_layered_vary_layers,
+    specs_D1_layered_vary_width,
+    specs_E1_grid_vary_k,
+    specs_F1_random_vary_capacity,
+    specs_F2_dense_vary_capacity,
+    specs_F3_sparse_vary_capacity,
+]
+
+
+def iter_all_specs():
+    """Lazily yield the spec of every dataset, in generate_all_datasets order."""
+    for specs in SPEC_FUNCTIONS:
+        yield from specs()
+
+
+def build_datasets(specs, workers=1, cache=None):
+    """
+    Yield the dataset record of every spec in order, graphs as CSR arrays
+    (see dataset_record). Graphs found in cache (a GraphCache) are loaded,
+    the others are built, on a pool of worker processes if workers > 1,
+    and added to it. Every spec carries its own seed, so the datasets are
+    the same for any number of workers and any cache contents.
+    """
+    specs = list(specs)
+    keys = [cache_key(GRAPH_BUILDERS[spec['builder']], spec['params']) if cache else None
+            for spec in specs]
+    cached = [cache.load(key) if cache else None for key in keys]
+    missing = [spec for spec, entry in zip(specs, cached) if entry is None]
+
+    pool = None
+    if workers > 1 and len(missing) > 1:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        built = pool.map(build_adjacency, missing)
+    else:
+        built = map(build_adjacency, missing)
+    try:
+        for spec, key, entry in zip(specs, keys, cached):
+            if entry is None:
+                entry = next(built)
+                if cache is not None:
+                    cache.store(key, *entry)
+            yield dataset_record(spec, *entry)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def generate_all_datasets(workers=1, use_cache=True):
+    """
+    Generate all datasets for all 14 plots. Graphs are reused from the
+    graph cache (see graph_cache.py) unless use_cache is False. Returns
+    the dataset records, graphs as CSR arrays under 'adjacency'.
+    """
     
     print("="*70)
     print("GENERATING ALL DATASETS FOR 14 PLOT CATEGORIES")
     print("="*70)
+    if workers > 1:
+        print(f"Building on {workers} worker processes")
     
     all_datasets = []
-    
-    # Group A: Fix density, vary n
-    print("\n--- GROUP A: FIX DENSITY, VARY n ---")
-    all_datasets.extend(generate_A1_random_vary_n())
-    all_datasets.extend(generate_A2_dense_vary_n())
-    all_datasets.extend(generate_A3_sparse_vary_n())
-    all_datasets.extend(generate_A4_grid_vary_n())
-    all_datasets.extend(generate_A5_layered_vary_n())
-    all_datasets.extend(generate_A6_bipartite_vary_n())
-    
-    # Group B: Fix n, vary density
-    print("\n--- GROUP B: FIX n, VARY DENSITY ---")
-    all_datasets.extend(generate_B1_random_vary_density())
-    all_datasets.extend(generate_B2_bipartite_vary_density())
-    
-    # Group C: Fix nodes-per-layer, vary #layers
-    print("\n--- GROUP C: FIX NODES-PER-LAYER, VARY #LAYERS ---")
-    all_datasets.extend(generate_C1_layered_vary_layers())
-    
-    # Group D: Fix #layers, vary nodes-per-layer
-    print("\n--- GROUP D: FIX #LAYERS, VARY NODES-PER-LAYER ---")
-    all_datasets.extend(generate_D1_layered_vary_width())
-    
-    # Group E: Vary grid dimension k
-    print("\n--- GROUP E: VARY GRID DIMENSION k ---")
-    all_datasets.extend(generate_E1_grid_vary_k())
-    
-    # Group F: Fix n & density, vary max capacity
-    print("\n--- GROUP F: FIX n & DENSITY, VARY MAX CAPACITY ---")
-    all_datasets.extend(generate_F1_random_vary_capacity())
-    all_datasets.extend(generate_F2_dense_vary_capacity())
-    all_datasets.extend(generate_F3_sparse_vary_capacity())
-    
-    # Save to pickle file
-    output_file = 'j_datasets.pkl'
-    with open(output_file, 'wb') as f:
-        pickle.dump(all_datasets, f)
+    group = None
+    cache = GraphCache() if use_cache else None
+    built = build_datasets(iter_all_specs(), workers, cache)
+    for plot_id, datasets in groupby(built, key=lambda ds: ds['plot_id']):
+        if plot_id[0] != group:
+            group = plot_id[0]
+            print(f"\n--- {GROUP_HEADERS[group]} ---")
+        datasets = list(datasets)
+        _report_plot(plot_id, datasets)
+        all_datasets.extend(datasets)
+    
+    # Save to the indexed archive (see dataset_archive.py)
+    output_file = DATASET_ARCHIVE
+    write_archive(output_file, all_datasets)
     
     print("\n" + "="*70)
     print(f"DATASET GENERATION COMPLETE!")
     print(f"Total datasets generated: {len(all_datasets)}")
+    if cache is not None:
+        print(f"Graph cache: {cache.hits} loaded, {cache.misses} generated ({cache.path}/)")
     print(f"Saved to: {output_file}")
     print("="*70)
     
@@ -638,5 +620,16 @@ def generate_all_datasets():
     return all_datasets
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate the benchmark datasets for all 14 plots")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="worker processes building datasets; 0 = all CPUs (default: 1)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="regenerate every graph instead of reusing the graph cache")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    generate_all_datasets()
+    args = parse_args()
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    generate_all_datasets(workers=workers, use_cache=not args.no_cache)
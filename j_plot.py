@@ -10,6 +10,7 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import os
 import numpy as np
+from bench_stats import grouped_bootstrap_ci
 
 
 # Plot metadata and axis labels
@@ -115,6 +116,65 @@ PLOT_METADATA = {
 }
 
 
+# Memory columns written by j_run, with their axis labels
+MEMORY_METRICS = {
+    'peak_alloc_mb': 'Peak Allocated (MB, tracemalloc)',
+    'peak_rss_mb': 'Peak RSS Growth (MB)',
+}
+
+# Phase columns written by j_run, in the order they run, with legend labels;
+# whatever runtime_ms is left over is drawn on top as 'other'
+PHASE_METRICS = {
+    'build_ms': 'Graph build',
+    'residual_ms': 'Residual build',
+    'solve_ms': 'Max-flow core',
+    'cut_ms': 'Cut extraction',
+    'verify_ms': 'MFMC verification',
+}
+
+
+def valid_rows(df):
+    """Drop failed runs: negative runtimes and, when recorded, non-ok status."""
+    df = df[df['runtime_ms'] >= 0]
+    if 'status' in df.columns:
+        df = df[df['status'].fillna('ok') == 'ok']
+    return df
+
+
+def _row_samples(row):
+    """Timed runs behind one CSV row: its --repeats samples, else its runtime."""
+    samples = row.get('runtime_samples_ms')
+    if isinstance(samples, str) and samples:
+        return [float(ms) for ms in samples.split()]
+    return [row['runtime_ms']]
+
+
+def runtime_bands(df, x_var, samples=_row_samples):
+    """
+    Median runtime per x value with a 95% bootstrap confidence interval,
+    as columns x_var, median, low, high. Every sample of every row counts
+    for the median; the interval resamples rows (trials) and then their
+    samples, so it covers both graph-to-graph and run-to-run variation.
+    samples maps a row to its values (default: its timed runs).
+    """
+    bands = []
+    for x, df_x in df.groupby(x_var):
+        groups = [samples(row) for _, row in df_x.iterrows()]
+        low, high = grouped_bootstrap_ci(groups)
+        bands.append({x_var: x, 'median': np.median(np.concatenate(groups)),
+                      'low': low, 'high': high})
+    return pd.DataFrame(bands)
+
+
+def plot_runtime(ax, df_algo, x_var, label, band=True, samples=_row_samples, **style):
+    """Median runtime line of one algorithm, with its CI as a shaded band."""
+    bands = runtime_bands(df_algo, x_var, samples)
+    line, = ax.plot(bands[x_var], bands['median'], label=label, marker='o', **style)
+    if band:
+        ax.fill_between(bands[x_var], bands['low'], bands['high'],
+                        color=line.get_color(), alpha=0.2, linewidth=0)
+
+
 def create_output_directories():
     """Create directory structure for storing plots."""
     base_dir = 'plots'
@@ -139,7 +199,7 @@ def plot_individual(plot_id, csv_file, output_dir):
     
     df = pd.read_csv(csv_file)
     
-    df = df[df['runtime_ms'] >= 0]
+    df = valid_rows(df)
     
     if df.empty:
         print(f"WARNING: No valid data for {plot_id}")
@@ -160,11 +220,7 @@ def plot_individual(plot_id, csv_file, output_dir):
             
             for algo in df_n['algorithm'].unique():
                 df_algo = df_n[df_n['algorithm'] == algo]
-                grouped = df_algo.groupby(x_var)['runtime_ms'].agg(['mean', 'std']).reset_index()
-                
-                axes[idx].errorbar(grouped[x_var], grouped['mean'], 
-                                  yerr=grouped['std'], 
-                                  label=algo, marker='o', capsize=5, linewidth=2, markersize=6)
+                plot_runtime(axes[idx], df_algo, x_var, algo, linewidth=2, markersize=6)
             
             axes[idx].set_xlabel(metadata['xlabel'], fontsize=12, fontweight='bold')
             axes[idx].set_ylabel(metadata['ylabel'], fontsize=12, fontweight='bold')
@@ -180,11 +236,7 @@ def plot_individual(plot_id, csv_file, output_dir):
         
         for algo in df['algorithm'].unique():
             df_algo = df[df['algorithm'] == algo]
-            grouped = df_algo.groupby(x_var)['runtime_ms'].agg(['mean', 'std']).reset_index()
-            
-            plt.errorbar(grouped[x_var], grouped['mean'], 
-                        yerr=grouped['std'], 
-                        label=algo, marker='o', capsize=5, linewidth=2, markersize=8)
+            plot_runtime(plt.gca(), df_algo, x_var, algo, linewidth=2, markersize=8)
         
         plt.xlabel(metadata['xlabel'], fontsize=14, fontweight='bold')
         plt.ylabel(metadata['ylabel'], fontsize=14, fontweight='bold')
@@ -206,6 +258,113 @@ def plot_individual(plot_id, csv_file, output_dir):
     print(f"✓ Generated: {filename}")
 
 
+def plot_memory(plot_id, csv_file, output_dir):
+    """
+    Memory counterpart of plot_individual, saved next to it as
+    <plot_id>_memory.png: one panel per memory column the CSV has data for.
+    B1/B2 mix several n, so only their largest n is drawn.
+    """
+    if not os.path.exists(csv_file):
+        return
+    
+    df = valid_rows(pd.read_csv(csv_file))
+    metrics = [m for m in MEMORY_METRICS if m in df.columns and df[m].notna().any()]
+    if not metrics:
+        print(f"WARNING: No memory data for {plot_id}, skipping memory plot")
+        return
+    
+    metadata = PLOT_METADATA[plot_id]
+    x_var = metadata['x_var']
+    title = metadata['title'].replace('Runtime', 'Memory')
+    if plot_id in ['B1', 'B2']:
+        n_max = df['n'].max()
+        df = df[df['n'] == n_max]
+        title += f' (n = {n_max})'
+    
+    fig, axes = plt.subplots(1, len(metrics), figsize=(7*len(metrics), 5), squeeze=False)
+    for ax, metric in zip(axes[0], metrics):
+        for algo in df['algorithm'].unique():
+            df_algo = df[(df['algorithm'] == algo) & df[metric].notna()]
+            if df_algo.empty:
+                continue
+            # Same median and bootstrap CI as the runtime plots, one value per trial
+            plot_runtime(ax, df_algo, x_var, algo, samples=lambda row: [row[metric]],
+                         linewidth=2, markersize=6)
+        
+        ax.set_xlabel(metadata['xlabel'], fontsize=12, fontweight='bold')
+        ax.set_ylabel(MEMORY_METRICS[metric], fontsize=12, fontweight='bold')
+        ax.legend(fontsize=10)
+        ax.grid(True, alpha=0.3)
+        
+        if plot_id in ['F1', 'F2', 'F3']:
+            ax.set_xscale('log')
+    
+    fig.suptitle(title, fontsize=16, fontweight='bold', y=1.02)
+    plt.tight_layout()
+    
+    group = metadata['group']
+    filename = os.path.join(output_dir, f'Group_{group}', f'{plot_id}_memory.png')
+    plt.savefig(filename, dpi=300, bbox_inches='tight')
+    plt.close()
+    
+    print(f"✓ Generated: {filename}")
+
+
+def plot_phases(plot_id, csv_file, output_dir):
+    """
+    Where the time goes, saved next to plot_individual as
+    <plot_id>_phases.png: stacked bars of each algorithm's median phase
+    times at the smallest and largest x value. B1/B2 mix several n, so
+    only their largest n is drawn.
+    """
+    if not os.path.exists(csv_file):
+        return
+    
+    df = valid_rows(pd.read_csv(csv_file))
+    phases = [p for p in PHASE_METRICS if p in df.columns]
+    df = df.dropna(subset=phases)
+    if not phases or df.empty:
+        print(f"WARNING: No phase timings for {plot_id}, skipping phase plot")
+        return
+    
+    metadata = PLOT_METADATA[plot_id]
+    x_var = metadata['x_var']
+    title = metadata['title'].replace('Runtime', 'Runtime by Phase')
+    if plot_id in ['B1', 'B2']:
+        n_max = df['n'].max()
+        df = df[df['n'] == n_max]
+        title += f' (n = {n_max})'
+    xs = sorted(df[x_var].unique())
+    xs = [xs[0], xs[-1]] if len(xs) > 1 else xs
+    
+    fig, axes = plt.subplots(1, len(xs), figsize=(7*len(xs), 5), squeeze=False)
+    colors = sns.color_palette('tab10', len(phases) + 1)
+    for ax, x in zip(axes[0], xs):
+        medians = df[df[x_var] == x].groupby('algorithm')[phases + ['runtime_ms']].median()
+        medians['other'] = (medians['runtime_ms'] - medians[phases].sum(axis=1)).clip(lower=0)
+        bottom = np.zeros(len(medians))
+        for color, phase in zip(colors, phases + ['other']):
+            ax.bar(medians.index, medians[phase], bottom=bottom, color=color,
+                   label=PHASE_METRICS.get(phase, 'Other'))
+            bottom += medians[phase].to_numpy()
+        
+        ax.set_title(f"{metadata['xlabel']} = {x:g}", fontsize=12)
+        ax.set_ylabel('Median Runtime (ms)', fontsize=12, fontweight='bold')
+        ax.tick_params(axis='x', rotation=30)
+        ax.grid(True, axis='y', alpha=0.3)
+    axes[0][-1].legend(fontsize=10)
+    
+    fig.suptitle(title, fontsize=16, fontweight='bold', y=1.02)
+    plt.tight_layout()
+    
+    group = metadata['group']
+    filename = os.path.join(output_dir, f'Group_{group}', f'{plot_id}_phases.png')
+    plt.savefig(filename, dpi=300, bbox_inches='tight')
+    plt.close()
+    
+    print(f"✓ Generated: {filename}")
+
+
 def plot_group_summary(group, plot_ids, base_dir):
     """Generate summary plot for a group of related plots."""
     
@@ -235,7 +394,7 @@ def plot_group_summary(group, plot_ids, base_dir):
             continue
         
         df = pd.read_csv(csv_file)
-        df = df[df['runtime_ms'] >= 0]
+        df = valid_rows(df)
         
         if df.empty:
             axes[idx].text(0.5, 0.5, f'{plot_id}\nNo Valid Data', 
@@ -248,10 +407,7 @@ def plot_group_summary(group, plot_ids, base_dir):
         
         for algo in df['algorithm'].unique():
             df_algo = df[df['algorithm'] == algo]
-            grouped = df_algo.groupby(x_var)['runtime_ms'].agg(['mean', 'std']).reset_index()
-            
-            axes[idx].plot(grouped[x_var], grouped['mean'], 
-                          label=algo, marker='o', linewidth=1.5, markersize=5)
+            plot_runtime(axes[idx], df_algo, x_var, algo, linewidth=1.5, markersize=5)
         
         axes[idx].set_xlabel(metadata['xlabel'], fontsize=10)
         axes[idx].set_ylabel(metadata['ylabel'], fontsize=10)
@@ -299,19 +455,19 @@ def plot_overall_heatmap(base_dir):
             continue
         
         df = pd.read_csv(csv_file)
-        df = df[df['runtime_ms'] >= 0]
+        df = valid_rows(df)
         
         if df.empty:
             continue
         
-        # Calculate average runtime per algorithm
-        avg_runtimes = df.groupby('algorithm')['runtime_ms'].mean()
+        # Median runtime per algorithm; one slow outlier should not color a cell
+        median_runtimes = df.groupby('algorithm')['runtime_ms'].median()
         
-        for algo, runtime in avg_runtimes.items():
+        for algo, runtime in median_runtimes.items():
             results.append({
                 'Plot': plot_id,
                 'Algorithm': algo,
-                'Avg Runtime (ms)': runtime
+                'Median Runtime (ms)': runtime
             })
     
     if not results:
@@ -319,11 +475,11 @@ def plot_overall_heatmap(base_dir):
         return
     
     df_heatmap = pd.DataFrame(results)
-    pivot = df_heatmap.pivot(index='Plot', columns='Algorithm', values='Avg Runtime (ms)')
+    pivot = df_heatmap.pivot(index='Plot', columns='Algorithm', values='Median Runtime (ms)')
     
     plt.figure(figsize=(10, 12))
     sns.heatmap(pivot, annot=True, fmt='.1f', cmap='YlOrRd', 
-                cbar_kws={'label': 'Average Runtime (ms)'})
+                cbar_kws={'label': 'Median Runtime (ms)'})
     plt.xlabel('Algorithm', fontsize=14, fontweight='bold')
     plt.ylabel('Plot Category', fontsize=14, fontweight='bold')
     plt.title('Overall Performance Heatmap - All Plot Categories', 
@@ -353,6 +509,8 @@ def generate_all_plots():
     for plot_id in PLOT_METADATA.keys():
         csv_file = f'benchmark_results/{plot_id}_results.csv'
         plot_individual(plot_id, csv_file, base_dir)
+        plot_memory(plot_id, csv_file, base_dir)
+        plot_phases(plot_id, csv_file, base_dir)
     
     print("\nGenerating group summary plots...")
     groups = {
@@ -383,6 +541,7 @@ def generate_all_plots():
     print(f"    ├── Group_D/  (1 plot: D1)")
     print(f"    ├── Group_E/  (1 plot: E1)")
     print(f"    ├── Group_F/  (3 plots: F1-F3)")
+    print(f"    │   (each with <id>_memory.png when the CSVs have memory columns)")
     print(f"    └── Summaries/")
     print(f"          ├── Group_A_Summary.png")
     print(f"          ├── Group_B_Summary.png")
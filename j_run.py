@@ -1,78 +1,552 @@
+import argparse
+import json
+import multiprocessing
 import pickle
 import csv
 import time
 import os
-from graphy import Graph
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+try:
+    import resource
+except ImportError:
+    resource = None
+import threading
+from collections import deque
+from itertools import groupby
+from graphy import CSRGraph, ENGINE_PHASES, OP_COUNTERS, lap
 from ford_fulkerson import ford_fulkerson
-from dinic import Dinic
-from push_relabel import push_relabel, push_relabel_min_cut
+from dinic import dinic
+from push_relabel import push_relabel_min_cut
+from boykov_kolmogorov import boykov_kolmogorov
+from hopcroft_karp import hopcroft_karp
+from algo_select import auto_max_flow
+from bench_stats import bootstrap_ci, converged, quartiles
+from j_dtgen import DATASET_ARCHIVE, build_dataset, iter_all_specs
+from dataset_archive import INDEX_FILE, DatasetArchive
 
 
-def dict_to_graph(graph_dict):
-    n = len(graph_dict)
-    g = Graph(n)
-    for u in graph_dict:
-        for v, cap in graph_dict[u].items():
-            g.add_edge(u, v, cap)
-    return g
+DEFAULT_ALGORITHMS = ['Ford-Fulkerson', 'Dinic', 'Push-Relabel', 'Boykov-Kolmogorov']
+ALL_ALGORITHMS = ['Ford-Fulkerson', 'Edmonds-Karp', 'Fattest-Path', 'Capacity-Scaling',
+                  'Dinic', 'Push-Relabel', 'Boykov-Kolmogorov', 'Hopcroft-Karp', 'Auto']
+MB = 1024 * 1024
+# Harness mode (--repeats): fewest timed runs before early stopping, and the
+# relative half-width of the median's confidence interval that stops it
+MIN_REPEATS = 5
+TARGET_CI = 0.05
 
 
-def dict_to_dinic(graph_dict):
+def dict_to_csr(graph_dict):
     n = len(graph_dict)
-    d = Dinic(n)
+    sources, targets, capacities = [], [], []
     for u in graph_dict:
         for v, cap in graph_dict[u].items():
-            d.add_edge(u, v, cap)
-    return d
+            sources.append(u)
+            targets.append(v)
+            capacities.append(cap)
+    return CSRGraph.from_edges(n, sources, targets, capacities)
 
 
-def run_algorithm(algo_name, graph_dict, source, sink):
-    start_time = time.perf_counter()
-    
+def _solve(algo_name, graph_dict, source, sink, stats=None, timings=None):
+    """
+    Convert graph_dict and run one engine on it; returns (max_flow,
+    min_cut_edges). timings, if a dict, receives build_ms for the
+    conversion and the engine's graphy.ENGINE_PHASES times.
+    """
+    if algo_name not in ALL_ALGORITHMS:
+        raise ValueError(f"Unknown algorithm: {algo_name}")
+    start = time.perf_counter()
+    g = dict_to_csr(graph_dict)
+    lap(timings, 'build_ms', start)
+    if algo_name == "Ford-Fulkerson":
+        return ford_fulkerson(g, source, sink, stats=stats, timings=timings)
+    elif algo_name == "Edmonds-Karp":
+        return ford_fulkerson(g, source, sink, strategy='bfs', stats=stats, timings=timings)
+    elif algo_name == "Fattest-Path":
+        return ford_fulkerson(g, source, sink, strategy='fattest', stats=stats, timings=timings)
+    elif algo_name == "Capacity-Scaling":
+        return ford_fulkerson(g, source, sink, strategy='scaling', stats=stats, timings=timings)
+    elif algo_name == "Dinic":
+        # Iterative flat-array engine; same (flow, cut) as Dinic.max_flow_min_cut
+        return dinic(g, source, sink, stats=stats, timings=timings)
+    elif algo_name == "Push-Relabel":
+        # Use wrapper returning both flow and cut
+        return push_relabel_min_cut(g, source, sink, stats=stats, timings=timings)
+    elif algo_name == "Boykov-Kolmogorov":
+        return boykov_kolmogorov(g, source, sink, stats=stats, timings=timings)
+    elif algo_name == "Hopcroft-Karp":
+        # Matching networks only (A6, B2); an error row elsewhere
+        return hopcroft_karp(g, source, sink, stats=stats, timings=timings)
+    # Auto: engine picked from graph features by the model in algo_select.py
+    return auto_max_flow(g, source, sink, stats=stats, timings=timings)
+
+
+def run_algorithm(algo_name, graph_dict, source, sink, count_ops=False, trace_memory=False):
+    """
+    Time one engine on one graph. Returns (runtime_ms, max_flow,
+    min_cut_capacity, min_cut_edges, error, extra), extra holding the
+    EXTRA_FIELDNAMES columns measured for this run:
+    - peak_rss_mb: growth of the process's peak RSS over its RSS when the
+      run started, so the already loaded dataset is not counted (Linux)
+    - peak_alloc_mb: peak memory allocated while converting, solving and
+      extracting the cut, by tracemalloc, with trace_memory. Tracing slows
+      allocation-heavy code, so it is measured on a second, untimed run.
+    - the engine's operation counters (graphy.OP_COUNTERS), with count_ops
+    - PHASE_FIELDNAMES: where runtime_ms went, from building the CSR graph
+      to verify_ms, summing the cut's capacity to check it against the flow
+    """
+    stats = {} if count_ops else None
+    extra = {}
     try:
-        if algo_name == "Ford-Fulkerson":
-            g = dict_to_graph(graph_dict)
-            max_flow_value, cut_edges = ford_fulkerson(g, source, sink)
-            cut_cap = sum(g.adj[u][v] for (u, v) in cut_edges)
-        elif algo_name == "Dinic":
-            # Use max_flow_min_cut to also extract cut
-            d = dict_to_dinic(graph_dict)
-            # Build original graph for accurate capacities
-            g = dict_to_graph(graph_dict)
-            max_flow_value, cut_edges = d.max_flow_min_cut(source, sink, original_graph=g)
-            cut_cap = sum(g.adj[u][v] for (u, v) in cut_edges)
-        elif algo_name == "Push-Relabel":
-            g = dict_to_graph(graph_dict)
-            # Use wrapper returning both flow and cut
-            max_flow_value, cut_edges = push_relabel_min_cut(g, source, sink)
-            cut_cap = sum(g.adj[u][v] for (u, v) in cut_edges)
-        else:
-            raise ValueError(f"Unknown algorithm: {algo_name}")
+        rss_before = _reset_peak_rss()
+        start_time = time.perf_counter()
+        max_flow_value, cut_edges = _solve(algo_name, graph_dict, source, sink, stats, extra)
+        verify_start = time.perf_counter()
+        cut_cap = sum(graph_dict[u][v] for (u, v) in cut_edges)
+        lap(extra, 'verify_ms', verify_start)
         
         end_time = time.perf_counter()
         runtime_ms = (end_time - start_time) * 1000 
         
-        return runtime_ms, max_flow_value, cut_cap, cut_edges, None
+        peak_rss = _peak_rss_bytes()
+        if rss_before is not None and peak_rss is not None:
+            extra['peak_rss_mb'] = max(peak_rss - rss_before, 0) / MB
+        if trace_memory:
+            extra['peak_alloc_mb'] = _traced_peak_bytes(algo_name, graph_dict, source, sink) / MB
+        extra.update(stats or {})
+        return runtime_ms, max_flow_value, cut_cap, cut_edges, None, extra
     
+    except MemoryError as e:
+        return -1, -1, -1, [], f"MemoryError: {e}" if str(e) else 'MemoryError', {}
     except Exception as e:
-        return -1, -1, -1, [], str(e)
+        return -1, -1, -1, [], str(e) or type(e).__name__, {}
 
 
-def run_all_benchmarks():    
-    datasets_file = 'j_datasets.pkl'
-    print(f"Loading datasets from {datasets_file}...")
-    
+def run_repeated(algo_name, graph_dict, source, sink, warmup=0, repeats=1,
+                 min_repeats=MIN_REPEATS, target_ci=TARGET_CI, **options):
+    """
+    Harness mode of run_algorithm: warmup untimed runs, then up to repeats
+    timed ones, stopping early once min_repeats are in and the bootstrap
+    confidence interval of the median runtime is within target_ci of it
+    (relative half-width). Returns run_algorithm's 6-tuple with the median
+    as runtime_ms; extra gains repeats, runtime_iqr_ms, runtime_ci_low_ms,
+    runtime_ci_high_ms and runtime_samples_ms (space separated), and its
+    phase times are their medians over the timed runs. Memory and counters
+    come from the first timed run. With one run and no warmup this is
+    run_algorithm itself.
+    """
+    if repeats <= 1 and warmup <= 0:
+        return run_algorithm(algo_name, graph_dict, source, sink, **options)
+    for _ in range(warmup):
+        result = run_algorithm(algo_name, graph_dict, source, sink)
+        if result[4]:
+            return result
+    result = run_algorithm(algo_name, graph_dict, source, sink, **options)
+    if result[4]:
+        return result
+    # Later runs count operations too, so every sample pays the same overhead
+    timed = dict(options, trace_memory=False)
+    samples = [result[0]]
+    phases = [result[5]]
+    while len(samples) < repeats:
+        if len(samples) >= min_repeats and converged(samples, target_ci):
+            break
+        rerun = run_algorithm(algo_name, graph_dict, source, sink, **timed)
+        if rerun[4]:
+            return rerun
+        samples.append(rerun[0])
+        phases.append(rerun[5])
+
+    q1, median, q3 = quartiles(samples)
+    low, high = bootstrap_ci(samples)
+    extra = dict(result[5], repeats=len(samples), runtime_iqr_ms=q3 - q1,
+                 runtime_ci_low_ms=low, runtime_ci_high_ms=high,
+                 runtime_samples_ms=' '.join(f'{ms:.4f}' for ms in samples))
+    for name in PHASE_FIELDNAMES:
+        if name in extra:
+            extra[name] = quartiles([run.get(name, 0.0) for run in phases])[1]
+    return (median,) + result[1:5] + (extra,)
+
+
+# Tiny graphs for warm_up: a matching network, so Hopcroft-Karp and Auto's
+# fast path run too, and the same chain with a direct s -> t edge, which
+# sends Auto through the model
+WARM_UP_GRAPHS = (
+    {0: {1: 1}, 1: {2: 1}, 2: {3: 1}, 3: {}},
+    {0: {1: 2, 3: 1}, 1: {2: 1}, 2: {3: 2}, 3: {}},
+)
+
+
+_warm = set()
+
+
+def warm_up(algorithms):
+    """
+    Run each algorithm not yet warm in this process untimed on
+    WARM_UP_GRAPHS, so one-off costs are paid before anything is measured:
+    numpy imports some submodules on first use (numpy.ma on the first
+    np.unique), and Auto loads its model. Forked workers and isolated
+    children inherit a warm process.
+    """
+    for algo in algorithms:
+        if algo not in _warm:
+            for graph in WARM_UP_GRAPHS:
+                run_algorithm(algo, graph, 0, 3)
+            _warm.add(algo)
+
+
+def _reset_peak_rss():
+    """
+    Reset this process's peak RSS (VmHWM) to its current RSS and return
+    that RSS in bytes, or None where Linux's clear_refs is unavailable.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        return None
+    return _rss_bytes(os.getpid())
+
+
+def _peak_rss_bytes():
+    """Peak RSS (VmHWM) of this process since the last reset, or None."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _traced_peak_bytes(algo_name, graph_dict, source, sink):
+    """Peak bytes tracemalloc sees allocated during one more run of the engine."""
+    tracemalloc.start()
+    try:
+        _, cut_edges = _solve(algo_name, graph_dict, source, sink)
+        sum(graph_dict[u][v] for (u, v) in cut_edges)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _rss_bytes(pid):
+    """Resident set size of pid from /proc, or None where unavailable."""
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _limit_address_space(max_bytes):
+    """
+    Cap this process's address space at its current size plus max_bytes,
+    so only memory the run itself allocates counts (the dataset inherited
+    from the parent does not). Allocations past the cap raise MemoryError.
+    """
+    if resource is None:
+        return
     try:
-        with open(datasets_file, 'rb') as f:
-            all_datasets = pickle.load(f)
-    except FileNotFoundError:
-        print(f"ERROR: {datasets_file} not found!")
-        print("Please run j_dtgen.py first.")
+        with open('/proc/self/statm') as f:
+            size = int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
         return
+    limit = size + int(max_bytes)
+    hard = resource.getrlimit(resource.RLIMIT_AS)[1]
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _isolated_child(conn, algo_name, graph_dict, source, sink, cpu, max_bytes, **options):
+    if cpu is not None and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {cpu})
+    # A no-op when forked from the warm parent
+    warm_up([algo_name])
+    # Take the copy-on-write faults on the inherited dataset (every refcount
+    # the conversion touches) now rather than inside the timed build_ms
+    dict_to_csr(graph_dict)
+    if max_bytes is not None:
+        _limit_address_space(max_bytes)
+    try:
+        result = run_repeated(algo_name, graph_dict, source, sink, **options)
+    except MemoryError:
+        result = (-1, -1, -1, [], 'MemoryError', {})
+    conn.send(result)
+    conn.close()
+
+
+def run_isolated(algo_name, graph_dict, source, sink, timeout=None, max_rss_mb=None, cpu=None,
+                 **options):
+    """
+    Run run_repeated in a child process under a wall-clock timeout and a
+    memory cap; options are passed on to run_repeated, and the timeout covers
+    all of its runs. The cap, max_rss_mb, limits the memory the run allocates
+    beyond what the child starts with (an RLIMIT_AS on its address space,
+    Linux only): an allocation past it fails, and the run is reported as
+    'oom'. Returns run_algorithm's 6-tuple plus a status: 'ok', 'error',
+    'timeout', 'oom' or 'crashed'. Killed runs report the elapsed
+    wall-clock time as runtime_ms. The child starts warm (see warm_up) and
+    touches the dataset once before timing, so isolation does not change
+    what is measured.
+    """
+    max_bytes = max_rss_mb * MB if max_rss_mb else None
+    warm_up([algo_name])
+    recv, send = multiprocessing.Pipe(duplex=False)
+    proc = multiprocessing.Process(target=_isolated_child,
+                                   args=(send, algo_name, graph_dict, source, sink, cpu,
+                                         max_bytes),
+                                   kwargs=options)
+    start_time = time.perf_counter()
+    proc.start()
+    send.close()
+
+    status = None
+    result = None
+    while True:
+        if recv.poll(0.02):
+            try:
+                result = recv.recv()
+            except EOFError:
+                status = 'crashed'
+            break
+        elapsed = time.perf_counter() - start_time
+        if timeout is not None and elapsed > timeout:
+            status = 'timeout'
+            break
+        if not proc.is_alive() and not recv.poll():
+            status = 'crashed'
+            break
+
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    if proc.is_alive():
+        proc.kill()
+    proc.join()
+    recv.close()
+
+    if result is not None:
+        error = result[4]
+        if error is None:
+            return result + ('ok',)
+        if error.startswith('MemoryError'):
+            return (elapsed_ms,) + result[1:4] + (
+                f"memory limit of {max_rss_mb} MB exceeded ({error})", result[5], 'oom')
+        return result + ('error',)
+    messages = {
+        'timeout': f"timeout after {timeout}s",
+        'crashed': f"worker exited with code {proc.exitcode}",
+    }
+    return elapsed_ms, -1, -1, [], messages[status], {}, status
+
+
+def _pin_worker(slot_counter, cpus):
+    """Pool initializer: bind each worker process to its own CPU."""
+    with slot_counter.get_lock():
+        slot = slot_counter.value
+        slot_counter.value += 1
+    if cpus and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {cpus[slot % len(cpus)]})
+
+
+_thread_slot = threading.local()
+
+
+def _assign_cpu(slot_counter, cpus):
+    """Thread pool initializer: each thread launches its isolated runs on one CPU."""
+    with slot_counter.get_lock():
+        slot = slot_counter.value
+        slot_counter.value += 1
+    _thread_slot.cpu = cpus[slot % len(cpus)] if cpus else None
+
+
+def _run_isolated_on_slot(algo_name, graph_dict, source, sink, timeout, max_rss_mb, **options):
+    return run_isolated(algo_name, graph_dict, source, sink, timeout=timeout,
+                        max_rss_mb=max_rss_mb, cpu=_thread_slot.cpu, **options)
+
+
+_archives = {}
+
+
+def _archived_graph(path, i):
+    """Graph dict of dataset i in the archive at path, opened once per process."""
+    archive = _archives.get(path)
+    if archive is None:
+        archive = _archives[path] = DatasetArchive(path)
+    return archive.graph_dict(i)
+
+
+def _run_archived(algo_name, path, i, source, sink, **options):
+    return run_repeated(algo_name, _archived_graph(path, i), source, sink, **options)
+
+
+def _run_isolated_archived(algo_name, path, i, source, sink, timeout, max_rss_mb, **options):
+    return _run_isolated_on_slot(algo_name, _archived_graph(path, i), source, sink,
+                                 timeout, max_rss_mb, **options)
+
+
+def _make_isolated_pool(workers):
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else []
+    slot_counter = multiprocessing.Value('i', 0)
+    return ThreadPoolExecutor(max_workers=workers, initializer=_assign_cpu,
+                              initargs=(slot_counter, cpus))
+
+
+def _make_pool(workers):
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else []
+    slot_counter = multiprocessing.Value('i', 0)
+    return ProcessPoolExecutor(max_workers=workers, initializer=_pin_worker,
+                               initargs=(slot_counter, cpus))
+
+
+CHECKPOINT_FILE = 'benchmark_results/checkpoint.jsonl'
+
+
+def _checkpoint_key(plot_id, dataset, trial, algo):
+    return (plot_id, dataset, trial, algo)
+
+
+def load_checkpoint(path=CHECKPOINT_FILE):
+    """Completed (plot_id, dataset, trial, algorithm) keys; dataset is the index within its plot."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn final line from an interrupted write
+                continue
+            done.add(_checkpoint_key(rec['plot_id'], rec['dataset'], rec['trial'], rec['algorithm']))
+    return done
+
+
+def _record_checkpoint(f, plot_id, dataset, trial, algo):
+    f.write(json.dumps({'plot_id': plot_id, 'dataset': dataset,
+                        'trial': trial, 'algorithm': algo}) + '\n')
+    f.flush()
+    os.fsync(f.fileno())
+
+
+CSV_FIELDNAMES = [
+    'algorithm', 'n', 'actual_n', 'density', 'num_layers', 
+    'nodes_per_layer', 'grid_k', 'max_capacity', 'runtime_ms', 
+    'max_flow', 'min_cut_capacity', 'min_cut_edges', 'trial', 'graph_type', 'error',
+    'status'
+]
+# Phase times in ms, in the order they run; they sum to just under runtime_ms
+PHASE_FIELDNAMES = ['build_ms', *ENGINE_PHASES, 'verify_ms']
+# Per-run measurements from run_algorithm's extra dict; blank when not taken
+EXTRA_FIELDNAMES = ['repeats', 'runtime_iqr_ms', 'runtime_ci_low_ms', 'runtime_ci_high_ms',
+                    'runtime_samples_ms', 'peak_rss_mb', 'peak_alloc_mb', *PHASE_FIELDNAMES,
+                    *OP_COUNTERS]
+CSV_FIELDNAMES += EXTRA_FIELDNAMES
+
+
+def _report_result(writer, algo, ds, result):
+    """Print one run's outcome and write its CSV row."""
+    if len(result) == 6:
+        result += ('error' if result[4] else 'ok',)
+    runtime_ms, max_flow, min_cut_capacity, min_cut_edges, error, extra, status = result
+    
+    if status in ('timeout', 'oom'):
+        print(f"{status.upper()}: {error} ({runtime_ms:.0f} ms)")
+    elif error:
+        print(f"ERROR: {error}")
+    elif 'repeats' in extra:
+        print(f"median {runtime_ms:.2f} ms, 95% CI [{extra['runtime_ci_low_ms']:.2f}, "
+              f"{extra['runtime_ci_high_ms']:.2f}] over {extra['repeats']} runs")
+    else:
+        print(f"{runtime_ms:.2f} ms")
+    
+    writer.writerow({
+        'algorithm': algo,
+        'n': ds['n'],
+        'actual_n': ds['actual_n'],
+        'density': ds['density'],
+        'num_layers': ds['num_layers'] if ds['num_layers'] is not None else '',
+        'nodes_per_layer': ds['nodes_per_layer'] if ds['nodes_per_layer'] is not None else '',
+        'grid_k': ds['grid_k'] if ds['grid_k'] is not None else '',
+        'max_capacity': ds['max_capacity'],
+        'runtime_ms': runtime_ms,
+        'max_flow': max_flow,
+        'min_cut_capacity': min_cut_capacity,
+        'min_cut_edges': min_cut_edges,
+        'trial': ds['trial'],
+        'graph_type': ds['graph_type'],
+        'error': error if error else '',
+        'status': status,
+        **{name: extra.get(name, '') for name in EXTRA_FIELDNAMES}
+    })
+
+
+def _open_results(csv_filename, resume):
+    """
+    Open a plot's results CSV and return (file, DictWriter). With resume an
+    existing file is appended to. If its header differs from CSV_FIELDNAMES
+    (it was written by an older j_run), it is first rewritten under the
+    current header, rows mapped by column name and new columns left blank.
+    A file with columns j_run no longer writes is refused rather than
+    trimmed.
+    """
+    append = resume and os.path.exists(csv_filename) and os.path.getsize(csv_filename) > 0
+    if append:
+        with open(csv_filename, newline='') as f:
+            reader = csv.DictReader(f)
+            header = reader.fieldnames or []
+            if header != CSV_FIELDNAMES:
+                unknown = [name for name in header if name not in CSV_FIELDNAMES]
+                if unknown:
+                    raise ValueError(f"Cannot resume {csv_filename}: unknown columns {unknown}; "
+                                     f"move it aside or run without --resume")
+                rows = list(reader)
+        if header != CSV_FIELDNAMES:
+            print(f"Rewriting {csv_filename} with the current columns")
+            tmp = csv_filename + '.tmp'
+            with open(tmp, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=CSV_FIELDNAMES, restval='')
+                writer.writeheader()
+                writer.writerows(rows)
+            os.replace(tmp, csv_filename)
+    csvfile = open(csv_filename, 'a' if append else 'w', newline='')
+    writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDNAMES)
+    if not append:
+        writer.writeheader()
+    return csvfile, writer
+
+
+def run_all_benchmarks(algorithms=None, workers=1, timeout=None, max_rss_mb=None, resume=False,
+                       **options):
+    """
+    Run the algorithms on every archived dataset and write one CSV per
+    plot. options go to run_repeated: count_ops, trace_memory and the
+    harness settings (warmup, repeats, min_repeats, target_ci).
+    """
+    datasets_file = 'j_datasets.pkl'
+    archive = None
+    if os.path.exists(os.path.join(DATASET_ARCHIVE, INDEX_FILE)):
+        # Only the index is read here; graphs are loaded when they are run
+        print(f"Opening dataset archive {DATASET_ARCHIVE}/...")
+        archive = DatasetArchive(DATASET_ARCHIVE)
+        all_datasets = [dict(archive.metadata(i), archive_id=i) for i in range(len(archive))]
+    else:
+        # Legacy monolithic pickle
+        print(f"Loading datasets from {datasets_file}...")
+        try:
+            with open(datasets_file, 'rb') as f:
+                all_datasets = pickle.load(f)
+        except FileNotFoundError:
+            print(f"ERROR: neither {DATASET_ARCHIVE}/ nor {datasets_file} found!")
+            print("Please run j_dtgen.py first.")
+            return
     
     print(f"Loaded {len(all_datasets)} test cases")
     
-    algorithms = ['Ford-Fulkerson', 'Dinic', 'Push-Relabel']
+    if algorithms is None:
+        algorithms = DEFAULT_ALGORITHMS
+    warm_up(algorithms)
     
     # Group datasets by plot_id
     datasets_by_plot = {}
@@ -86,9 +560,49 @@ def run_all_benchmarks():
     
     os.makedirs('benchmark_results', exist_ok=True)
     
+    # Resume: skip keys already checkpointed and append to the existing CSVs.
+    # Rows are made durable before their key is recorded, so an interruption
+    # can at worst repeat one row, never lose one.
+    done = load_checkpoint() if resume else set()
+    if resume:
+        print(f"Resuming: {len(done)} runs already completed")
+    checkpoint = open(CHECKPOINT_FILE, 'a' if resume else 'w')
+
+    def pending(plot_id, idx, ds, algo):
+        return _checkpoint_key(plot_id, idx, ds['trial'], algo) not in done
+
     total_runs = len(all_datasets) * len(algorithms)
     current_run = 0
-    
+
+    # Limits need one killable process per run; otherwise runs share workers
+    isolated = timeout is not None or max_rss_mb is not None
+    if isolated:
+        print(f"Isolating each run (timeout={timeout}s, max RSS={max_rss_mb} MB)")
+
+    # Parallel mode: queue every (dataset, algorithm) job up front; results
+    # are still consumed below in the sequential order, so CSVs are identical
+    pool = None
+    futures = {}
+    if workers > 1:
+        print(f"Running on {workers} worker processes")
+        pool = _make_isolated_pool(workers) if isolated else _make_pool(workers)
+        for plot_id in sorted(datasets_by_plot.keys()):
+            for idx, ds in enumerate(datasets_by_plot[plot_id]):
+                for algo in algorithms:
+                    if not pending(plot_id, idx, ds, algo):
+                        continue
+                    if archive is not None:
+                        # Ship the archive id, the worker maps the graph itself
+                        graph = (DATASET_ARCHIVE, ds['archive_id'])
+                        run = _run_isolated_archived if isolated else _run_archived
+                    else:
+                        graph = (ds['graph'],)
+                        run = _run_isolated_on_slot if isolated else run_repeated
+                    job = (run, algo, *graph, ds['source'], ds['sink'])
+                    if isolated:
+                        job += (timeout, max_rss_mb)
+                    futures[(plot_id, idx, algo)] = pool.submit(*job, **options)
+
     for plot_id in sorted(datasets_by_plot.keys()):
         datasets = datasets_by_plot[plot_id]
         csv_filename = f'benchmark_results/{plot_id}_results.csv'
@@ -97,54 +611,40 @@ def run_all_benchmarks():
         print(f"Processing {plot_id}: {len(datasets)} test cases × {len(algorithms)} algorithms")
         print(f"{'='*70}")
         
-        with open(csv_filename, 'w', newline='') as csvfile:
-            fieldnames = [
-                'algorithm', 'n', 'actual_n', 'density', 'num_layers', 
-                'nodes_per_layer', 'grid_k', 'max_capacity', 'runtime_ms', 
-                'max_flow', 'min_cut_capacity', 'min_cut_edges', 'trial', 'graph_type', 'error'
-            ]
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
+        csvfile, writer = _open_results(csv_filename, resume)
+        with csvfile:
             # Counters to verify Max-Flow Min-Cut theorem for this plot group
             rows_total = 0
             rows_mismatch = 0
             
-            for ds in datasets:
-                graph = ds['graph']
+            for idx, ds in enumerate(datasets):
+                if pool is None and archive is not None:
+                    graph = archive.graph_dict(ds['archive_id'])
+                else:
+                    graph = ds.get('graph')
                 source = ds['source']
                 sink = ds['sink']
                 
                 for algo in algorithms:
                     current_run += 1
                     progress = f"[{current_run}/{total_runs}]"
+                    if not pending(plot_id, idx, ds, algo):
+                        continue
                     
                     print(f"{progress} {plot_id} | {algo} | n={ds['n']} | trial={ds['trial']}...", end=' ')
                     
-                    runtime_ms, max_flow, min_cut_capacity, min_cut_edges, error = run_algorithm(algo, graph, source, sink)
-                    
-                    if error:
-                        print(f"ERROR: {error}")
+                    if pool is not None:
+                        result = futures.pop((plot_id, idx, algo)).result()
+                    elif isolated:
+                        result = run_isolated(algo, graph, source, sink, timeout=timeout,
+                                              max_rss_mb=max_rss_mb, **options)
                     else:
-                        print(f"{runtime_ms:.2f} ms")
-                    
-                    writer.writerow({
-                        'algorithm': algo,
-                        'n': ds['n'],
-                        'actual_n': ds['actual_n'],
-                        'density': ds['density'],
-                        'num_layers': ds['num_layers'] if ds['num_layers'] is not None else '',
-                        'nodes_per_layer': ds['nodes_per_layer'] if ds['nodes_per_layer'] is not None else '',
-                        'grid_k': ds['grid_k'] if ds['grid_k'] is not None else '',
-                        'max_capacity': ds['max_capacity'],
-                        'runtime_ms': runtime_ms,
-                        'max_flow': max_flow,
-                        'min_cut_capacity': min_cut_capacity,
-                        'min_cut_edges': min_cut_edges,
-                        'trial': ds['trial'],
-                        'graph_type': ds['graph_type'],
-                        'error': error if error else ''
-                    })
+                        result = run_repeated(algo, graph, source, sink, **options)
+                    _report_result(writer, algo, ds, result)
+                    max_flow, min_cut_capacity, error = result[1], result[2], result[4]
                     csvfile.flush()
+                    os.fsync(csvfile.fileno())
+                    _record_checkpoint(checkpoint, plot_id, idx, ds['trial'], algo)
 
                     # Theorem check per row: Flow should equal MinCutCapacity
                     rows_total += 1
@@ -156,6 +656,10 @@ def run_all_benchmarks():
             print(f"Theorem check summary for {plot_id}: total rows {rows_total}, mismatches {rows_mismatch}")
         
         print(f"✓ Saved results to {csv_filename}")
+
+    if pool is not None:
+        pool.shutdown()
+    checkpoint.close()
     
     print("\n" + "="*70)
     print("BENCHMARKING COMPLETE!")
@@ -164,5 +668,166 @@ def run_all_benchmarks():
     print("="*70)
 
 
+def _solve_spec(spec, algorithms, options):
+    """
+    Pipeline worker: build one dataset from its spec, run the algorithms on
+    it and return (metadata, results). The graph never leaves the worker.
+    """
+    ds = build_dataset(spec)
+    results = [run_repeated(algo, ds['graph'], ds['source'], ds['sink'], **options)
+               for algo in algorithms]
+    del ds['graph']
+    return ds, results
+
+
+def run_pipeline(algorithms=None, workers=1, resume=False, **options):
+    """
+    Generate and solve in one pass, without the dataset archive: specs are
+    produced lazily and each worker builds, solves and drops one graph at
+    a time, so memory holds at most a few graphs per worker. CSVs and the
+    checkpoint are the same as run_all_benchmarks writes, and options are
+    the same too.
+    """
+    if algorithms is None:
+        algorithms = DEFAULT_ALGORITHMS
+    warm_up(algorithms)
+
+    os.makedirs('benchmark_results', exist_ok=True)
+    done = load_checkpoint() if resume else set()
+    if resume:
+        print(f"Resuming: {len(done)} runs already completed")
+    checkpoint = open(CHECKPOINT_FILE, 'a' if resume else 'w')
+
+    # Specs are a few hundred bytes each, so counting them up front is cheap
+    total_runs = sum(1 for _ in iter_all_specs()) * len(algorithms)
+    current_run = 0
+    print(f"Streaming {total_runs // len(algorithms)} test cases × {len(algorithms)} algorithms")
+
+    # Number each spec within its plot like the pickled corpus, and skip
+    # specs whose runs are all checkpointed without building their graphs
+    def jobs():
+        for plot_id, specs in groupby(iter_all_specs(), key=lambda sp: sp['plot_id']):
+            for idx, spec in enumerate(specs):
+                todo = [algo for algo in algorithms
+                        if _checkpoint_key(plot_id, idx, spec['trial'], algo) not in done]
+                yield plot_id, idx, spec, todo
+
+    pool = None
+    if workers > 1:
+        print(f"Running on {workers} worker processes")
+        pool = _make_pool(workers)
+
+    # Keep a bounded window of specs in flight and consume them in order
+    window = deque()
+    job_iter = jobs()
+
+    def refill():
+        while len(window) < 2 * workers:
+            job = next(job_iter, None)
+            if job is None:
+                return
+            plot_id, idx, spec, todo = job
+            if not todo:
+                result = None
+            elif pool is not None:
+                result = pool.submit(_solve_spec, spec, todo, options)
+            else:
+                result = _solve_spec(spec, todo, options)
+            window.append((job, result))
+
+    refill()
+    csvfile = None
+    current_plot = None
+    while window:
+        (plot_id, idx, spec, todo), result = window.popleft()
+        if result is not None and pool is not None:
+            result = result.result()
+        refill()
+
+        if plot_id != current_plot:
+            if csvfile is not None:
+                csvfile.close()
+                print(f"✓ Saved results to {csv_filename}")
+            current_plot = plot_id
+            csv_filename = f'benchmark_results/{plot_id}_results.csv'
+            print(f"\n{'='*70}")
+            print(f"Processing {plot_id}")
+            print(f"{'='*70}")
+            csvfile, writer = _open_results(csv_filename, resume)
+
+        current_run += len(algorithms) - len(todo)
+        if result is None:
+            continue
+        ds, algo_results = result
+        for algo, run in zip(todo, algo_results):
+            current_run += 1
+            print(f"[{current_run}/{total_runs}] {plot_id} | {algo} | n={ds['n']} | trial={ds['trial']}...", end=' ')
+            _report_result(writer, algo, ds, run)
+            csvfile.flush()
+            os.fsync(csvfile.fileno())
+            _record_checkpoint(checkpoint, plot_id, idx, ds['trial'], algo)
+            if not run[4] and run[1] != run[2]:
+                print(f" -> Theorem mismatch: flow={run[1]} != min_cut_capacity={run[2]}")
+
+    if csvfile is not None:
+        csvfile.close()
+        print(f"✓ Saved results to {csv_filename}")
+    if pool is not None:
+        pool.shutdown()
+    checkpoint.close()
+
+    print("\n" + "="*70)
+    print("BENCHMARKING COMPLETE!")
+    print(f"Results saved in 'benchmark_results/' directory")
+    print(f"Total runs: {current_run}")
+    print("="*70)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run max-flow benchmarks on the j_dtgen datasets")
+    parser.add_argument('--algorithms', nargs='+', choices=ALL_ALGORITHMS,
+                        default=DEFAULT_ALGORITHMS,
+                        help="algorithms to run (default: %(default)s)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="worker processes, each pinned to one CPU; 0 = all CPUs (default: 1)")
+    parser.add_argument('--timeout', type=float, default=None,
+                        help="wall-clock limit per run in seconds (runs in an isolated process)")
+    parser.add_argument('--max-rss-mb', type=float, default=None,
+                        help="memory a run may allocate, in MB (runs in an isolated process)")
+    parser.add_argument('--resume', action='store_true',
+                        help=f"skip runs recorded in {CHECKPOINT_FILE} and append to existing CSVs")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="generate each dataset inside the workers instead of reading the dataset archive")
+    parser.add_argument('--count-ops', action='store_true',
+                        help="record each engine's operation counters (pushes, relabels, arc scans, ...) "
+                             "as extra CSV columns")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="also record peak allocated memory per run with tracemalloc "
+                             "(each engine runs a second, untimed time)")
+    parser.add_argument('--warmup', type=int, default=0,
+                        help="untimed runs before the timed ones (default: 0)")
+    parser.add_argument('--repeats', type=int, default=1,
+                        help="timed runs per dataset and algorithm, at most; the median is "
+                             "recorded with its IQR and bootstrap CI (default: 1)")
+    parser.add_argument('--min-repeats', type=int, default=MIN_REPEATS,
+                        help="timed runs before stopping early (default: %(default)s)")
+    parser.add_argument('--target-ci', type=float, default=TARGET_CI,
+                        help="stop once the 95%% CI of the median is within this fraction "
+                             "of it (default: %(default)s)")
+    args = parser.parse_args()
+    if args.pipeline and (args.timeout is not None or args.max_rss_mb is not None):
+        parser.error("--timeout and --max-rss-mb are not supported with --pipeline")
+    return args
+
+
 if __name__ == "__main__":
-    run_all_benchmarks()
+    args = parse_args()
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    options = dict(count_ops=args.count_ops, trace_memory=args.trace_memory, warmup=args.warmup,
+                   repeats=args.repeats, min_repeats=args.min_repeats, target_ci=args.target_ci)
+    if args.pipeline:
+        run_pipeline(algorithms=args.algorithms, workers=workers, resume=args.resume, **options)
+    else:
+        run_all_benchmarks(algorithms=args.algorithms, workers=workers,
+                           timeout=args.timeout, max_rss_mb=args.max_rss_mb, resume=args.resume,
+                           **options)
@@ -1,145 +1,354 @@
-from collections import deque
-
-def push_relabel(graph, s, t):
-    n = graph.n
-    cap = [dict() for _ in range(n)]
-    for u in range(n):
-        for v, c in graph.adj[u].items():
-            if c <= 0:
-                continue
-            cap[u][v] = cap[u].get(v, 0) + c
-            cap[v].setdefault(u, 0)
-
-    height = [0] * n
-    height[s] = n
-    excess = [0] * n
-    Q = deque()
-
-    def push(u, v):
-        send = min(excess[u], cap[u][v])
-        if send <= 0:
-            return
-        cap[u][v] -= send
-        cap[v][u] = cap[v].get(u, 0) + send
-        excess[u] -= send
-        was_zero = (excess[v] == 0)
-        excess[v] += send
-        if v != s and v != t and was_zero and excess[v] > 0:
-            Q.append(v)
-
-    def relabel(u):
-        min_h = None
-        for v, c in cap[u].items():
-            if c > 0:
-                if min_h is None or height[v] < min_h:
-                    min_h = height[v]
-        if min_h is not None:
-            height[u] = min_h + 1
-
-    for v, c in list(cap[s].items()):
-        if c <= 0:
-            continue
-        send = c
-        cap[s][v] -= send
-        cap[v][s] = cap[v].get(s, 0) + send
-        excess[v] += send
-        excess[s] -= send
-        if v != s and v != t and excess[v] > 0:
-            Q.append(v)
-
-    while Q:
-        u = Q[0]
-        pushed = False
-
-        for v, c in list(cap[u].items()):
-            if excess[u] == 0:
-                break
-            if c > 0 and height[u] == height[v] + 1:
-                push(u, v)
-                pushed = True
-
-        if excess[u] > 0 and not pushed:
-            relabel(u)
-
-        if excess[u] == 0:
-            Q.popleft()
-
-
-    return excess[t]
-
-
-def push_relabel_min_cut(graph, s, t):
-    """
-    Run Push-Relabel to compute max flow and return (flow, min_cut_edges)
-    using the final residual capacities.
-    """
-    n = graph.n
-    # Construct residual caps (dict-of-dicts) similar to push_relabel's internal cap
-    cap = [dict() for _ in range(n)]
-    for u in range(n):
-        for v, c in graph.adj[u].items():
-            if c <= 0:
-                continue
-            cap[u][v] = cap[u].get(v, 0) + c
-            cap[v].setdefault(u, 0)
-
-    height = [0] * n
-    height[s] = n
-    excess = [0] * n
-    Q = deque()
-
-    def push(u, v):
-        send = min(excess[u], cap[u][v])
-        if send <= 0:
-            return
-        cap[u][v] -= send
-        cap[v][u] = cap[v].get(u, 0) + send
-        excess[u] -= send
-        was_zero = (excess[v] == 0)
-        excess[v] += send
-        if v != s and v != t and was_zero and excess[v] > 0:
-            Q.append(v)
-
-    def relabel(u):
-        min_h = None
-        for v, c in cap[u].items():
-            if c > 0:
-                if min_h is None or height[v] < min_h:
-                    min_h = height[v]
-        if min_h is not None:
-            height[u] = min_h + 1
-
-    for v, c in list(cap[s].items()):
-        if c <= 0:
-            continue
-        send = c
-        cap[s][v] -= send
-        cap[v][s] = cap[v].get(s, 0) + send
-        excess[v] += send
-        excess[s] -= send
-        if v != s and v != t and excess[v] > 0:
-            Q.append(v)
-
-    while Q:
-        u = Q[0]
-        pushed = False
-
-        for v, c in list(cap[u].items()):
-            if excess[u] == 0:
-                break
-            if c > 0 and height[u] == height[v] + 1:
-                push(u, v)
-                pushed = True
-
-        if excess[u] > 0 and not pushed:
-            relabel(u)
-
-        if excess[u] == 0:
-            Q.popleft()
-
-    flow = excess[t]
-
-    residual = cap 
-    from graphy import compute_min_cut_from_residual
-    cut = compute_min_cut_from_residual(graph, residual, s)
-    return flow, cut
+import time
+from collections import deque
+import numpy as np
+from graphy import CSRGraph, bfs_levels, cut_edges_from_mask, lap, reachable_mask
+
+def _fifo_push_relabel(csr, s, t, stats=None, timings=None):
+    """
+    FIFO push-relabel over the paired arcs of a CSRGraph.
+    Returns (residual, excess) once every active vertex has been discharged.
+    stats, if a dict, receives the counters of _highest_label_push_relabel
+    (global_relabels is always 0 here); push and relabel are only wrapped
+    with counting when it is given. timings, if a dict, receives
+    residual_ms and solve_ms.
+    """
+    clock = time.perf_counter()
+    n = csr.n
+    offset = csr.offset.tolist()
+    target = csr.target.tolist()
+    rev = csr.rev.tolist()
+    res = csr.capacity.tolist()
+    clock = lap(timings, 'residual_ms', clock)
+
+    height = [0] * n
+    height[s] = n
+    excess = [0] * n
+    Q = deque()
+    counting = stats is not None
+    # [saturating pushes, non-saturating pushes, relabels, arc scans]
+    counts = [0, 0, 0, 0]
+
+    def push(u, i):
+        v = target[i]
+        send = min(excess[u], res[i])
+        if send <= 0:
+            return
+        res[i] -= send
+        res[rev[i]] += send
+        excess[u] -= send
+        was_zero = (excess[v] == 0)
+        excess[v] += send
+        if v != s and v != t and was_zero and excess[v] > 0:
+            Q.append(v)
+
+    def relabel(u):
+        min_h = None
+        for i in range(offset[u], offset[u + 1]):
+            if res[i] > 0:
+                h = height[target[i]]
+                if min_h is None or h < min_h:
+                    min_h = h
+        if min_h is not None:
+            height[u] = min_h + 1
+
+    if counting:
+        plain_push, plain_relabel = push, relabel
+
+        def push(u, i):
+            # Only called with excess[u] > 0 and res[i] > 0
+            counts[excess[u] < res[i]] += 1
+            plain_push(u, i)
+
+        def relabel(u):
+            counts[2] += 1
+            counts[3] += offset[u + 1] - offset[u]
+            plain_relabel(u)
+
+    for i in range(offset[s], offset[s + 1]):
+        c = res[i]
+        if c <= 0:
+            continue
+        v = target[i]
+        res[i] -= c
+        res[rev[i]] += c
+        excess[v] += c
+        excess[s] -= c
+        if v != s and v != t and excess[v] > 0:
+            Q.append(v)
+
+    while Q:
+        u = Q[0]
+        pushed = False
+
+        for i in range(offset[u], offset[u + 1]):
+            if excess[u] == 0:
+                if counting:
+                    counts[3] += i - offset[u]
+                break
+            if res[i] > 0 and height[u] == height[target[i]] + 1:
+                push(u, i)
+                pushed = True
+        else:
+            if counting:
+                counts[3] += offset[u + 1] - offset[u]
+
+        if excess[u] > 0 and not pushed:
+            relabel(u)
+
+        if excess[u] == 0:
+            Q.popleft()
+
+    if counting:
+        stats.update(pushes_saturating=counts[0], pushes_nonsaturating=counts[1],
+                     relabels=counts[2], global_relabels=0, arc_scans=counts[3])
+    lap(timings, 'solve_ms', clock)
+    return res, excess
+
+
+def _global_relabel(csr, s, t, res, height):
+    """
+    Exact labels from reverse residual BFS: distance to t (avoiding s) for
+    vertices that can still reach t, otherwise n + distance to s.
+    Unreachable vertices get 2n.
+    """
+    n = csr.n
+    allowed = np.ones(n, dtype=bool)
+    allowed[s] = False
+    to_t = bfs_levels(csr, res, t, reverse=True, allowed=allowed)
+    to_s = bfs_levels(csr, res, s, reverse=True, allowed=to_t < 0)
+    labels = np.full(n, 2 * n, dtype=np.int64)
+    labels[to_s >= 0] = n + to_s[to_s >= 0]
+    labels[to_t >= 0] = to_t[to_t >= 0]
+    height[:] = labels.tolist()
+
+
+def _highest_label_push_relabel(csr, s, t, phase_two=True, stats=None, timings=None):
+    """
+    Highest-label push-relabel with current arcs, the gap heuristic and
+    periodic global relabeling. Returns (residual, excess) like
+    _fifo_push_relabel.
+
+    Phase one only discharges vertices below height n; when it ends the
+    preflow is maximum, excess[t] is the max flow value and the residual
+    already yields a min cut. Phase two (phase_two=True) returns the
+    leftover excess to s so the residual describes a feasible flow.
+
+    stats, if a dict, receives pushes_saturating, pushes_nonsaturating,
+    relabels, global_relabels and arc_scans (current-arc advances plus
+    relabel scans). Arc scans and non-saturating pushes are read off the
+    current arc and the last push once per discharge; every count sits
+    behind one flag test, so without stats nothing is tallied. timings,
+    if a dict, receives residual_ms and solve_ms.
+    """
+    clock = time.perf_counter()
+    n = csr.n
+    offset = csr.offset.tolist()
+    target = csr.target.tolist()
+    rev = csr.rev.tolist()
+    res = csr.capacity.tolist()
+    num_arcs = len(res)
+    clock = lap(timings, 'residual_ms', clock)
+
+    height = [0] * n
+    excess = [0] * n
+    for i in range(offset[s], offset[s + 1]):
+        c = res[i]
+        if c > 0:
+            res[i] = 0
+            res[rev[i]] += c
+            excess[target[i]] += c
+            excess[s] -= c
+
+    top = 2 * n + 1
+    cur = offset[:n]
+    active = [[] for _ in range(top)]
+    members = [set() for _ in range(n)]
+    hmax = 0
+
+    def rebuild(limit):
+        _global_relabel(csr, s, t, res, height)
+        height[s] = n
+        for bucket in active:
+            bucket.clear()
+        for bucket in members:
+            bucket.clear()
+        cur[:] = offset[:n]
+        hmax = 0
+        for v in range(n):
+            h = height[v]
+            if h < n:
+                members[h].add(v)
+            if excess[v] > 0 and v != s and v != t and h < limit:
+                active[h].append(v)
+                if h > hmax:
+                    hmax = h
+        return hmax
+
+    work = 0
+    counting = stats is not None
+    saturating = nonsaturating = relabels = rebuilds = scans = 0
+    global_freq = n + num_arcs
+    limits = (n, 2 * n) if phase_two else (n,)
+
+    for limit in limits:
+        hmax = rebuild(limit)
+        if counting:
+            rebuilds += 1
+        while True:
+            while hmax >= 0 and not active[hmax]:
+                hmax -= 1
+            if hmax < 0:
+                break
+            u = active[hmax].pop()
+            du = height[u]
+            e = excess[u]
+            if du != hmax or e == 0:
+                continue
+
+            i = start = cur[u]
+            end = offset[u + 1]
+            while e > 0:
+                if i == end:
+                    # Relabel u and restart its current arc
+                    lo = offset[u]
+                    min_h = top
+                    for j in range(lo, end):
+                        if res[j] > 0:
+                            h = height[target[j]]
+                            if h < min_h:
+                                min_h = h
+                    work += end - lo + 12
+                    if counting:
+                        relabels += 1
+                        scans += end - start + end - lo
+                    start = lo
+                    old = du
+                    du = min_h + 1
+                    height[u] = du
+                    i = lo
+                    if old < n:
+                        members[old].discard(u)
+                        if du < n:
+                            members[du].add(u)
+                        if not members[old]:
+                            # Gap: nothing above old can reach t any more
+                            for h in range(old + 1, n):
+                                for v in members[h]:
+                                    height[v] = n + 1
+                                    if excess[v] > 0 and v != u and n + 1 < limit:
+                                        active[n + 1].append(v)
+                                members[h].clear()
+                            if n + 1 > hmax and n + 1 < limit:
+                                hmax = n + 1
+                            du = height[u]
+                    if du >= limit:
+                        # Left for phase two
+                        break
+                    continue
+                r = res[i]
+                if r > 0:
+                    v = target[i]
+                    if height[v] == du - 1:
+                        delta = e if e < r else r
+                        res[i] = r - delta
+                        res[rev[i]] += delta
+                        e -= delta
+                        if excess[v] == 0 and v != s and v != t:
+                            active[du - 1].append(v)
+                        excess[v] += delta
+                        if delta == r:
+                            i += 1
+                            if counting:
+                                saturating += 1
+                        continue
+                i += 1
+            if counting:
+                if e == 0 and delta < r:
+                    # Only a push can empty u, and a non-saturating one ends it
+                    nonsaturating += 1
+                scans += i - start
+            excess[u] = e
+            cur[u] = i
+            if du - 1 > hmax:
+                hmax = du - 1
+
+            if work > global_freq:
+                work = 0
+                hmax = rebuild(limit)
+                if counting:
+                    rebuilds += 1
+
+    if counting:
+        stats.update(pushes_saturating=saturating, pushes_nonsaturating=nonsaturating,
+                     relabels=relabels, global_relabels=rebuilds, arc_scans=scans)
+    lap(timings, 'solve_ms', clock)
+    return res, excess
+
+
+def _solve(csr, s, t, method, phase_two, stats=None, timings=None):
+    if method == 'highest':
+        return _highest_label_push_relabel(csr, s, t, phase_two=phase_two, stats=stats,
+                                           timings=timings)
+    if method == 'fifo':
+        return _fifo_push_relabel(csr, s, t, stats=stats, timings=timings)
+    raise ValueError(f"Unknown push-relabel method: {method}")
+
+
+def _sink_side_cut(csr, res, t):
+    """
+    Min cut from a maximum preflow: T is every vertex that still reaches t
+    in the residual graph, the cut is every original edge entering T.
+    (The source-side BFS of compute_min_cut_from_csr needs a full flow.)
+    """
+    sink_side = reachable_mask(csr, res, t, reverse=True)
+    return cut_edges_from_mask(csr, ~sink_side)
+
+
+def push_relabel(graph, s, t, method='highest', stats=None, timings=None):
+    """
+    method: 'highest' (highest-label with gap and global relabeling) or
+    'fifo' (plain FIFO selection). Only the flow value is needed, so the
+    highest-label engine stops after phase one. stats, if a dict, receives
+    the engine's operation counts (see _highest_label_push_relabel).
+    """
+    csr = CSRGraph.from_graph(graph)
+    _, excess = _solve(csr, s, t, method, phase_two=False, stats=stats, timings=timings)
+    return excess[t]
+
+
+def push_relabel_min_cut(graph, s, t, method='highest', stats=None, timings=None):
+    """
+    Run Push-Relabel to compute max flow and return (flow, min_cut_edges).
+    The cut is read off the maximum preflow, so preflow-to-flow conversion
+    is skipped.
+    """
+    csr = CSRGraph.from_graph(graph)
+    res, excess = _solve(csr, s, t, method, phase_two=False, stats=stats, timings=timings)
+    clock = time.perf_counter()
+    cut = _sink_side_cut(csr, res, t)
+    lap(timings, 'cut_ms', clock)
+    return excess[t], cut
+
+
+def push_relabel_flow(graph, s, t, method='highest', stats=None, timings=None):
+    """
+    Run both phases and return (flow, min_cut_edges, edge_flows), where
+    edge_flows is a feasible max flow as a list of (u, v, f) with f > 0.
+    """
+    csr = CSRGraph.from_graph(graph)
+    res, excess = _solve(csr, s, t, method, phase_two=True, stats=stats, timings=timings)
+    clock = time.perf_counter()
+    cut = _sink_side_cut(csr, res, t)
+    lap(timings, 'cut_ms', clock)
+
+    offset = csr.offset.tolist()
+    target = csr.target.tolist()
+    capacity = csr.capacity.tolist()
+    edge_flows = []
+    for u in range(csr.n):
+        for i in range(offset[u], offset[u + 1]):
+            # Paired arcs carry net flow; report it on the arc it runs along
+            f = capacity[i] - res[i]
+            if f > 0:
+                edge_flows.append((u, target[i], f))
+    return excess[t], cut, edge_flows
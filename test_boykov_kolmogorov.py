@@ -0,0 +1,44 @@
+import random
+from graphy import Graph
+from dinic import dinic
+from boykov_kolmogorov import boykov_kolmogorov
+
+
+def sample_graph():
+    """The graph of test_mincut.py: max flow 13, s = 0, t = 3."""
+    g = Graph(4)
+    g.add_edge(0, 1, 10)
+    g.add_edge(0, 2, 10)
+    g.add_edge(1, 2, 2)
+    g.add_edge(1, 3, 4)
+    g.add_edge(2, 3, 9)
+    return g
+
+
+def random_graph(rng, n, m, max_cap):
+    g = Graph(n)
+    for _ in range(m):
+        u, v = rng.sample(range(n), 2)
+        g.add_edge(u, v, rng.randint(1, max_cap))
+    return g
+
+
+def cut_capacity(graph, cut):
+    return sum(graph.capacity(u, v) for u, v in cut)
+
+
+def test_boykov_kolmogorov_sample():
+    g = sample_graph()
+    flow, cut = boykov_kolmogorov(g, 0, 3)
+    assert flow == 13
+    assert cut_capacity(g, cut) == 13
+
+
+def test_boykov_kolmogorov_matches_dinic():
+    rng = random.Random(7)
+    for _ in range(50):
+        g = random_graph(rng, rng.randint(2, 30), rng.randint(0, 120), rng.choice([1, 10, 1000]))
+        s, t = 0, g.n - 1
+        flow, cut = boykov_kolmogorov(g, s, t)
+        assert flow == dinic(g, s, t)[0]
+        assert cut_capacity(g, cut) == flow
@@ -0,0 +1,44 @@
+import os
+import numpy as np
+import pytest
+from dataset_archive import DatasetArchive, INDEX_FILE, PAYLOAD_FILE, write_archive
+
+
+def dataset(name, n):
+    """A chain 0 -> 1 -> ... -> n - 1 with capacities 1..n-1."""
+    graph = {u: ({u + 1: u + 1} if u + 1 < n else {}) for u in range(n)}
+    return {'name': name, 'graph': graph}
+
+
+def test_round_trip(tmp_path):
+    datasets = [dataset('a', 3), dataset('b', 300)]
+    assert write_archive(str(tmp_path), datasets) == 2
+    archive = DatasetArchive(str(tmp_path))
+    assert [ds['name'] for ds in archive] == ['a', 'b']
+    assert archive.load(1)['graph'] == datasets[1]['graph']
+
+
+def test_interrupted_overwrite_keeps_old_archive(tmp_path):
+    path = str(tmp_path)
+    write_archive(path, [dataset('old', 5)])
+
+    def failing():
+        yield dataset('new', 400)
+        raise RuntimeError("interrupted")
+
+    with pytest.raises(RuntimeError):
+        write_archive(path, failing())
+    assert sorted(os.listdir(path)) == [PAYLOAD_FILE, INDEX_FILE]
+    archive = DatasetArchive(path)
+    assert archive.load(0) == dataset('old', 5)
+
+
+def test_mapped_reader_survives_overwrite(tmp_path):
+    path = str(tmp_path)
+    write_archive(path, [dataset('old', 5)])
+    archive = DatasetArchive(path)
+    offsets, heads, caps = (np.array(a) for a in archive.adjacency(0))
+    write_archive(path, [dataset('new', 50), dataset('newer', 60)])
+    assert [a.tolist() for a in archive.adjacency(0)] == \
+        [offsets.tolist(), heads.tolist(), caps.tolist()]
+    assert DatasetArchive(path).metadata(1) == {'name': 'newer'}
@@ -0,0 +1,59 @@
+import pytest
+from dimacs import read_dimacs, read_dimacs_graph, write_dimacs_graph
+from dinic import dinic
+
+# The graph of test_mincut.py, with a comment, a blank line, CRLF endings and
+# a parallel arc (2 -> 4 given as 4 + 5) thrown in; max flow 13
+SAMPLE = (b"c hand-written sample\r\n"
+          b"p max 4 6\r\n"
+          b"n 1 s\r\n"
+          b"n 4 t\r\n"
+          b"\r\n"
+          b"a 1 2 10\r\n"
+          b"a 1 3 10\r\n"
+          b"a 2 3 2\r\n"
+          b"a 2 4 4\r\n"
+          b"c between arcs\r\n"
+          b"a 3 4 9\r\n"
+          b"a 2 4 0\r\n")
+
+
+def write_sample(tmp_path, text=SAMPLE):
+    path = tmp_path / 'sample.max'
+    path.write_bytes(text)
+    return str(path)
+
+
+def test_read_hand_written_file(tmp_path):
+    n, s, t, tails, heads, caps = read_dimacs(write_sample(tmp_path))
+    assert (n, s, t) == (4, 0, 3)
+    assert tails.tolist() == [0, 0, 1, 1, 2, 1]
+    assert heads.tolist() == [1, 2, 2, 3, 3, 3]
+    assert caps.tolist() == [10, 10, 2, 4, 9, 0]
+
+
+def test_graph_merges_parallel_arcs(tmp_path):
+    text = SAMPLE.replace(b"a 2 4 4", b"a 2 4 1").replace(b"a 2 4 0", b"a 2 4 3")
+    graph, s, t = read_dimacs_graph(write_sample(tmp_path, text))
+    assert graph.capacity(1, 3) == 4
+    assert dinic(graph, s, t)[0] == 13
+
+
+def test_round_trip(tmp_path):
+    graph, s, t = read_dimacs_graph(write_sample(tmp_path))
+    out = str(tmp_path / 'copy.max')
+    write_dimacs_graph(out, graph, s, t, comments=['copy'])
+    copy, s2, t2 = read_dimacs_graph(out)
+    assert (s2, t2) == (s, t)
+    assert copy.adj == graph.adj
+    assert dinic(copy, s2, t2)[0] == 13
+
+
+@pytest.mark.parametrize('old, new', [
+    (b"p max 4 6", b"p max 4 7"),     # arc count does not match
+    (b"a 3 4 9", b"a 3 5 9"),         # endpoint outside 1..n
+    (b"n 4 t\r\n", b""),              # no sink
+])
+def test_malformed_files(tmp_path, old, new):
+    with pytest.raises(ValueError):
+        read_dimacs(write_sample(tmp_path, SAMPLE.replace(old, new)))
@@ -0,0 +1,42 @@
+import random
+import sys
+from graphy import CSRGraph, Graph
+from dinic import Dinic, dinic
+
+
+def random_graph(rng, n, m, max_cap):
+    g = Graph(n)
+    for _ in range(m):
+        u, v = rng.sample(range(n), 2)
+        g.add_edge(u, v, rng.randint(1, max_cap))
+    return g
+
+
+def to_dinic(graph):
+    d = Dinic(graph.n)
+    for u in range(graph.n):
+        for v, cap in graph.adj[u].items():
+            d.add_edge(u, v, cap)
+    return d
+
+
+def test_deep_level_graph():
+    # A path far longer than the recursion limit
+    n = 3 * sys.getrecursionlimit()
+    d = Dinic(n)
+    for u in range(n - 1):
+        d.add_edge(u, u + 1, 5 if u != n // 2 else 2)
+    assert d.max_flow(0, n - 1) == 2
+    # The residual is kept: nothing is left to push
+    assert d.max_flow(0, n - 1) == 0
+
+
+def test_class_matches_dinic():
+    rng = random.Random(3)
+    for _ in range(50):
+        g = random_graph(rng, rng.randint(2, 30), rng.randint(0, 120), rng.choice([1, 10, 1000]))
+        s, t = 0, g.n - 1
+        flow, cut = dinic(g, s, t)
+        for d, original in ((to_dinic(g), g), (Dinic.from_csr(CSRGraph.from_graph(g)), None)):
+            flow2, cut2 = d.max_flow_min_cut(s, t, original)
+            assert (flow2, sorted(cut2)) == (flow, sorted(cut))
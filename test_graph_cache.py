@@ -0,0 +1,61 @@
+import linecache
+import os
+import sys
+import types
+import graph_cache
+import j_dtgen
+from graph_cache import PROJECT_DIR, cache_key
+
+
+def edited_dtgen(monkeypatch, old, new):
+    """
+    A copy of j_dtgen with old replaced by new in its source, loaded as a
+    project module, so inspect.getsource sees the edited code.
+    """
+    with open(j_dtgen.__file__) as f:
+        source = f.read()
+    assert source.count(old) == 1
+    source = source.replace(old, new)
+    name = 'j_dtgen_edited'
+    path = os.path.join(PROJECT_DIR, name + '.py')
+    module = types.ModuleType(name)
+    module.__file__ = path
+    monkeypatch.setitem(sys.modules, name, module)
+    monkeypatch.setitem(linecache.cache, path,
+                        (len(source), None, source.splitlines(True), path))
+    exec(compile(source, path, 'exec'), module.__dict__)
+    return module
+
+
+def spec_keys(module):
+    """(plot_id, cache key) of every spec, in iter_all_specs order."""
+    return [(spec['plot_id'], cache_key(module.GRAPH_BUILDERS[spec['builder']], spec['params']))
+            for spec in module.iter_all_specs()]
+
+
+def changed_plots(before, after):
+    assert [plot for plot, _ in before] == [plot for plot, _ in after]
+    return {plot for (plot, old), (_, new) in zip(before, after) if old != new}
+
+
+def test_editing_one_spec_keeps_other_keys(monkeypatch):
+    before = spec_keys(j_dtgen)
+    edited = edited_dtgen(monkeypatch, "    fixed_m = 1200 ", "    fixed_m = 1300 ")
+    assert changed_plots(before, spec_keys(edited)) == {'F3'}
+
+
+def test_editing_a_builder_changes_its_keys(monkeypatch):
+    before = spec_keys(j_dtgen)
+    edited = edited_dtgen(monkeypatch, '    """Edge arrays of a k×k grid',
+                          '    # edited\n    """Edge arrays of a k×k grid')
+    assert changed_plots(before, spec_keys(edited)) == {'A4', 'E1'}
+
+
+def test_code_version_follows_helpers():
+    # The dense builder's key covers the generator and LCG it calls, but
+    # not the spec tables of its own module
+    parts = {}
+    graph_cache._collect_code(j_dtgen._random_builder, '_random_builder', parts)
+    names = {name for name, _ in parts.values()}
+    assert {'dense_random_edges', '_lcg_stream', 'LCG_A'} <= names
+    assert not any(name.startswith('specs_') for name in names)
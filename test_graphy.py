@@ -0,0 +1,32 @@
+import pickle
+import numpy as np
+from graphy import CSRGraph, Graph
+
+
+def test_constructor_leaves_caller_arrays_writeable():
+    csr = CSRGraph.from_edges(3, [0, 1], [1, 2], [4, 5])
+    arrays = [np.array(a) for a in (csr.offset, csr.target, csr.capacity, csr.rev)]
+    for arr in arrays:
+        assert arr.base is None and arr.flags.writeable
+    copy = CSRGraph(csr.n, csr.m, *arrays)
+    for arr in arrays:
+        assert arr.flags.writeable
+    arrays[2][:] = 0
+    assert copy.capacity.tolist() == csr.capacity.tolist()
+    assert not copy.capacity.flags.writeable
+
+
+def test_read_only_arrays_are_shared():
+    csr = CSRGraph.from_edges(3, [0, 1], [1, 2], [4, 5])
+    copy = CSRGraph(csr.n, csr.m, csr.offset, csr.target, csr.capacity, csr.rev)
+    assert copy.offset is csr.offset and copy.capacity is csr.capacity
+
+
+def test_from_graph_and_pickle():
+    g = Graph(3)
+    g.add_edge(0, 1, 4)
+    g.add_edge(1, 2, 5)
+    g.add_edge(1, 2, 1)
+    csr = pickle.loads(pickle.dumps(CSRGraph.from_graph(g)))
+    assert [a.tolist() for a in csr.edges()] == [[0, 1], [1, 2], [4, 6]]
+    assert not any(a.flags.writeable for a in (csr.offset, csr.target, csr.capacity, csr.rev))
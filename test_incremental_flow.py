@@ -0,0 +1,67 @@
+import random
+from graphy import Graph
+from dinic import dinic
+from incremental_flow import IncrementalMaxFlow
+
+
+def sample_graph():
+    """The graph of test_mincut.py: max flow 13, s = 0, t = 3."""
+    g = Graph(4)
+    g.add_edge(0, 1, 10)
+    g.add_edge(0, 2, 10)
+    g.add_edge(1, 2, 2)
+    g.add_edge(1, 3, 4)
+    g.add_edge(2, 3, 9)
+    return g
+
+
+def random_graph(rng, n, m, max_cap):
+    g = Graph(n)
+    for _ in range(m):
+        u, v = rng.sample(range(n), 2)
+        g.add_edge(u, v, rng.randint(1, max_cap))
+    return g
+
+
+def cut_capacity(graph, cut):
+    return sum(graph.capacity(u, v) for u, v in cut)
+
+
+def set_capacity(graph, u, v, c):
+    """What IncrementalMaxFlow.set_capacity does, on a plain Graph."""
+    if c:
+        graph.adj[u][v] = c
+    else:
+        graph.adj[u].pop(v, None)
+
+
+def test_incremental_sample_edits():
+    g = sample_graph()
+    inc = IncrementalMaxFlow(g, 0, 3)
+    assert inc.max_flow_min_cut() == dinic(g, 0, 3)
+    for u, v, c in [(2, 3, 3), (1, 3, 0), (1, 3, 12), (0, 3, 5), (0, 1, 1)]:
+        inc.set_capacity(u, v, c)
+        set_capacity(g, u, v, c)
+        flow, cut = inc.max_flow_min_cut()
+        assert flow == dinic(g, 0, 3)[0]
+        assert cut_capacity(g, cut) == flow
+
+
+def test_incremental_matches_dinic():
+    rng = random.Random(11)
+    for _ in range(30):
+        n = rng.randint(2, 20)
+        g = random_graph(rng, n, rng.randint(0, 80), 20)
+        s, t = 0, n - 1
+        inc = IncrementalMaxFlow(g, s, t)
+        for _ in range(10):
+            # A batch of edits, then one repair
+            for _ in range(rng.randint(1, 3)):
+                u, v = rng.sample(range(n), 2)
+                c = rng.choice([0, rng.randint(1, 20)])
+                inc.set_capacity(u, v, c)
+                set_capacity(g, u, v, c)
+            flow = inc.max_flow()
+            assert flow == dinic(g, s, t)[0]
+            assert cut_capacity(g, inc.min_cut()) == flow
+            assert all(0 <= inc.flow_on(u, v) <= c for u in range(n) for v, c in g.adj[u].items())
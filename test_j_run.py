@@ -0,0 +1,29 @@
+import subprocess
+import sys
+from j_run import WARM_UP_GRAPHS, run_algorithm
+
+# Run in a fresh interpreter, so numpy's lazy imports have not happened yet
+ISOLATION_CHECK = """
+from statistics import median
+from graph_generator import dense_random_edges, edges_to_adjacency
+from j_run import run_algorithm, run_isolated
+n, tails, heads, caps = dense_random_edges(50, density=0.3, cap=10, seed=1)
+graph = dict(enumerate(edges_to_adjacency(n, tails, heads, caps)))
+isolated = median(run_isolated('Dinic', graph, 0, n - 1)[0] for _ in range(5))
+in_process = median(run_algorithm('Dinic', graph, 0, n - 1)[0] for _ in range(5))
+print(isolated, in_process)
+"""
+
+
+def test_isolated_timings_match_in_process():
+    out = subprocess.run([sys.executable, '-c', ISOLATION_CHECK], check=True,
+                         capture_output=True, text=True).stdout
+    isolated, in_process = map(float, out.split())
+    # Cold numpy imports used to add 15-20 ms to every isolated run here
+    assert isolated < in_process + 5
+
+
+def test_warm_up_graphs_solve():
+    for graph in WARM_UP_GRAPHS:
+        for algo in ('Dinic', 'Push-Relabel', 'Boykov-Kolmogorov', 'Auto'):
+            assert run_algorithm(algo, graph, 0, 3)[4] is None